@@ -0,0 +1,98 @@
+"""Store enum columns as SMALLINT codes
+
+init_db() used to create these columns as sa.Enum, which stores the
+member name: a native ENUM type on Postgres, VARCHAR elsewhere. The
+models now map them through CodedEnum, which reads and writes the
+__codes__ integers.
+
+Revision ID: 08f09cb97620
+Revises:
+Create Date: 2026-10-16 09:12:40.118204
+
+"""
+from typing import Dict, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "08f09cb97620"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Codes as of this revision, copied so later enum changes can't alter what
+# the migration writes
+SESSION_STATUS_CODES = {
+    "CREATED": 0, "PROCESSING_EXCEL": 1, "DISCOVERY_QUESTIONS": 2,
+    "AWAITING_USER_INPUT": 3, "STRATEGIC_CLARIFICATION": 4,
+    "GENERATING_SQL": 5, "COMPLETED": 6, "FAILED": 7, "ABANDONED": 8,
+}
+QUESTION_TYPE_CODES = {
+    "INFORMATION_DISCOVERY": 0, "STRATEGIC_CLARIFICATION": 1,
+    "TRANSFORMATION_STRATEGY": 2, "JOIN_STRATEGY": 3,
+    "OUTPUT_FORMAT": 4, "MULTI_TABLE_DETECTION": 5,
+}
+GENERATION_STRATEGY_CODES = {"SINGLE_UNIFIED_QUERY": 0, "MULTIPLE_SEPARATE_QUERIES": 1, "SEQUENTIAL_PIPELINE": 2}
+VALIDATION_STATUS_CODES = {"PASSED": 0, "FAILED": 1, "WARNINGS": 2, "NOT_VALIDATED": 3}
+
+# (table, column, Postgres enum type name, codes)
+ENUM_COLUMNS = (
+    ("analysis_sessions", "status", "sessionstatus", SESSION_STATUS_CODES),
+    ("ai_interactions", "question_type", "questiontype", QUESTION_TYPE_CODES),
+    ("sql_generations", "generation_strategy", "sqlgenerationstrategy", GENERATION_STRATEGY_CODES),
+    ("sql_generations", "validation_status", "validationstatus", VALIDATION_STATUS_CODES),
+)
+
+
+def _case(expression: str, mapping: Dict) -> str:
+    """CASE expression mapping each key of mapping to its value"""
+    branches = " ".join(f"WHEN {key!r} THEN {value!r}" for key, value in mapping.items())
+    return f"CASE {expression} {branches} END"
+
+
+def _is_integer_column(table: str, column: str) -> bool:
+    """True if the column already holds codes (table created after the switch)"""
+    if op.get_context().as_sql:
+        return False
+    columns = sa.inspect(op.get_bind()).get_columns(table)
+    return isinstance(next(c["type"] for c in columns if c["name"] == column), sa.Integer)
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+
+    for table, column, type_name, codes in ENUM_COLUMNS:
+        if _is_integer_column(table, column):
+            continue
+        if postgres:
+            op.alter_column(
+                table, column,
+                type_=sa.SmallInteger(),
+                postgresql_using=_case(f"{column}::text", codes)
+            )
+            op.execute(f"DROP TYPE IF EXISTS {type_name}")
+        else:
+            op.execute(f"UPDATE {table} SET {column} = {_case(column, codes)}")
+            with op.batch_alter_table(table) as batch:
+                batch.alter_column(column, type_=sa.SmallInteger(), existing_type=sa.String())
+
+
+def downgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+
+    for table, column, type_name, codes in ENUM_COLUMNS:
+        names = {code: name for name, code in codes.items()}
+        enum_type = sa.Enum(*codes, name=type_name)
+        if postgres:
+            enum_type.create(op.get_bind(), checkfirst=True)
+            op.alter_column(
+                table, column,
+                type_=enum_type,
+                postgresql_using=f"({_case(column, names)})::{type_name}"
+            )
+        else:
+            op.execute(f"UPDATE {table} SET {column} = {_case(column, names)}")
+            with op.batch_alter_table(table) as batch:
+                batch.alter_column(column, type_=enum_type, existing_type=sa.SmallInteger())
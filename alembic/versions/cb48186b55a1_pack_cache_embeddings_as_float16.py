@@ -0,0 +1,90 @@
+"""Pack AI cache embeddings as float16
+
+ai_memory_cache.vector_embedding used to be a JSON column holding a list
+of floats. HalfFloatVector stores packed little-endian float16 bytes, so
+the column becomes binary and every stored vector is re-encoded.
+
+Revision ID: cb48186b55a1
+Revises: 08f09cb97620
+Create Date: 2026-10-16 10:03:17.542981
+
+"""
+import struct
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import orjson
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "cb48186b55a1"
+down_revision: Union[str, None] = "08f09cb97620"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = "ai_memory_cache"
+COLUMN = "vector_embedding"
+NEW_COLUMN = "vector_embedding_f16"
+
+# Rows re-encoded per UPDATE round trip
+BATCH_SIZE = 500
+
+
+def _pack(value) -> Optional[bytes]:
+    """float16 bytes from a JSON list (parsed by the driver, or raw text)"""
+    if isinstance(value, bytes):
+        return value  # Already written in the new format
+    if isinstance(value, str):
+        value = orjson.loads(value)
+    if value is None:
+        return None  # JSON null, which the old column wrote for "no embedding"
+    return struct.pack(f"<{len(value)}e", *value)
+
+
+def _unpack(value: bytes) -> list:
+    return list(struct.unpack(f"<{len(value) // 2}e", value))
+
+
+def _convert(source_type: sa.types.TypeEngine, target_type: sa.types.TypeEngine, encode) -> None:
+    """Rewrite every vector into a new column of target_type, then swap it in"""
+    if op.get_context().as_sql:
+        raise RuntimeError("Re-encoding stored vectors needs a live database connection")
+
+    bind = op.get_bind()
+    op.add_column(TABLE, sa.Column(NEW_COLUMN, target_type, nullable=True))
+
+    table = sa.table(TABLE, sa.column("id", sa.String), sa.column(COLUMN, source_type), sa.column(NEW_COLUMN, target_type))
+    update = (
+        sa.update(table)
+        .where(table.c.id == sa.bindparam("row_id"))
+        .values({NEW_COLUMN: sa.bindparam("encoded")})
+    )
+    page = (
+        sa.select(table.c.id, table.c[COLUMN])
+        .where(table.c[COLUMN].is_not(None), table.c.id > sa.bindparam("after"))
+        .order_by(table.c.id)
+        .limit(BATCH_SIZE)
+    )
+    after = ""
+    while rows := bind.execute(page, {"after": after}).all():
+        bind.execute(update, [{"row_id": row_id, "encoded": encode(value)} for row_id, value in rows])
+        after = rows[-1][0]
+
+    with op.batch_alter_table(TABLE) as batch:
+        batch.drop_column(COLUMN)
+    with op.batch_alter_table(TABLE) as batch:
+        batch.alter_column(NEW_COLUMN, new_column_name=COLUMN, existing_type=target_type)
+
+
+def upgrade() -> None:
+    if not op.get_context().as_sql:
+        columns = sa.inspect(op.get_bind()).get_columns(TABLE)
+        if isinstance(next(c["type"] for c in columns if c["name"] == COLUMN), sa.LargeBinary):
+            return  # Table created after the switch
+    # Read as Text: psycopg2 still hands back parsed lists, SQLite the JSON text
+    _convert(sa.Text(), sa.LargeBinary(), _pack)
+
+
+def downgrade() -> None:
+    _convert(sa.LargeBinary(), sa.JSON(), _unpack)
@@ -0,0 +1,56 @@
+"""Store sql_generations.target_tables as text[] on Postgres
+
+StringList maps to a native text[] on Postgres; init_db() used to create
+the column as json, which rejects array binds. Other dialects keep JSON.
+
+Revision ID: cd1e5813dda2
+Revises: cb48186b55a1
+Create Date: 2026-10-16 10:41:52.306114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "cd1e5813dda2"
+down_revision: Union[str, None] = "cb48186b55a1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_array_column() -> bool:
+    if op.get_context().as_sql:
+        return False
+    columns = sa.inspect(op.get_bind()).get_columns("sql_generations")
+    return isinstance(next(c["type"] for c in columns if c["name"] == "target_tables"), sa.ARRAY)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql" or _is_array_column():
+        return
+
+    # USING can't hold the subquery that unnests the JSON, so copy through
+    # a new column instead
+    op.add_column("sql_generations", sa.Column("target_tables_array", postgresql.ARRAY(sa.String)))
+    op.execute(
+        "UPDATE sql_generations "
+        "SET target_tables_array = ARRAY(SELECT json_array_elements_text(target_tables)) "
+        "WHERE json_typeof(target_tables) = 'array'"
+    )
+    op.drop_column("sql_generations", "target_tables")
+    op.alter_column("sql_generations", "target_tables_array", new_column_name="target_tables")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.alter_column(
+        "sql_generations", "target_tables",
+        type_=sa.JSON(),
+        postgresql_using="array_to_json(target_tables)"
+    )
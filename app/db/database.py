@@ -6,12 +6,14 @@ SQLAlchemy configuration for the AI SQL generation system.
 Supports both SQLite (development) and PostgreSQL (production).
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 import os
-from typing import Generator
+import orjson
+from typing import AsyncGenerator, Generator
 
 # Database URL configuration
 DATABASE_URL = os.getenv(
@@ -19,32 +21,134 @@ DATABASE_URL = os.getenv(
     "sqlite:///./ai_de_pair.db"  # Default to SQLite for development
 )
 
+
+def _to_async_url(url: str) -> str:
+    """Map a sync database URL onto its async driver equivalent"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgres:"):
+        return url.replace("postgres:", "postgresql+asyncpg:", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _to_async_url(DATABASE_URL))
+
+# Size of SQLAlchemy's per-engine LRU of compiled statements (default 500)
+QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+
+# Statement logging is opt-in; echoing every query is a large per-request cost
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+
+# Postgres pool sizing shared by the sync and async engines
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# WAL lets readers proceed during writes; NORMAL sync is durable under WAL
+# and avoids an fsync per commit
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _json_serializer(obj) -> str:
+    """orjson-backed serializer for JSON columns (SQLAlchemy expects str)"""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Applied to every engine so all JSON columns skip the stdlib json module
+JSON_ENGINE_KWARGS = {
+    "json_serializer": _json_serializer,
+    "json_deserializer": orjson.loads,
+}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
 # Create engine with appropriate configuration
 if DATABASE_URL.startswith("sqlite"):
     # SQLite configuration for development
+    # StaticPool only for in-memory databases; file databases get a real
+    # pool so WAL readers aren't serialized behind one connection
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-        echo=True  # Enable SQL logging in development
+        poolclass=StaticPool if ":memory:" in DATABASE_URL else None,
+        query_cache_size=QUERY_CACHE_SIZE,
+        **JSON_ENGINE_KWARGS,
+        echo=SQL_ECHO
     )
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
 else:
     # PostgreSQL configuration for production
     engine = create_engine(
         DATABASE_URL,
-        echo=False  # Disable SQL logging in production
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        query_cache_size=QUERY_CACHE_SIZE,
+        **JSON_ENGINE_KWARGS,
+        echo=SQL_ECHO
     )
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async engine used by request handlers so DB I/O never blocks the event loop
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        query_cache_size=QUERY_CACHE_SIZE,
+        **JSON_ENGINE_KWARGS,
+        echo=SQL_ECHO
+    )
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        query_cache_size=QUERY_CACHE_SIZE,
+        **JSON_ENGINE_KWARGS,
+        echo=SQL_ECHO
+    )
+
+# Create session factories
+# expire_on_commit=False: attributes fetched by RETURNING stay loaded after
+# commit, so callers don't need a refresh() SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 # Create declarative base for models
 Base = declarative_base()
 
 
-def get_db() -> Generator:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database dependency for FastAPI endpoints.
+    
+    Yields:
+        Async database session that will be automatically closed after use
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_sync_db() -> Generator:
     """
-    Database dependency for FastAPI endpoints.
+    Sync database dependency for services not yet ported to AsyncSession.
     
     Yields:
         Database session that will be automatically closed after use
@@ -70,3 +174,11 @@ def drop_db():
     Use with caution - only for testing/development reset.
     """
     Base.metadata.drop_all(bind=engine)
+
+
+async def close_db():
+    """
+    Dispose of pooled async connections.
+    Call this when shutting down the application.
+    """
+    await async_engine.dispose()
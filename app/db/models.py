@@ -6,12 +6,17 @@ Core SQLAlchemy models for session management, Excel analysis,
 AI interactions, and SQL generation results.
 """
 
-from sqlalchemy import Column, String, Text, DateTime, Enum, Integer, Float, Boolean, JSON, ForeignKey
+from sqlalchemy import (
+    Column, String, Text, DateTime, Integer, SmallInteger, Float, REAL, Boolean, JSON, LargeBinary,
+    ForeignKey, Index, UniqueConstraint, TypeDecorator, text
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.utils.id_utils import new_id
 import enum
-import uuid
+import struct
 from datetime import datetime
 from typing import Optional
 
@@ -31,6 +36,13 @@ class SessionStatus(enum.Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     ABANDONED = "abandoned"
+    
+    # Stored SMALLINT codes (see CodedEnum)
+    __codes__ = {
+        "CREATED": 0, "PROCESSING_EXCEL": 1, "DISCOVERY_QUESTIONS": 2,
+        "AWAITING_USER_INPUT": 3, "STRATEGIC_CLARIFICATION": 4,
+        "GENERATING_SQL": 5, "COMPLETED": 6, "FAILED": 7, "ABANDONED": 8,
+    }
 
 
 class QuestionType(enum.Enum):
@@ -41,6 +53,13 @@ class QuestionType(enum.Enum):
     JOIN_STRATEGY = "join_strategy"
     OUTPUT_FORMAT = "output_format"
     MULTI_TABLE_DETECTION = "multi_table_detection"
+    
+    # Stored SMALLINT codes (see CodedEnum)
+    __codes__ = {
+        "INFORMATION_DISCOVERY": 0, "STRATEGIC_CLARIFICATION": 1,
+        "TRANSFORMATION_STRATEGY": 2, "JOIN_STRATEGY": 3,
+        "OUTPUT_FORMAT": 4, "MULTI_TABLE_DETECTION": 5,
+    }
 
 
 class SQLGenerationStrategy(enum.Enum):
@@ -48,6 +67,9 @@ class SQLGenerationStrategy(enum.Enum):
     SINGLE_UNIFIED_QUERY = "single_unified_query"
     MULTIPLE_SEPARATE_QUERIES = "multiple_separate_queries"
     SEQUENTIAL_PIPELINE = "sequential_pipeline"
+    
+    # Stored SMALLINT codes (see CodedEnum)
+    __codes__ = {"SINGLE_UNIFIED_QUERY": 0, "MULTIPLE_SEPARATE_QUERIES": 1, "SEQUENTIAL_PIPELINE": 2}
 
 
 class ValidationStatus(enum.Enum):
@@ -56,6 +78,77 @@ class ValidationStatus(enum.Enum):
     FAILED = "failed"
     WARNINGS = "warnings"
     NOT_VALIDATED = "not_validated"
+    
+    # Stored SMALLINT codes (see CodedEnum)
+    __codes__ = {"PASSED": 0, "FAILED": 1, "WARNINGS": 2, "NOT_VALIDATED": 3}
+
+
+# ================================
+# CUSTOM COLUMN TYPES
+# ================================
+
+# JSON documents: binary JSONB on Postgres (parsed once on write, smaller,
+# indexable), plain JSON elsewhere
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+# Short lists of names: a native text[] on Postgres (no JSON parse),
+# JSON elsewhere
+StringList = JSON().with_variant(ARRAY(String), "postgresql")
+
+
+class HalfFloatVector(TypeDecorator):
+    """
+    Embedding vector stored as packed little-endian float16.
+    
+    2 bytes per dimension instead of ~20 characters of JSON text, and
+    loading is a single struct.unpack rather than a JSON parse.
+    """
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return struct.pack(f"<{len(value)}e", *value)
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return list(struct.unpack(f"<{len(value) // 2}e", value))
+
+
+class CodedEnum(TypeDecorator):
+    """
+    Python enum stored as a SMALLINT code.
+    
+    2 bytes per row instead of the member name as text. Codes come from
+    the enum's __codes__ mapping (member name -> int), so members can be
+    reordered freely; codes are part of the stored format and must never
+    be changed or reused. Give a new member the next unused code.
+    """
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, enum_class):
+        super().__init__()
+        self.enum_class = enum_class
+        self._codes = {member: enum_class.__codes__[member.name] for member in enum_class}
+        self._members = {code: member for member, code in self._codes.items()}
+        if len(self._members) != len(self._codes):
+            raise ValueError(f"{enum_class.__name__}.__codes__ reuses a code")
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, self.enum_class):
+            # Accept the plain string value, e.g. "processing_excel"
+            value = self.enum_class(value)
+        return self._codes[value]
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._members[value]
 
 
 # ================================
@@ -69,9 +162,11 @@ class AnalysisSession(Base):
     Tracks the complete journey from Excel upload through SQL generation.
     """
     __tablename__ = "analysis_sessions"
+    # Fetch server-generated values (incl. onupdate timestamps) via RETURNING
+    __mapper_args__ = {"eager_defaults": True}
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    status = Column(Enum(SessionStatus), default=SessionStatus.CREATED, nullable=False)
+    id = Column(String, primary_key=True, default=new_id)
+    status = Column(CodedEnum(SessionStatus), default=SessionStatus.CREATED, nullable=False)
     
     # Session metadata
     filename = Column(String, nullable=True)  # Original Excel filename
@@ -80,11 +175,11 @@ class AnalysisSession(Base):
     
     # Progress tracking
     current_phase = Column(String, nullable=True)  # Current processing phase
-    progress_percentage = Column(Float, default=0.0)  # Overall progress (0-100)
+    progress_percentage = Column(REAL, default=0.0)  # Overall progress (0-100)
     
     # Configuration
     ai_provider = Column(String, default="openai")  # AI provider used
-    connection_details = Column(JSON, nullable=True)  # Database connection info
+    connection_details = Column(JSONDocument, nullable=True)  # Database connection info
     
     # Timestamps
     created_at = Column(DateTime, default=func.now(), nullable=False)
@@ -111,9 +206,11 @@ class ExcelDocument(Base):
     Stores processed Excel content to avoid re-analyzing identical files.
     """
     __tablename__ = "excel_documents"
+    # Fetch server-generated values (incl. onupdate timestamps) via RETURNING
+    __mapper_args__ = {"eager_defaults": True}
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    session_id = Column(String, ForeignKey("analysis_sessions.id"), nullable=False)
+    id = Column(String, primary_key=True, default=new_id)
+    session_id = Column(String, ForeignKey("analysis_sessions.id"), nullable=False, index=True)
     
     # File information
     filename = Column(String, nullable=False)
@@ -122,23 +219,23 @@ class ExcelDocument(Base):
     
     # Excel structure analysis
     sheet_count = Column(Integer, nullable=False)
-    sheet_names = Column(JSON, nullable=False)  # List of sheet names
+    sheet_names = Column(JSONDocument, nullable=False)  # List of sheet names
     
     # Content analysis results
-    sheet_analysis = Column(JSON, nullable=True)  # Per-sheet pattern analysis
-    information_mapping = Column(JSON, nullable=True)  # Where key info was found
-    discovered_patterns = Column(JSON, nullable=True)  # Detected content patterns
+    sheet_analysis = Column(JSONDocument, nullable=True)  # Per-sheet pattern analysis
+    information_mapping = Column(JSONDocument, nullable=True)  # Where key info was found
+    discovered_patterns = Column(JSONDocument, nullable=True)  # Detected content patterns
     
     # Processing metadata
-    processing_time_seconds = Column(Float, nullable=True)
-    ai_confidence_score = Column(Float, nullable=True)  # AI's confidence in analysis
+    processing_time_seconds = Column(REAL, nullable=True)
+    ai_confidence_score = Column(REAL, nullable=True)  # AI's confidence in analysis
     
     # Timestamps
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
     # Relationships
-    session = relationship("AnalysisSession", back_populates="excel_documents")
+    session = relationship("AnalysisSession", back_populates="excel_documents", lazy="raise_on_sql")
     
     def __repr__(self):
         return f"<ExcelDocument(id={self.id}, filename={self.filename}, sheets={self.sheet_count})>"
@@ -152,27 +249,40 @@ class AIInteraction(Base):
     for context building and session resume capability.
     """
     __tablename__ = "ai_interactions"
-    
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Auto-numbered inserts retry on collision instead of duplicating
+        # Its index also serves session lookups ordered by sequence_number
+        UniqueConstraint("session_id", "sequence_number", name="uq_ai_interactions_session_seq"),
+        # Partial index: only still-open questions, which is what the
+        # unanswered-questions query scans
+        Index(
+            "ix_ai_interactions_unanswered", "session_id", "sequence_number",
+            postgresql_where=text("answered_at IS NULL"),
+            sqlite_where=text("answered_at IS NULL")
+        ),
+    )
+    
+    id = Column(String, primary_key=True, default=new_id)
     session_id = Column(String, ForeignKey("analysis_sessions.id"), nullable=False)
     
     # Question details
-    question_type = Column(Enum(QuestionType), nullable=False)
+    question_type = Column(CodedEnum(QuestionType), nullable=False)
     question_text = Column(Text, nullable=False)
     question_context = Column(Text, nullable=True)  # Additional context for the question
-    question_options = Column(JSON, nullable=True)  # Multiple choice options if applicable
+    question_options = Column(JSONDocument, nullable=True)  # Multiple choice options if applicable
     
     # User response
-    user_response = Column(JSON, nullable=True)  # User's answer/selection
+    user_response = Column(JSONDocument, nullable=True)  # User's answer/selection
     response_text = Column(Text, nullable=True)  # Free-text response if applicable
-    confidence_level = Column(Float, nullable=True)  # AI's confidence in interpretation
+    confidence_level = Column(REAL, nullable=True)  # AI's confidence in interpretation
     
     # Metadata
     priority = Column(String, nullable=True)  # high, medium, low
     sequence_number = Column(Integer, nullable=True)  # Order of questions in session
     
     # Processing results
-    ai_interpretation = Column(JSON, nullable=True)  # How AI interpreted the response
+    ai_interpretation = Column(JSONDocument, nullable=True)  # How AI interpreted the response
     impact_on_sql = Column(Text, nullable=True)  # How this affects SQL generation
     
     # Timestamps
@@ -180,7 +290,7 @@ class AIInteraction(Base):
     answered_at = Column(DateTime, nullable=True)
     
     # Relationships
-    session = relationship("AnalysisSession", back_populates="ai_interactions")
+    session = relationship("AnalysisSession", back_populates="ai_interactions", lazy="raise_on_sql")
     
     def __repr__(self):
         return f"<AIInteraction(id={self.id}, type={self.question_type.value}, answered={self.answered_at is not None})>"
@@ -193,35 +303,40 @@ class SQLGeneration(Base):
     Stores all SQL generation attempts, iterations, and validation results.
     """
     __tablename__ = "sql_generations"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Its index also serves latest-version lookups (scanned backwards)
+        UniqueConstraint("session_id", "version", name="uq_sql_generations_session_version"),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String, primary_key=True, default=new_id)
     session_id = Column(String, ForeignKey("analysis_sessions.id"), nullable=False)
     
     # Generation strategy
-    generation_strategy = Column(Enum(SQLGenerationStrategy), nullable=False)
+    generation_strategy = Column(CodedEnum(SQLGenerationStrategy), nullable=False)
     version = Column(Integer, default=1, nullable=False)  # Track iterations
     
     # SQL content
     sql_content = Column(Text, nullable=False)
     sql_explanation = Column(Text, nullable=True)  # AI's explanation of the SQL
-    target_tables = Column(JSON, nullable=True)  # List of target tables generated
+    target_tables = Column(StringList, nullable=True)  # List of target tables generated
     
     # Validation and analysis
-    validation_status = Column(Enum(ValidationStatus), default=ValidationStatus.NOT_VALIDATED)
-    validation_errors = Column(JSON, nullable=True)  # List of validation errors
-    validation_warnings = Column(JSON, nullable=True)  # List of warnings
+    validation_status = Column(CodedEnum(ValidationStatus), default=ValidationStatus.NOT_VALIDATED)
+    validation_errors = Column(JSONDocument, nullable=True)  # List of validation errors
+    validation_warnings = Column(JSONDocument, nullable=True)  # List of warnings
     
     # Performance analysis
     estimated_complexity = Column(String, nullable=True)  # simple, medium, complex
-    estimated_execution_time = Column(Float, nullable=True)  # Estimated seconds
+    estimated_execution_time = Column(REAL, nullable=True)  # Estimated seconds
     query_optimization_notes = Column(Text, nullable=True)
     
     # AI generation metadata
     ai_provider_used = Column(String, nullable=False)
     token_usage_input = Column(Integer, nullable=True)
     token_usage_output = Column(Integer, nullable=True)
-    generation_time_seconds = Column(Float, nullable=True)
-    cost_estimate = Column(Float, nullable=True)  # Estimated API cost
+    generation_time_seconds = Column(REAL, nullable=True)
+    cost_estimate = Column(REAL, nullable=True)  # Estimated API cost
     
     # User feedback
     user_rating = Column(Integer, nullable=True)  # 1-5 rating
@@ -232,7 +347,7 @@ class SQLGeneration(Base):
     validated_at = Column(DateTime, nullable=True)
     
     # Relationships
-    session = relationship("AnalysisSession", back_populates="sql_generations")
+    session = relationship("AnalysisSession", back_populates="sql_generations", lazy="raise_on_sql")
     
     def __repr__(self):
         return f"<SQLGeneration(id={self.id}, strategy={self.generation_strategy.value}, version={self.version})>"
@@ -246,8 +361,18 @@ class AIMemoryCache(Base):
     as specified in the requirements for cost optimization.
     """
     __tablename__ = "ai_memory_cache"
-    
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    # Fetch server-generated values (incl. onupdate timestamps) via RETURNING
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Expiry cleanup only ever looks at entries that can expire
+        Index(
+            "ix_ai_memory_cache_expires_at", "expires_at",
+            postgresql_where=text("expires_at IS NOT NULL"),
+            sqlite_where=text("expires_at IS NOT NULL")
+        ),
+    )
+    
+    id = Column(String, primary_key=True, default=new_id)
     
     # Content identification
     content_hash = Column(String, nullable=False, unique=True, index=True)
@@ -259,8 +384,8 @@ class AIMemoryCache(Base):
     
     # Cached content
     input_content = Column(Text, nullable=False)
-    cached_response = Column(JSON, nullable=False)
-    vector_embedding = Column(JSON, nullable=True)  # Sentence transformer embedding
+    cached_response = Column(JSONDocument, nullable=False)
+    vector_embedding = Column(HalfFloatVector, nullable=True)  # Sentence transformer embedding (float16)
     
     # Usage statistics
     cache_hits = Column(Integer, default=0)
@@ -276,3 +401,36 @@ class AIMemoryCache(Base):
     
     def __repr__(self):
         return f"<AIMemoryCache(id={self.id}, type={self.content_type}, hits={self.cache_hits})>"
+
+
+class ProcessingJob(Base):
+    """
+    Progress of a background processing job.
+    
+    Kept in the database rather than process memory so any worker can
+    answer a status request and jobs survive a restart. Rows are pruned
+    once updated_at is older than the job status TTL.
+    """
+    __tablename__ = "processing_jobs"
+    
+    id = Column(String, primary_key=True)
+    session_id = Column(String, nullable=False, index=True)
+    
+    # Progress
+    status = Column(String, nullable=False)  # processing, completed, failed
+    progress_percentage = Column(Integer, default=0, nullable=False)
+    current_step = Column(String, nullable=True)
+    error_message = Column(Text, nullable=True)
+    
+    # Results
+    patterns_detected = Column(JSONDocument, nullable=True)
+    business_logic_found = Column(JSONDocument, nullable=True)
+    table_mappings_discovered = Column(JSONDocument, nullable=True)
+    
+    # Timestamps (written by the job, so they compare against local time)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<ProcessingJob(id={self.id}, status={self.status}, progress={self.progress_percentage})>"
@@ -8,27 +8,42 @@ Clean, documented implementation following our comprehensive requirements.
 Retains /run-sql endpoint for frontend testing while building the new AI system.
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, File, Form, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-# from databricks import sql  # Commented out for testing
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from uuid import UUID
+import anyio
+import asyncio
 import logging
 import sys
 import os
+import time
+import orjson
 
 # Import from our app structure
-from app.db.database import get_db, init_db
-from app.services.database_service import SessionService, AIMemoryCacheService
+from app.db.database import get_db, get_sync_db, init_db, close_db
+from app.services.database_service import (
+    SessionService, AIInteractionService, AIMemoryCacheService, session_response_cache
+)
 from app.services.excel_processor import ExcelContentProcessor
+from app.services.excel_reader import MAX_WORKBOOK_BYTES, read_workbook
+from app.services.databricks_service import stream_query_async, close_all_pools
 from app.schemas import (
     CreateSessionRequest, SessionResponse, APIStatusResponse, 
-    HealthCheckResponse, ErrorResponse, ExcelContentPayload,
-    ExcelProcessingResponse, ExcelProcessingStatus
+    HealthCheckResponse, ErrorResponse, ExcelContentPayload, ExcelFileMetadata,
+    ExcelProcessingResponse, ExcelProcessingStatus, AIQuestionResponse,
+    BulkCreateQuestionsRequest, SessionDetailResponse, ExcelDocumentResponse,
+    AIInteractionResponse, SQLGenerationResponse, fast_from_orm
 )
 from app.db.models import SessionStatus
-from datetime import datetime
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Tuple
 from fastapi import BackgroundTasks
 
 # Configure logging
@@ -38,11 +53,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+# ================================
+# STARTUP AND SHUTDOWN
+# ================================
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize shared resources on startup and release them on shutdown"""
+    logger.info("Starting AI-DE Pair Backend...")
+    try:
+        init_db()
+        logger.info("Database initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize database: {str(e)}")
+        raise
+    
+    yield
+    
+    logger.info("Shutting down AI-DE Pair Backend...")
+    try:
+        AIMemoryCacheService.flush_cache_hits()
+    except Exception as e:
+        logger.error(f"Failed to flush AI cache hit counts: {str(e)}")
+    close_all_pools()
+    await close_db()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI-DE Pair Backend",
     description="AI-powered SQL generation from Excel mapping documents",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Enable CORS for frontend integration
@@ -54,27 +98,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON responses (session lists, /run-sql results)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
-# ================================
-# STARTUP AND SHUTDOWN EVENTS
-# ================================
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    logger.info("Starting AI-DE Pair Backend...")
-    try:
-        init_db()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize database: {str(e)}")
-        raise
+# Upper bound for session listing to keep a single response bounded
+MAX_SESSION_LIST_LIMIT = 100
 
+# Status statistics are stable for seconds at a time; serve repeat polls from memory
+STATUS_STATS_TTL_SECONDS = 5.0
+_status_stats_cache: Dict[str, Tuple[float, int, Dict[str, Any]]] = {}
+_status_stats_lock = asyncio.Lock()
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    logger.info("Shutting down AI-DE Pair Backend...")
+# Root payload never changes; encode once instead of per probe
+_ROOT_BYTES = orjson.dumps({
+    "message": "AI-DE Pair Backend - SQL Generation System",
+    "version": "0.1.0",
+    "status": "operational",
+    "docs": "/docs"
+})
 
 
 # ================================
@@ -94,22 +136,17 @@ class SQLRequest(BaseModel):
 # ================================
 
 @app.get("/")
-def read_root():
+async def read_root():
     """Health check and welcome endpoint"""
-    return {
-        "message": "AI-DE Pair Backend - SQL Generation System",
-        "version": "0.1.0",
-        "status": "operational",
-        "docs": "/docs"
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 
 @app.get("/health", response_model=HealthCheckResponse)
-def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_db)):
     """Detailed health check endpoint with database status"""
     try:
         # Test database connection
-        db.execute("SELECT 1")
+        await db.execute(text("SELECT 1"))
         database_status = "connected"
     except Exception as e:
         logger.error(f"Database health check failed: {str(e)}")
@@ -119,7 +156,6 @@ def health_check(db: Session = Depends(get_db)):
         status="healthy" if database_status == "connected" else "degraded",
         service="ai-de-pair-backend",
         version="0.1.0",
-        timestamp=datetime.now(),
         database_status=database_status
     )
 
@@ -130,97 +166,202 @@ def health_check(db: Session = Depends(get_db)):
 # ================================
 
 @app.post("/ai/sessions", response_model=SessionResponse)
-def create_session(request: CreateSessionRequest, db: Session = Depends(get_db)):
+async def create_session(request: CreateSessionRequest, db: AsyncSession = Depends(get_db)):
     """
     Create a new analysis session
     
     IMPLEMENTED: Phase 1 - Session management with database tracking
     """
     try:
-        session = SessionService.create_session(db, request)
+        session = await SessionService.create_session(db, request)
         logger.info(f"Created new session: {session.id}")
-        return session
+        # Returned Responses skip the response_model dump and re-validation
+        body = orjson.dumps(fast_from_orm(SessionResponse, session).model_dump())
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         logger.error(f"Failed to create session: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create session: {str(e)}")
 
 
 @app.get("/ai/sessions/{session_id}", response_model=SessionResponse)
-def get_session(session_id: str, db: Session = Depends(get_db)):
+async def get_session(session_id: str, db: AsyncSession = Depends(get_db)):
     """
     Get session information by ID
     
     IMPLEMENTED: Phase 1 - Session retrieval
+    Encoded bodies are cached per session and invalidated on writes.
     """
-    session = SessionService.get_session(db, session_id)
+    body = session_response_cache.get(session_id)
+    if body is None:
+        session = await SessionService.get_session(db, session_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        body = orjson.dumps(fast_from_orm(SessionResponse, session).model_dump())
+        session_response_cache.set(session_id, body)
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/ai/sessions/{session_id}/detail", response_model=SessionDetailResponse)
+async def get_session_detail(session_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Get a session with its documents, questions and SQL generations
+    
+    Children are eager-loaded in one query each, built without
+    re-validation and encoded straight to bytes with orjson.
+    """
+    session = await SessionService.get_session_detail(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    return session
+    
+    detail = SessionDetailResponse.model_construct(
+        session=fast_from_orm(SessionResponse, session),
+        excel_documents=[
+            fast_from_orm(ExcelDocumentResponse, document) for document in session.excel_documents
+        ],
+        ai_interactions=[
+            fast_from_orm(AIInteractionResponse, interaction)
+            for interaction in sorted(session.ai_interactions, key=lambda i: i.sequence_number or 0)
+        ],
+        sql_generations=[
+            fast_from_orm(SQLGenerationResponse, generation)
+            for generation in sorted(session.sql_generations, key=lambda g: g.version, reverse=True)
+        ]
+    )
+    return Response(content=orjson.dumps(detail.model_dump()), media_type="application/json")
 
 
 @app.get("/ai/sessions", response_model=List[SessionResponse])
-def list_recent_sessions(limit: int = 10, db: Session = Depends(get_db)):
+async def list_recent_sessions(limit: int = 10, db: AsyncSession = Depends(get_db)):
     """
     List recent analysis sessions
     
     IMPLEMENTED: Phase 1 - Session listing
     """
-    sessions = SessionService.get_recent_sessions(db, limit)
-    return sessions
+    sessions = await SessionService.get_recent_sessions(db, min(limit, MAX_SESSION_LIST_LIMIT))
+    body = orjson.dumps([fast_from_orm(SessionResponse, session).model_dump() for session in sessions])
+    return Response(content=body, media_type="application/json")
+
+
+@app.post("/ai/sessions/{session_id}/questions", response_model=List[AIQuestionResponse])
+async def create_session_questions(
+    session_id: str,
+    request: BulkCreateQuestionsRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Record a batch of AI questions for a session
+    
+    All questions are inserted in a single statement and numbered in
+    the order given, continuing the session's existing sequence.
+    """
+    session = await SessionService.get_session(db, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    try:
+        interactions = await AIInteractionService.create_questions_bulk(
+            db,
+            session_id,
+            [question.model_dump(mode="json") for question in request.questions]
+        )
+    except Exception as e:
+        logger.error(f"Failed to create questions for session {session_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to create questions")
+    
+    logger.info(f"Created {len(interactions)} questions for session {session_id}")
+    # Options are stored as plain dicts already; merged after the dump
+    body = orjson.dumps([
+        {**fast_from_orm(AIQuestionResponse, interaction).model_dump(), "options": interaction.question_options}
+        for interaction in interactions
+    ])
+    return Response(content=body, media_type="application/json")
 
 
 # ================================
 # FRONTEND TESTING ENDPOINTS
 # ================================
 
+def _json_default(value: Any) -> Any:
+    """orjson fallback for driver types it can't encode natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _encode_rows(records: List[Dict[str, Any]]) -> bytes:
+    """Encode a batch of row dicts as comma-separated JSON objects (no enclosing brackets)"""
+    return orjson.dumps(records, default=_json_default)[1:-1]
+
+
+async def _stream_sql_results(
+    first_rows: List[Dict[str, Any]],
+    batches: AsyncIterator[Tuple[List[str], List[Dict[str, Any]]]]
+) -> AsyncIterator[bytes]:
+    """Stream {"results": [...]} one fetched batch at a time"""
+    row_count = len(first_rows)
+    try:
+        yield b'{"results":['
+        yield _encode_rows(first_rows)
+        async for _, rows in batches:
+            row_count += len(rows)
+            yield b"," + _encode_rows(rows)
+        yield b"]}"
+        logger.info(f"SQL execution successful. Returned {row_count} rows.")
+    except Exception as e:
+        logger.error(f"SQL result streaming failed after {row_count} rows: {str(e)}")
+        raise
+    finally:
+        await batches.aclose()
+
+
 @app.post("/run-sql")
-def run_sql(request: SQLRequest):
+async def run_sql(request: SQLRequest):
     """
     Direct SQL execution endpoint for frontend testing
     
     RETAINED: This endpoint is kept for frontend testing purposes.
     Executes SQL directly against Databricks without AI processing.
+    Uses pooled connections, runs the blocking driver off the event loop,
+    and streams rows in Arrow fetch batches to keep memory constant.
     """
     logger.info(f"Executing SQL query: {request.sql[:100]}...")
     
+    batches = stream_query_async(
+        request.sql,
+        request.server_hostname,
+        request.http_path,
+        request.access_token
+    )
     try:
-        with sql.connect(
-            server_hostname=request.server_hostname,
-            http_path=request.http_path,
-            access_token=request.access_token
-        ) as connection:
-            with connection.cursor() as cursor:
-                cursor.execute(request.sql)
-                columns = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
-                results = [dict(zip(columns, row)) for row in rows]
-        
-        logger.info(f"SQL execution successful. Returned {len(results)} rows.")
-        return {"results": results}
-        
+        # Execute and fetch the first batch up front so failures still map to a 500
+        _, first_rows = await batches.__anext__()
     except Exception as e:
         logger.error(f"SQL execution failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        _stream_sql_results(first_rows, batches),
+        media_type="application/json"
+    )
 
 
 # ================================
 # AI SQL GENERATION ENDPOINTS (TO BE IMPLEMENTED)
 # ================================
 
-@app.post("/ai/excel/upload")
-async def upload_excel_mapping():
-    """
-    TODO: Phase 2 - Excel file upload and initial processing
-    
-    Will handle:
-    - Excel file upload
-    - Sheet extraction and parsing
-    - Content analysis and pattern detection
-    """
-    return {"status": "not_implemented", "phase": "2", "message": "Excel upload endpoint - coming soon"}
+# Placeholder responses, pre-encoded per phase until the real logic lands
+_STUB_BYTES = {
+    phase: orjson.dumps({"status": "not_implemented", "phase": phase, "message": message})
+    for phase, message in (
+        ("3", "Information discovery - coming soon"),
+        ("5", "Strategic clarification - coming soon"),
+        ("6", "AI SQL generation - coming soon"),
+        ("7", "SSE SQL generation - coming soon"),
+    )
+}
 
 
-@app.post("/ai/discover/information")
+@app.post("/ai/discover/information", include_in_schema=False)
 async def discover_information():
     """
     TODO: Phase 3 - Information discovery system
@@ -230,10 +371,10 @@ async def discover_information():
     - Information location mapping
     - Discovery question generation
     """
-    return {"status": "not_implemented", "phase": "3", "message": "Information discovery - coming soon"}
+    return Response(content=_STUB_BYTES["3"], media_type="application/json")
 
 
-@app.post("/ai/strategic/clarification")
+@app.post("/ai/strategic/clarification", include_in_schema=False)
 async def strategic_clarification():
     """
     TODO: Phase 5 - Strategic clarification system
@@ -244,10 +385,10 @@ async def strategic_clarification():
     - Join strategy analysis
     - Chat-based clarification
     """
-    return {"status": "not_implemented", "phase": "5", "message": "Strategic clarification - coming soon"}
+    return Response(content=_STUB_BYTES["5"], media_type="application/json")
 
 
-@app.post("/ai/generate/sql")
+@app.post("/ai/generate/sql", include_in_schema=False)
 async def generate_sql():
     """
     TODO: Phase 6 - SQL generation engine
@@ -258,10 +399,10 @@ async def generate_sql():
     - Sequential pipeline generation
     - SQL validation and optimization
     """
-    return {"status": "not_implemented", "phase": "6", "message": "AI SQL generation - coming soon"}
+    return Response(content=_STUB_BYTES["6"], media_type="application/json")
 
 
-@app.get("/ai/generate/sql/sse")
+@app.get("/ai/generate/sql/sse", include_in_schema=False)
 async def generate_sql_sse():
     """
     TODO: Phase 7 - Real-time SQL generation with SSE
@@ -271,7 +412,7 @@ async def generate_sql_sse():
     - Event broadcasting
     - Client connection management
     """
-    return {"status": "not_implemented", "phase": "7", "message": "SSE SQL generation - coming soon"}
+    return Response(content=_STUB_BYTES["7"], media_type="application/json")
 
 
 # ================================
@@ -281,7 +422,7 @@ async def generate_sql_sse():
 @app.post("/ai/excel/process", response_model=ExcelProcessingResponse)
 async def process_excel_content(
     payload: ExcelContentPayload,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_sync_db)
 ) -> ExcelProcessingResponse:
     """
     Process Excel content received from frontend
@@ -308,10 +449,62 @@ async def process_excel_content(
         raise HTTPException(status_code=500, detail="Failed to process Excel content")
 
 
+@app.post("/ai/excel/upload", response_model=ExcelProcessingResponse)
+async def upload_excel_mapping(
+    session_id: UUID = Form(...),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_sync_db)
+) -> ExcelProcessingResponse:
+    """
+    Upload an Excel mapping document for server-side parsing
+    
+    Phase 2 Implementation:
+    - Parse the workbook on the server (calamine, openpyxl fallback)
+    - Hand the sheet content to the same pipeline as /ai/excel/process
+    - Return job ID for status tracking
+    """
+    # Reads at most one byte past the cap, so oversized files never land in memory
+    data = await file.read(MAX_WORKBOOK_BYTES + 1)
+    if len(data) > MAX_WORKBOOK_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the {MAX_WORKBOOK_BYTES // (1024 * 1024)} MB upload limit"
+        )
+    
+    try:
+        # Unreadable files raise WorkbookReadError, a ValueError (400 below)
+        sheets = await anyio.to_thread.run_sync(read_workbook, data)
+        if not sheets:
+            raise ValueError("Workbook contains no sheets")
+        
+        payload = ExcelContentPayload(
+            session_id=session_id,
+            file_metadata=ExcelFileMetadata(
+                filename=file.filename or "upload.xlsx",
+                total_sheets=len(sheets),
+                file_size_mb=len(data) / (1024 * 1024)
+            ),
+            sheets=sheets
+        )
+        
+        processor = ExcelContentProcessor(db)
+        result = await processor.process_excel_content(payload)
+        
+        logger.info(f"Excel upload processing started for session {session_id}")
+        return result
+        
+    except ValueError as e:
+        logger.error(f"Validation error in Excel upload: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error processing Excel upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to process Excel upload")
+
+
 @app.get("/ai/excel/status/{job_id}", response_model=ExcelProcessingStatus)
 async def get_excel_processing_status(
     job_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_sync_db)
 ) -> ExcelProcessingStatus:
     """
     Get the status of Excel content processing job
@@ -324,7 +517,7 @@ async def get_excel_processing_status(
     """
     try:
         processor = ExcelContentProcessor(db)
-        status = processor.get_processing_status(job_id)
+        status = await anyio.to_thread.run_sync(processor.get_processing_status, job_id)
         
         if not status:
             raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
@@ -341,7 +534,7 @@ async def get_excel_processing_status(
 @app.get("/ai/sessions/{session_id}/excel")
 async def get_session_excel_data(
     session_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_sync_db)
 ):
     """
     Get processed Excel data for a session
@@ -351,7 +544,7 @@ async def get_session_excel_data(
     """
     try:
         processor = ExcelContentProcessor(db)
-        excel_data = processor.get_session_excel_data(session_id)
+        excel_data = await anyio.to_thread.run_sync(processor.get_session_excel_data, session_id)
         
         if not excel_data:
             raise HTTPException(
@@ -376,13 +569,62 @@ async def get_session_excel_data(
 # SYSTEM STATUS ENDPOINTS
 # ================================
 
+# Static parts of the /api/status response, built once at import
+IMPLEMENTATION_STATUS: Dict[str, str] = {
+    "phase_1_foundation": "✅ IMPLEMENTED - Database models, session management", 
+    "phase_2_excel_processing": "✅ IMPLEMENTED - Excel content analysis and processing",
+    "phase_3_information_discovery": "📋 Planned",
+    "phase_4_ai_analysis": "📋 Planned",
+    "phase_5_strategic_clarification": "📋 Planned",
+    "phase_6_sql_generation": "📋 Planned",
+    "phase_7_sse_implementation": "📋 Planned",
+    "phase_8_performance": "📋 Planned",
+    "phase_9_testing": "📋 Planned",
+    "phase_10_documentation": "📋 Planned"
+}
+
+CURRENT_ENDPOINTS: Dict[str, List[str]] = {
+    "working": [
+        "/", "/health", "/run-sql", "/ai/sessions", "/ai/sessions/{session_id}/detail",
+        "/ai/sessions/{session_id}/questions",
+        "/ai/excel/process", "/ai/excel/upload"
+    ],
+    "planned": [
+        "/ai/discover/information", 
+        "/ai/strategic/clarification",
+        "/ai/generate/sql",
+        "/ai/generate/sql/sse"
+    ]
+}
+
+NEXT_IMPLEMENTATION = "Phase 3: Information discovery system"
+
+
+async def _get_status_statistics(db: AsyncSession) -> Tuple[int, Dict[str, Any]]:
+    """Get (total_sessions, cache_statistics), cached per database for a few seconds"""
+    key = str(db.bind.url)
+    cached = _status_stats_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1], cached[2]
+    
+    async with _status_stats_lock:
+        # Another request may have refreshed the entry while we waited
+        cached = _status_stats_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1], cached[2]
+        
+        total_sessions = await SessionService.count_sessions(db)
+        cache_stats = await db.run_sync(AIMemoryCacheService.get_cache_statistics)
+        _status_stats_cache[key] = (time.monotonic() + STATUS_STATS_TTL_SECONDS, total_sessions, cache_stats)
+        return total_sessions, cache_stats
+
+
 @app.get("/api/status", response_model=APIStatusResponse)
-def api_status(db: Session = Depends(get_db)):
+async def api_status(db: AsyncSession = Depends(get_db)):
     """API implementation status overview with database statistics"""
     try:
         # Get database statistics
-        total_sessions = len(SessionService.get_recent_sessions(db, limit=1000))
-        cache_stats = AIMemoryCacheService.get_cache_statistics(db)
+        total_sessions, cache_stats = await _get_status_statistics(db)
         database_initialized = True
     except Exception as e:
         logger.error(f"Database query failed in status check: {str(e)}")
@@ -390,28 +632,9 @@ def api_status(db: Session = Depends(get_db)):
         database_initialized = False
     
     return APIStatusResponse(
-        implementation_status={
-            "phase_1_foundation": "✅ IMPLEMENTED - Database models, session management", 
-            "phase_2_excel_processing": "✅ IMPLEMENTED - Excel content analysis and processing",
-            "phase_3_information_discovery": "📋 Planned",
-            "phase_4_ai_analysis": "📋 Planned",
-            "phase_5_strategic_clarification": "📋 Planned",
-            "phase_6_sql_generation": "📋 Planned",
-            "phase_7_sse_implementation": "📋 Planned",
-            "phase_8_performance": "📋 Planned",
-            "phase_9_testing": "📋 Planned",
-            "phase_10_documentation": "📋 Planned"
-        },
-        current_endpoints={
-            "working": ["/", "/health", "/run-sql", "/ai/sessions", "/ai/excel/process"],
-            "planned": [
-                "/ai/discover/information", 
-                "/ai/strategic/clarification",
-                "/ai/generate/sql",
-                "/ai/generate/sql/sse"
-            ]
-        },
-        next_implementation="Phase 3: Information discovery system",
+        implementation_status=IMPLEMENTATION_STATUS,
+        current_endpoints=CURRENT_ENDPOINTS,
+        next_implementation=NEXT_IMPLEMENTATION,
         database_initialized=database_initialized,
         total_sessions=total_sessions
     )
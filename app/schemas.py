@@ -6,11 +6,17 @@ Data validation models for the AI SQL generation system.
 Defines the structure for API requests and responses.
 """
 
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Dict, Any, Union
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+from dataclasses import dataclass
+from typing import Annotated, Literal, Optional, List, Dict, Any, Type, TypeVar, Union
 from datetime import datetime
 from enum import Enum
-import uuid
+from uuid import UUID
+import orjson
+
+from app.utils.time_utils import cached_now
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 
 # ================================
@@ -40,15 +46,31 @@ class QuestionTypeResponse(str, Enum):
     MULTI_TABLE_DETECTION = "multi_table_detection"
 
 
+# ================================
+# VALIDATORS
+# ================================
+
+def _empty_str_to_none(v: Any) -> Any:
+    """Convert empty strings to None"""
+    if v == '':
+        return None
+    return v
+
+
+# Optional string where '' means "not provided". Attached per field so
+# pydantic only calls back into Python for fields that opt in.
+EmptyStrToNone = Annotated[Optional[str], BeforeValidator(_empty_str_to_none)]
+
+
 # ================================
 # REQUEST SCHEMAS
 # ================================
 
 class CreateSessionRequest(BaseModel):
     """Request to create a new analysis session"""
-    filename: Optional[str] = None
-    user_id: Optional[str] = None
-    ai_provider: str = Field(default="openai", pattern="^(openai|claude|local)$")
+    filename: EmptyStrToNone = None
+    user_id: EmptyStrToNone = None
+    ai_provider: Literal["openai", "claude", "local"] = "openai"
     connection_details: Optional[Dict[str, Any]] = None
 
 
@@ -57,26 +79,46 @@ class ExcelUploadRequest(BaseModel):
     session_id: str = Field(..., description="Session ID to associate with upload")
     filename: str = Field(..., min_length=1)
     file_content: bytes = Field(..., description="Base64 encoded Excel file content")
-    additional_context: Optional[str] = None
+    additional_context: EmptyStrToNone = None
 
 
 class UserResponseRequest(BaseModel):
     """User response to an AI question"""
-    session_id: str
+    session_id: UUID
     interaction_id: str
     response_data: Union[str, List[str], Dict[str, Any]]
-    response_text: Optional[str] = None
+    response_text: EmptyStrToNone = None
     confidence_level: Optional[float] = Field(None, ge=0.0, le=1.0)
 
 
+class QuestionOption(BaseModel):
+    """Option for multiple choice questions"""
+    value: str
+    label: str
+    description: Optional[str] = None
+
+
+class CreateQuestionRequest(BaseModel):
+    """A single AI question to record"""
+    question_type: QuestionTypeResponse
+    question_text: str = Field(..., min_length=1)
+    question_context: EmptyStrToNone = None
+    question_options: Optional[List[QuestionOption]] = None
+    priority: Literal["high", "medium", "low"] = "medium"
+
+
+class BulkCreateQuestionsRequest(BaseModel):
+    """Batch of AI questions for one session, stored in order"""
+    questions: List[CreateQuestionRequest] = Field(..., min_length=1)
+
+
 class SQLGenerationRequest(BaseModel):
     """Request to generate SQL from analysis"""
-    session_id: str
-    generation_strategy: str = Field(
-        default="single_unified_query",
-        pattern="^(single_unified_query|multiple_separate_queries|sequential_pipeline)$"
-    )
-    additional_instructions: Optional[str] = None
+    session_id: UUID
+    generation_strategy: Literal[
+        "single_unified_query", "multiple_separate_queries", "sequential_pipeline"
+    ] = "single_unified_query"
+    additional_instructions: EmptyStrToNone = None
 
 
 # ================================
@@ -95,8 +137,7 @@ class SessionResponse(BaseModel):
     updated_at: datetime
     error_message: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ExcelDocumentResponse(BaseModel):
@@ -109,15 +150,7 @@ class ExcelDocumentResponse(BaseModel):
     ai_confidence_score: Optional[float]
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
-
-class QuestionOption(BaseModel):
-    """Option for multiple choice questions"""
-    value: str
-    label: str
-    description: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AIQuestionResponse(BaseModel):
@@ -132,8 +165,7 @@ class AIQuestionResponse(BaseModel):
     sequence_number: Optional[int]
     asked_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AIInteractionResponse(BaseModel):
@@ -148,8 +180,7 @@ class AIInteractionResponse(BaseModel):
     asked_at: datetime
     answered_at: Optional[datetime]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SQLGenerationResponse(BaseModel):
@@ -171,8 +202,7 @@ class SQLGenerationResponse(BaseModel):
     cost_estimate: Optional[float]
     generated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SessionDetailResponse(BaseModel):
@@ -186,8 +216,12 @@ class SessionDetailResponse(BaseModel):
 # ================================
 # SSE EVENT SCHEMAS
 # ================================
+# Events are built server-side from trusted data, so they are plain
+# slotted dataclasses rather than pydantic models: no validation on
+# construction, and orjson serializes them natively.
 
-class SSEEventData(BaseModel):
+@dataclass(slots=True)
+class SSEEventData:
     """Base structure for SSE events"""
     event_type: str
     session_id: str
@@ -195,7 +229,8 @@ class SSEEventData(BaseModel):
     data: Dict[str, Any]
 
 
-class ProgressEventData(BaseModel):
+@dataclass(slots=True)
+class ProgressEventData:
     """Progress update event"""
     phase: str
     progress_percentage: float
@@ -203,15 +238,17 @@ class ProgressEventData(BaseModel):
     details: Optional[Dict[str, Any]] = None
 
 
-class QuestionEventData(BaseModel):
+@dataclass(slots=True)
+class QuestionEventData:
     """New question event"""
     question_id: str
     question_type: str
     question_text: str
-    options: Optional[List[QuestionOption]] = None
+    options: Optional[List[Dict[str, Any]]] = None  # QuestionOption-shaped dicts
 
 
-class SQLGeneratedEventData(BaseModel):
+@dataclass(slots=True)
+class SQLGeneratedEventData:
     """SQL generation completed event"""
     generation_id: str
     sql_content: str
@@ -219,13 +256,19 @@ class SQLGeneratedEventData(BaseModel):
     performance_analysis: Optional[Dict[str, Any]] = None
 
 
-class ErrorEventData(BaseModel):
+@dataclass(slots=True)
+class ErrorEventData:
     """Error event"""
     error_type: str
     error_message: str
     error_details: Optional[Dict[str, Any]] = None
 
 
+def encode_sse_event(event: Any) -> bytes:
+    """Serialize an SSE event dataclass to JSON bytes"""
+    return orjson.dumps(event)
+
+
 # ================================
 # UTILITY SCHEMAS
 # ================================
@@ -235,7 +278,7 @@ class HealthCheckResponse(BaseModel):
     status: str = "healthy"
     service: str = "ai-de-pair-backend"
     version: str = "0.1.0"
-    timestamp: datetime
+    timestamp: datetime = Field(default_factory=cached_now)
     database_status: str
     ai_provider_status: Optional[Dict[str, str]] = None
 
@@ -250,18 +293,26 @@ class APIStatusResponse(BaseModel):
 
 
 # ================================
-# VALIDATORS
+# ORM CONVERSION
 # ================================
 
-class BaseSchema(BaseModel):
-    """Base schema with common validators"""
+def fast_from_orm(cls: Type[ModelT], obj: Any) -> ModelT:
+    """
+    Build a response model from a trusted ORM object without validation.
     
-    @validator('*', pre=True)
-    def empty_str_to_none(cls, v):
-        """Convert empty strings to None"""
-        if v == '':
-            return None
-        return v
+    Rows read from our own database already satisfy the schema, so this
+    uses model_construct() to skip pydantic validation entirely. Only
+    ORM enums are mapped onto the API enum of the same value. Never use
+    this for untrusted input - requests must go through model_validate().
+    """
+    values = {}
+    for name, field in cls.model_fields.items():
+        value = getattr(obj, name, None)
+        annotation = field.annotation
+        if isinstance(value, Enum) and isinstance(annotation, type) and issubclass(annotation, Enum):
+            value = annotation(value.value)
+        values[name] = value
+    return cls.model_construct(**values)
 
 
 # ================================
@@ -274,7 +325,7 @@ class ErrorResponse(BaseModel):
     message: str
     details: Optional[Dict[str, Any]] = None
     session_id: Optional[str] = None
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime = Field(default_factory=cached_now)
 
 
 class ValidationErrorResponse(BaseModel):
@@ -282,7 +333,7 @@ class ValidationErrorResponse(BaseModel):
     error: str = "validation_error"
     message: str
     field_errors: Dict[str, List[str]]
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime = Field(default_factory=cached_now)
 
 
 # ================================
@@ -301,33 +352,15 @@ class ExcelSheetContent(BaseModel):
     """Content from a single Excel sheet"""
     sheet_name: str
     sheet_index: Optional[int] = None
+    # List[List[str]] is validated by pydantic-core; no Python-level walk needed
     content: List[List[str]] = Field(..., description="2D array of cell values as strings")
-    
-    @validator('content')
-    def validate_content_structure(cls, v):
-        """Ensure content is properly structured"""
-        if not isinstance(v, list):
-            raise ValueError("Content must be a list")
-        for i, row in enumerate(v):
-            if not isinstance(row, list):
-                raise ValueError(f"Row {i} must be a list")
-        return v
 
 
 class ExcelContentPayload(BaseModel):
     """Complete Excel content payload from frontend"""
-    session_id: str = Field(..., description="Analysis session ID")
+    session_id: UUID = Field(..., description="Analysis session ID")
     file_metadata: ExcelFileMetadata
-    sheets: List[ExcelSheetContent] = Field(..., min_items=1, description="At least one sheet required")
-    
-    @validator('session_id')
-    def validate_session_id(cls, v):
-        """Validate session ID format"""
-        try:
-            uuid.UUID(v)
-        except ValueError:
-            raise ValueError("session_id must be a valid UUID")
-        return v
+    sheets: List[ExcelSheetContent] = Field(..., min_length=1, description="At least one sheet required")
 
 
 class ExcelProcessingResponse(BaseModel):
@@ -354,5 +387,5 @@ class ExcelProcessingStatus(BaseModel):
     
     # Processing results
     patterns_detected: Optional[Dict[str, Any]] = None
-    business_logic_found: Optional[List[str]] = None
-    table_mappings_discovered: Optional[List[str]] = None
+    business_logic_found: Optional[List[Dict[str, Any]]] = None
+    table_mappings_discovered: Optional[List[Dict[str, Any]]] = None
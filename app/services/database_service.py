@@ -6,33 +6,87 @@ Service layer for database operations in the AI SQL generation system.
 Provides clean interface for CRUD operations on all models.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session, raiseload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import LargeBinary, bindparam, delete, desc, func, insert, or_, select, type_coerce, update
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 from datetime import datetime, timedelta
-import uuid
 import hashlib
 import json
+import logging
+import threading
+import time
 
+import numpy as np
+import orjson
+
+from app.db.database import SessionLocal
 from app.db.models import (
     AnalysisSession, ExcelDocument, AIInteraction, SQLGeneration, AIMemoryCache,
     SessionStatus, QuestionType, SQLGenerationStrategy, ValidationStatus
 )
 from app.schemas import CreateSessionRequest, UserResponseRequest
+from app.utils.cache_utils import TTLCache
+from app.utils.id_utils import new_id
+from app.utils.vector_index import LSHIndex
+
+logger = logging.getLogger(__name__)
+
+
+# ================================
+# HELPERS
+# ================================
+
+# Attempts for inserts whose per-session counter can collide with a
+# concurrent writer (guarded by a unique constraint)
+COUNTER_INSERT_ATTEMPTS = 3
+
+
+def _next_in_session(counter_column, session_column, session_id: str):
+    """
+    Scalar subquery computing MAX(counter) + 1 for a session.
+    
+    Assigned to an ORM attribute it is evaluated inside the INSERT itself,
+    so no separate SELECT round-trip is needed before the write.
+    """
+    return select(func.coalesce(func.max(counter_column) + 1, 1))\
+        .where(session_column == session_id)\
+        .scalar_subquery()
 
 
 # ================================
 # SESSION MANAGEMENT
 # ================================
 
+# Encoded SessionResponse bodies keyed by session ID. Every write path
+# that changes a session must pop its entry; the TTL bounds staleness.
+session_response_cache = TTLCache(maxsize=1024, ttl=30.0)
+
+# Built once so repeat lookups reuse the same statement and compiled-cache entry
+_GET_SESSION_STMT = select(AnalysisSession).where(AnalysisSession.id == bindparam("session_id"))
+
+# One SELECT per child collection (IN on the session id) instead of a
+# lazy load per collection; AsyncSession can't lazy load at all
+_GET_SESSION_DETAIL_STMT = (
+    select(AnalysisSession)
+    .options(
+        selectinload(AnalysisSession.excel_documents),
+        selectinload(AnalysisSession.ai_interactions),
+        selectinload(AnalysisSession.sql_generations),
+    )
+    .where(AnalysisSession.id == bindparam("session_id"))
+)
+
+
 class SessionService:
-    """Service for managing analysis sessions"""
+    """Service for managing analysis sessions (async - used directly by request handlers)"""
     
     @staticmethod
-    def create_session(db: Session, request: CreateSessionRequest) -> AnalysisSession:
+    async def create_session(db: AsyncSession, request: CreateSessionRequest) -> AnalysisSession:
         """Create a new analysis session"""
         session = AnalysisSession(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             filename=request.filename,
             user_id=request.user_id,
             ai_provider=request.ai_provider,
@@ -40,18 +94,25 @@ class SessionService:
             status=SessionStatus.CREATED
         )
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        await db.commit()
+        session_response_cache.pop(session.id)
         return session
     
     @staticmethod
-    def get_session(db: Session, session_id: str) -> Optional[AnalysisSession]:
+    async def get_session(db: AsyncSession, session_id: str) -> Optional[AnalysisSession]:
         """Get session by ID"""
-        return db.query(AnalysisSession).filter(AnalysisSession.id == session_id).first()
+        result = await db.execute(_GET_SESSION_STMT, {"session_id": session_id})
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_session_detail(db: AsyncSession, session_id: str) -> Optional[AnalysisSession]:
+        """Get session by ID with documents, interactions and generations loaded"""
+        result = await db.execute(_GET_SESSION_DETAIL_STMT, {"session_id": session_id})
+        return result.scalars().first()
     
     @staticmethod
-    def update_session_status(
-        db: Session, 
+    async def update_session_status(
+        db: AsyncSession, 
         session_id: str, 
         status: SessionStatus, 
         current_phase: Optional[str] = None,
@@ -59,7 +120,7 @@ class SessionService:
         error_message: Optional[str] = None
     ) -> Optional[AnalysisSession]:
         """Update session status and progress"""
-        session = db.query(AnalysisSession).filter(AnalysisSession.id == session_id).first()
+        session = await SessionService.get_session(db, session_id)
         if not session:
             return None
         
@@ -73,25 +134,38 @@ class SessionService:
         if status == SessionStatus.COMPLETED:
             session.completed_at = datetime.now()
         
-        db.commit()
-        db.refresh(session)
+        await db.commit()
+        session_response_cache.pop(session_id)
         return session
     
     @staticmethod
-    def get_recent_sessions(db: Session, limit: int = 10) -> List[AnalysisSession]:
+    async def get_recent_sessions(db: AsyncSession, limit: int = 10) -> List[AnalysisSession]:
         """Get recent sessions ordered by creation date"""
-        return db.query(AnalysisSession)\
-                 .order_by(desc(AnalysisSession.created_at))\
-                 .limit(limit)\
-                 .all()
+        # SessionResponse reads no relationships; raiseload turns any future
+        # per-row relationship access into an error instead of an N+1 query
+        result = await db.execute(
+            select(AnalysisSession)
+            .options(raiseload("*"))
+            .order_by(desc(AnalysisSession.created_at))
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def count_sessions(db: AsyncSession) -> int:
+        """Get total number of sessions without loading any rows"""
+        result = await db.execute(select(func.count(AnalysisSession.id)))
+        return result.scalar() or 0
     
     @staticmethod
-    def get_sessions_by_status(db: Session, status: SessionStatus) -> List[AnalysisSession]:
+    async def get_sessions_by_status(db: AsyncSession, status: SessionStatus) -> List[AnalysisSession]:
         """Get all sessions with specific status"""
-        return db.query(AnalysisSession)\
-                 .filter(AnalysisSession.status == status)\
-                 .order_by(desc(AnalysisSession.created_at))\
-                 .all()
+        result = await db.execute(
+            select(AnalysisSession)
+            .where(AnalysisSession.status == status)
+            .order_by(desc(AnalysisSession.created_at))
+        )
+        return list(result.scalars().all())
 
 
 # ================================
@@ -116,7 +190,7 @@ class ExcelDocumentService:
         file_hash = hashlib.sha256(file_content).hexdigest()
         
         excel_doc = ExcelDocument(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             session_id=session_id,
             filename=filename,
             file_hash=file_hash,
@@ -128,7 +202,6 @@ class ExcelDocumentService:
         
         db.add(excel_doc)
         db.commit()
-        db.refresh(excel_doc)
         return excel_doc
     
     @staticmethod
@@ -154,7 +227,6 @@ class ExcelDocumentService:
         excel_doc.ai_confidence_score = confidence_score
         
         db.commit()
-        db.refresh(excel_doc)
         return excel_doc
     
     @staticmethod
@@ -175,12 +247,15 @@ class ExcelDocumentService:
 # AI INTERACTION MANAGEMENT
 # ================================
 
+_GET_INTERACTION_STMT = select(AIInteraction).where(AIInteraction.id == bindparam("interaction_id"))
+
+
 class AIInteractionService:
-    """Service for managing AI questions and user responses"""
+    """Service for managing AI questions and user responses (async - used directly by request handlers)"""
     
     @staticmethod
-    def create_question(
-        db: Session,
+    async def create_question(
+        db: AsyncSession,
         session_id: str,
         question_type: QuestionType,
         question_text: str,
@@ -191,33 +266,90 @@ class AIInteractionService:
     ) -> AIInteraction:
         """Create a new AI question"""
         
-        # Auto-generate sequence number if not provided
-        if sequence_number is None:
-            last_interaction = db.query(AIInteraction)\
-                                .filter(AIInteraction.session_id == session_id)\
-                                .order_by(desc(AIInteraction.sequence_number))\
-                                .first()
-            sequence_number = (last_interaction.sequence_number + 1) if last_interaction else 1
-        
-        interaction = AIInteraction(
-            id=str(uuid.uuid4()),
-            session_id=session_id,
-            question_type=question_type,
-            question_text=question_text,
-            question_context=question_context,
-            question_options=question_options,
-            priority=priority,
-            sequence_number=sequence_number
-        )
+        for attempt in range(COUNTER_INSERT_ATTEMPTS):
+            interaction = AIInteraction(
+                id=new_id(),
+                session_id=session_id,
+                question_type=question_type,
+                question_text=question_text,
+                question_context=question_context,
+                question_options=question_options,
+                priority=priority,
+                # Auto-generate sequence number inside the INSERT if not provided
+                sequence_number=sequence_number if sequence_number is not None else _next_in_session(
+                    AIInteraction.sequence_number, AIInteraction.session_id, session_id
+                )
+            )
+            
+            db.add(interaction)
+            try:
+                await db.commit()
+                break
+            except IntegrityError:
+                await db.rollback()
+                # Only an auto-numbered insert that raced another writer is retryable
+                if sequence_number is not None or attempt == COUNTER_INSERT_ATTEMPTS - 1:
+                    raise
         
-        db.add(interaction)
-        db.commit()
-        db.refresh(interaction)
         return interaction
     
     @staticmethod
-    def submit_response(
-        db: Session,
+    async def create_questions_bulk(
+        db: AsyncSession,
+        session_id: str,
+        questions: Sequence[Dict[str, Any]]
+    ) -> List[AIInteraction]:
+        """
+        Create a batch of AI questions in one round-trip
+        
+        Sequence numbers continue from the session's current maximum in
+        the order given. Rows go out as a single executemany INSERT with
+        RETURNING instead of one INSERT + COMMIT per question.
+        
+        Args:
+            questions: Dicts with question_type, question_text and optionally
+                question_context, question_options, priority
+        """
+        if not questions:
+            return []
+        
+        for attempt in range(COUNTER_INSERT_ATTEMPTS):
+            max_sequence = (await db.execute(
+                select(func.max(AIInteraction.sequence_number))
+                .where(AIInteraction.session_id == session_id)
+            )).scalar() or 0
+            
+            rows = [
+                {
+                    "id": new_id(),
+                    "session_id": session_id,
+                    "question_type": QuestionType(question["question_type"]),
+                    "question_text": question["question_text"],
+                    "question_context": question.get("question_context"),
+                    "question_options": question.get("question_options"),
+                    "priority": question.get("priority", "medium"),
+                    "sequence_number": max_sequence + offset,
+                }
+                for offset, question in enumerate(questions, start=1)
+            ]
+            
+            try:
+                # sort_by_parameter_order: RETURNING rows come back in the
+                # order of rows, i.e. by sequence_number
+                interactions = list(await db.scalars(
+                    insert(AIInteraction).returning(AIInteraction, sort_by_parameter_order=True), rows
+                ))
+                await db.commit()
+                return interactions
+            except IntegrityError:
+                await db.rollback()
+                # A concurrent writer took some of our sequence numbers
+                if attempt == COUNTER_INSERT_ATTEMPTS - 1:
+                    raise
+    
+    @staticmethod
+    async def submit_response(
+        db: AsyncSession,
         interaction_id: str,
         user_response: Dict[str, Any],
         response_text: Optional[str] = None,
@@ -226,7 +358,8 @@ class AIInteractionService:
     ) -> Optional[AIInteraction]:
         """Submit user response to AI question"""
         
-        interaction = db.query(AIInteraction).filter(AIInteraction.id == interaction_id).first()
+        result = await db.execute(_GET_INTERACTION_STMT, {"interaction_id": interaction_id})
+        interaction = result.scalar_one_or_none()
         if not interaction:
             return None
         
@@ -236,40 +369,54 @@ class AIInteractionService:
         interaction.ai_interpretation = ai_interpretation
         interaction.answered_at = datetime.now()
         
-        db.commit()
-        db.refresh(interaction)
+        await db.commit()
         return interaction
     
     @staticmethod
-    def get_session_interactions(db: Session, session_id: str) -> List[AIInteraction]:
-        """Get all interactions for a session"""
-        return db.query(AIInteraction)\
-                 .filter(AIInteraction.session_id == session_id)\
-                 .order_by(AIInteraction.sequence_number)\
-                 .all()
+    async def get_session_interactions(
+        db: AsyncSession, session_id: str, eager: Sequence[str] = ()
+    ) -> List[AIInteraction]:
+        """
+        Get all interactions for a session
+        
+        Args:
+            eager: Relationships to load up front, e.g. ["session"]
+        """
+        result = await db.execute(
+            select(AIInteraction)
+            .options(*[selectinload(getattr(AIInteraction, name)) for name in eager])
+            .where(AIInteraction.session_id == session_id)
+            .order_by(AIInteraction.sequence_number)
+        )
+        return list(result.scalars().all())
     
     @staticmethod
-    def get_unanswered_questions(db: Session, session_id: str) -> List[AIInteraction]:
+    async def get_unanswered_questions(db: AsyncSession, session_id: str) -> List[AIInteraction]:
         """Get unanswered questions for a session"""
-        return db.query(AIInteraction)\
-                 .filter(
-                     AIInteraction.session_id == session_id,
-                     AIInteraction.answered_at.is_(None)
-                 )\
-                 .order_by(AIInteraction.sequence_number)\
-                 .all()
+        result = await db.execute(
+            select(AIInteraction)
+            .where(
+                AIInteraction.session_id == session_id,
+                AIInteraction.answered_at.is_(None)
+            )
+            .order_by(AIInteraction.sequence_number)
+        )
+        return list(result.scalars().all())
 
 
 # ================================
 # SQL GENERATION MANAGEMENT
 # ================================
 
+_GET_GENERATION_STMT = select(SQLGeneration).where(SQLGeneration.id == bindparam("generation_id"))
+
+
 class SQLGenerationService:
-    """Service for managing SQL generation results"""
+    """Service for managing SQL generation results (async - used directly by request handlers)"""
     
     @staticmethod
-    def create_sql_generation(
-        db: Session,
+    async def create_sql_generation(
+        db: AsyncSession,
         session_id: str,
         generation_strategy: SQLGenerationStrategy,
         sql_content: str,
@@ -283,36 +430,37 @@ class SQLGenerationService:
     ) -> SQLGeneration:
         """Create a new SQL generation record"""
         
-        # Get next version number for this session
-        last_generation = db.query(SQLGeneration)\
-                           .filter(SQLGeneration.session_id == session_id)\
-                           .order_by(desc(SQLGeneration.version))\
-                           .first()
-        version = (last_generation.version + 1) if last_generation else 1
+        for attempt in range(COUNTER_INSERT_ATTEMPTS):
+            sql_gen = SQLGeneration(
+                id=new_id(),
+                session_id=session_id,
+                generation_strategy=generation_strategy,
+                # Next version number for this session, computed inside the INSERT
+                version=_next_in_session(SQLGeneration.version, SQLGeneration.session_id, session_id),
+                sql_content=sql_content,
+                sql_explanation=sql_explanation,
+                target_tables=target_tables,
+                ai_provider_used=ai_provider,
+                token_usage_input=token_usage_input,
+                token_usage_output=token_usage_output,
+                generation_time_seconds=generation_time,
+                cost_estimate=cost_estimate
+            )
+            
+            db.add(sql_gen)
+            try:
+                await db.commit()
+                break
+            except IntegrityError:
+                await db.rollback()
+                if attempt == COUNTER_INSERT_ATTEMPTS - 1:
+                    raise
         
-        sql_gen = SQLGeneration(
-            id=str(uuid.uuid4()),
-            session_id=session_id,
-            generation_strategy=generation_strategy,
-            version=version,
-            sql_content=sql_content,
-            sql_explanation=sql_explanation,
-            target_tables=target_tables,
-            ai_provider_used=ai_provider,
-            token_usage_input=token_usage_input,
-            token_usage_output=token_usage_output,
-            generation_time_seconds=generation_time,
-            cost_estimate=cost_estimate
-        )
-        
-        db.add(sql_gen)
-        db.commit()
-        db.refresh(sql_gen)
         return sql_gen
     
     @staticmethod
-    def update_validation_results(
-        db: Session,
+    async def update_validation_results(
+        db: AsyncSession,
         generation_id: str,
         validation_status: ValidationStatus,
         validation_errors: Optional[List[str]] = None,
@@ -322,7 +470,8 @@ class SQLGenerationService:
     ) -> Optional[SQLGeneration]:
         """Update SQL generation with validation results"""
         
-        sql_gen = db.query(SQLGeneration).filter(SQLGeneration.id == generation_id).first()
+        result = await db.execute(_GET_GENERATION_STMT, {"generation_id": generation_id})
+        sql_gen = result.scalar_one_or_none()
         if not sql_gen:
             return None
         
@@ -333,31 +482,229 @@ class SQLGenerationService:
         sql_gen.estimated_execution_time = estimated_execution_time
         sql_gen.validated_at = datetime.now()
         
-        db.commit()
-        db.refresh(sql_gen)
+        await db.commit()
         return sql_gen
     
     @staticmethod
-    def get_session_generations(db: Session, session_id: str) -> List[SQLGeneration]:
-        """Get all SQL generations for a session"""
-        return db.query(SQLGeneration)\
-                 .filter(SQLGeneration.session_id == session_id)\
-                 .order_by(desc(SQLGeneration.version))\
-                 .all()
+    async def get_session_generations(
+        db: AsyncSession, session_id: str, eager: Sequence[str] = ()
+    ) -> List[SQLGeneration]:
+        """
+        Get all SQL generations for a session
+        
+        Args:
+            eager: Relationships to load up front, e.g. ["session"]
+        """
+        result = await db.execute(
+            select(SQLGeneration)
+            .options(*[selectinload(getattr(SQLGeneration, name)) for name in eager])
+            .where(SQLGeneration.session_id == session_id)
+            .order_by(desc(SQLGeneration.version))
+        )
+        return list(result.scalars().all())
     
     @staticmethod
-    def get_latest_generation(db: Session, session_id: str) -> Optional[SQLGeneration]:
+    async def get_latest_generation(db: AsyncSession, session_id: str) -> Optional[SQLGeneration]:
         """Get the latest SQL generation for a session"""
-        return db.query(SQLGeneration)\
-                 .filter(SQLGeneration.session_id == session_id)\
-                 .order_by(desc(SQLGeneration.version))\
-                 .first()
+        result = await db.execute(
+            select(SQLGeneration)
+            .where(SQLGeneration.session_id == session_id)
+            .order_by(desc(SQLGeneration.version))
+            .limit(1)
+        )
+        return result.scalars().first()
 
 
 # ================================
 # AI MEMORY CACHE MANAGEMENT
 # ================================
 
+_GET_CACHE_ENTRY_STMT = select(AIMemoryCache).where(
+    AIMemoryCache.content_hash == bindparam("content_hash"),
+    AIMemoryCache.content_type == bindparam("content_type"),
+    AIMemoryCache.ai_provider == bindparam("ai_provider"),
+    # Check expiration
+    or_(
+        AIMemoryCache.expires_at.is_(None),
+        AIMemoryCache.expires_at > bindparam("now")
+    )
+)
+
+_CACHE_STATS_STMT = select(
+    AIMemoryCache.ai_provider,
+    func.count(AIMemoryCache.id).label("entry_count"),
+    func.sum(AIMemoryCache.cache_hits).label("total_hits"),
+    func.sum(AIMemoryCache.estimated_cost_saved).label("total_cost_saved")
+).group_by(AIMemoryCache.ai_provider)
+
+# Expired entries are removed a batch at a time; the id subquery walks the
+# partial expires_at index
+CLEANUP_BATCH_SIZE = 10000
+_DELETE_EXPIRED_BATCH_STMT = delete(AIMemoryCache).where(
+    AIMemoryCache.id.in_(
+        select(AIMemoryCache.id)
+        .where(
+            AIMemoryCache.expires_at.isnot(None),
+            AIMemoryCache.expires_at < bindparam("now")
+        )
+        .limit(bindparam("batch_size"))
+    )
+).execution_options(synchronize_session=False)
+
+
+# Cache hits are buffered in-process and written in batches, so a cache
+# read is no longer a write transaction. Flushed once enough hits pile up
+# or the interval has passed, and on shutdown.
+HIT_FLUSH_THRESHOLD = 100
+HIT_FLUSH_INTERVAL_SECONDS = 5.0
+_hit_buffer: Dict[str, int] = {}
+_hit_lock = threading.Lock()
+_buffered_hits = 0
+_last_hit_flush = time.monotonic()
+
+# Exact-match front for AI cache lookups: (content_hash, content_type,
+# ai_provider) -> (entry_id, cached_response as orjson bytes, expires_at).
+# Bytes are immutable and decoded per hit, so a caller mutating its dict
+# can't change what others get. Invalidated by store_cache and
+# cleanup_expired_cache.
+ai_response_cache = TTLCache(maxsize=10000, ttl=300.0)
+
+# Semantic tier: one LSH index per (content_type, ai_provider) over stored
+# embeddings, kept in step by store_cache. Lets paraphrased prompts reuse a
+# cached response. The indexes are warmed from the table in a background
+# thread on first use; lookups miss until that finishes instead of waiting.
+SEMANTIC_SIMILARITY_THRESHOLD = 0.95
+# Most recently used entries loaded at warm-up, and rows decoded per batch
+SEMANTIC_INDEX_MAX_ENTRIES = 10000
+SEMANTIC_LOAD_BATCH_SIZE = 500
+_semantic_indexes: Dict[Tuple[str, str], LSHIndex] = {}
+_semantic_loader: Optional[threading.Thread] = None
+_semantic_loaded = False
+# Bumped by _reset_semantic_indexes so a running warm-up stops adding to them
+_semantic_generation = 0
+_semantic_lock = threading.Lock()
+
+_GET_CACHE_ENTRY_BY_ID_STMT = select(AIMemoryCache).where(AIMemoryCache.id == bindparam("entry_id"))
+# Raw float16 bytes: decoded with one np.frombuffer instead of a Python list
+_LOAD_EMBEDDINGS_STMT = select(
+    AIMemoryCache.id, AIMemoryCache.content_type, AIMemoryCache.ai_provider,
+    type_coerce(AIMemoryCache.vector_embedding, LargeBinary)
+).where(
+    AIMemoryCache.vector_embedding.isnot(None)
+).order_by(
+    desc(AIMemoryCache.last_used_at)
+).limit(SEMANTIC_INDEX_MAX_ENTRIES).execution_options(yield_per=SEMANTIC_LOAD_BATCH_SIZE)
+
+
+def _semantic_index(content_type: str, ai_provider: str) -> LSHIndex:
+    """Index for one (content_type, ai_provider) partition"""
+    with _semantic_lock:
+        return _semantic_indexes.setdefault((content_type, ai_provider), LSHIndex())
+
+
+def _decode_embedding(value) -> np.ndarray:
+    """Stored embedding to a vector; rows written before float16 hold JSON text"""
+    if isinstance(value, str):
+        return np.asarray(orjson.loads(value), dtype=np.float32)
+    return np.frombuffer(value, dtype="<f2")
+
+
+def _load_semantic_indexes(generation: int) -> None:
+    """Warm the indexes from stored embeddings in batches (loader thread)"""
+    global _semantic_loaded
+    try:
+        with SessionLocal() as db:
+            for rows in db.execute(_LOAD_EMBEDDINGS_STMT).partitions():
+                batches: Dict[Tuple[str, str], Tuple[List[str], List[np.ndarray]]] = {}
+                for entry_id, content_type, ai_provider, embedding in rows:
+                    keys, vectors = batches.setdefault((content_type, ai_provider), ([], []))
+                    keys.append(entry_id)
+                    vectors.append(_decode_embedding(embedding))
+                
+                for (content_type, ai_provider), (keys, vectors) in batches.items():
+                    if generation != _semantic_generation:
+                        return
+                    _semantic_index(content_type, ai_provider).add_many(keys, vectors)
+    except Exception as e:
+        logger.error(f"Semantic cache warm-up failed: {str(e)}")
+        return
+    
+    with _semantic_lock:
+        if generation == _semantic_generation:
+            _semantic_loaded = True
+
+
+def _ensure_semantic_indexes() -> bool:
+    """Start the warm-up once per process; True once the indexes are loaded"""
+    global _semantic_loader
+    if _semantic_loaded:
+        return True
+    with _semantic_lock:
+        if _semantic_loader is None:
+            _semantic_loader = threading.Thread(
+                target=_load_semantic_indexes, args=(_semantic_generation,),
+                name="semantic-cache-warmup", daemon=True
+            )
+            _semantic_loader.start()
+    return _semantic_loaded
+
+
+def _reset_semantic_indexes() -> None:
+    """Drop the semantic indexes; the next lookup rebuilds them"""
+    global _semantic_loader, _semantic_loaded, _semantic_generation
+    with _semantic_lock:
+        _semantic_indexes.clear()
+        _semantic_loader = None
+        _semantic_loaded = False
+        _semantic_generation += 1
+
+
+_cache_table = AIMemoryCache.__table__
+_RECORD_HITS_STMT = update(_cache_table)\
+    .where(_cache_table.c.id == bindparam("entry_id"))\
+    .values(
+        cache_hits=func.coalesce(_cache_table.c.cache_hits, 0) + bindparam("delta"),
+        last_used_at=bindparam("used_at")
+    )
+
+
+def cache_content_hash(content: str) -> str:
+    """
+    Cache key for AI memory content.
+    
+    SHA-256 stays: OpenSSL's implementation uses the CPU's SHA extensions
+    and outruns BLAKE2 from hashlib; the key format is unchanged so
+    existing cache rows keep matching.
+    """
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _buffer_hit(entry_id: str) -> bool:
+    """Count a hit; returns True when the buffer is due for a flush"""
+    global _buffered_hits
+    with _hit_lock:
+        _hit_buffer[entry_id] = _hit_buffer.get(entry_id, 0) + 1
+        _buffered_hits += 1
+        return (
+            _buffered_hits >= HIT_FLUSH_THRESHOLD
+            or time.monotonic() - _last_hit_flush >= HIT_FLUSH_INTERVAL_SECONDS
+        )
+
+
+def _record_hit(entry_id: str) -> None:
+    """
+    Count a hit, flushing the buffer when due
+    
+    Called from cache reads, so a failed flush is logged rather than
+    failing the read; its counts stay buffered for the next flush.
+    """
+    if _buffer_hit(entry_id):
+        try:
+            AIMemoryCacheService.flush_cache_hits()
+        except Exception as e:
+            logger.warning(f"Failed to flush AI cache hit counts: {str(e)}")
+
+
 class AIMemoryCacheService:
     """Service for managing AI memory cache for cost optimization"""
     
@@ -371,12 +718,18 @@ class AIMemoryCacheService:
         model_name: Optional[str] = None,
         vector_embedding: Optional[List[float]] = None,
         token_count: Optional[int] = None,
-        expires_hours: Optional[int] = None
+        expires_hours: Optional[int] = None,
+        content_hash: Optional[str] = None
     ) -> AIMemoryCache:
-        """Store content in AI memory cache"""
+        """
+        Store content in AI memory cache
         
-        # Generate content hash
-        content_hash = hashlib.sha256(content.encode()).hexdigest()
+        Pass content_hash (from cache_content_hash) when the caller already
+        hashed the content for the lookup, to skip hashing it again.
+        """
+        
+        if content_hash is None:
+            content_hash = cache_content_hash(content)
         
         # Calculate expiration if specified
         expires_at = None
@@ -384,7 +737,7 @@ class AIMemoryCacheService:
             expires_at = datetime.now() + timedelta(hours=expires_hours)
         
         cache_entry = AIMemoryCache(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             content_hash=content_hash,
             content_type=content_type,
             ai_provider=ai_provider,
@@ -398,7 +751,9 @@ class AIMemoryCacheService:
         
         db.add(cache_entry)
         db.commit()
-        db.refresh(cache_entry)
+        ai_response_cache.pop((content_hash, content_type, ai_provider))
+        if vector_embedding and _semantic_loader is not None:
+            _semantic_index(content_type, ai_provider).add(cache_entry.id, vector_embedding)
         return cache_entry
     
     @staticmethod
@@ -406,66 +761,186 @@ class AIMemoryCacheService:
         db: Session,
         content: str,
         content_type: str,
-        ai_provider: str
+        ai_provider: str,
+        content_hash: Optional[str] = None,
+        query_embedding: Optional[Sequence[float]] = None
     ) -> Optional[AIMemoryCache]:
-        """Retrieve cached response if available"""
-        
-        content_hash = hashlib.sha256(content.encode()).hexdigest()
-        
-        cache_entry = db.query(AIMemoryCache)\
-                       .filter(
-                           AIMemoryCache.content_hash == content_hash,
-                           AIMemoryCache.content_type == content_type,
-                           AIMemoryCache.ai_provider == ai_provider
-                       )\
-                       .filter(
-                           # Check expiration
-                           db.or_(
-                               AIMemoryCache.expires_at.is_(None),
-                               AIMemoryCache.expires_at > datetime.now()
-                           )
-                       )\
-                       .first()
+        """
+        Retrieve cached response if available (content_hash as in store_cache)
+        
+        With query_embedding, an exact-hash miss falls back to the most
+        similar cached entry (see find_similar_response).
+        """
+        
+        if content_hash is None:
+            content_hash = cache_content_hash(content)
+        
+        cache_entry = db.execute(_GET_CACHE_ENTRY_STMT, {
+            "content_hash": content_hash,
+            "content_type": content_type,
+            "ai_provider": ai_provider,
+            "now": datetime.now()
+        }).scalars().first()
+        
+        if cache_entry is None and query_embedding is not None:
+            # Counts its own hit
+            return AIMemoryCacheService.find_similar_response(
+                db, query_embedding, content_type, ai_provider
+            )
         
         if cache_entry:
             # Update usage statistics
-            cache_entry.cache_hits += 1
-            cache_entry.last_used_at = datetime.now()
-            db.commit()
+            _record_hit(cache_entry.id)
+        
+        return cache_entry
+    
+    @staticmethod
+    def lookup_cached_response(
+        db: Session,
+        content: str,
+        content_type: str,
+        ai_provider: str,
+        content_hash: Optional[str] = None,
+        query_embedding: Optional[Sequence[float]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get just the cached response dict, served from process memory when warm.
+        Every call returns its own copy, which the caller may modify.
+        
+        Falls through to get_cached_response on a miss; hits are still counted.
+        content_hash and query_embedding are optional as in get_cached_response.
+        """
+        if content_hash is None:
+            content_hash = cache_content_hash(content)
+        key = (content_hash, content_type, ai_provider)
+        
+        entry = ai_response_cache.get(key)
+        if entry is not None:
+            entry_id, cached_json, expires_at = entry
+            if expires_at is None or expires_at > datetime.now():
+                _record_hit(entry_id)
+                return orjson.loads(cached_json)
+            ai_response_cache.pop(key)
+        
+        cache_entry = AIMemoryCacheService.get_cached_response(
+            db, content, content_type, ai_provider,
+            content_hash=content_hash, query_embedding=query_embedding
+        )
+        if cache_entry is None:
+            return None
+        
+        cached_json = orjson.dumps(cache_entry.cached_response, option=orjson.OPT_NON_STR_KEYS)
+        ai_response_cache.set(key, (cache_entry.id, cached_json, cache_entry.expires_at))
+        return orjson.loads(cached_json)
+    
+    @staticmethod
+    def find_similar_response(
+        db: Session,
+        query_embedding: Sequence[float],
+        content_type: str,
+        ai_provider: str,
+        min_similarity: float = SEMANTIC_SIMILARITY_THRESHOLD
+    ) -> Optional[AIMemoryCache]:
+        """
+        Semantic fallback after an exact-hash miss.
+        
+        Returns the cached entry whose embedding is most similar to
+        query_embedding (cosine >= min_similarity), if any. Misses while
+        the indexes are still warming up.
+        """
+        if not _ensure_semantic_indexes():
+            return None
+        index = _semantic_indexes.get((content_type, ai_provider))
+        if index is None:
+            return None
+        
+        match = index.query(query_embedding, min_similarity)
+        if match is None:
+            return None
+        
+        cache_entry = db.execute(
+            _GET_CACHE_ENTRY_BY_ID_STMT, {"entry_id": match[0]}
+        ).scalar_one_or_none()
+        if cache_entry is None or (cache_entry.expires_at and cache_entry.expires_at <= datetime.now()):
+            index.remove(match[0])
+            return None
         
+        _record_hit(cache_entry.id)
         return cache_entry
     
+    @staticmethod
+    def flush_cache_hits() -> int:
+        """
+        Write buffered hit counts in one executemany UPDATE; returns entries updated
+        
+        Uses its own session, so a flush triggered by a read never commits
+        the caller's transaction. If the write fails the counts go back
+        into the buffer and the error is raised.
+        """
+        global _buffered_hits, _last_hit_flush
+        with _hit_lock:
+            pending = list(_hit_buffer.items())
+            _hit_buffer.clear()
+            _buffered_hits = 0
+            _last_hit_flush = time.monotonic()
+        
+        if not pending:
+            return 0
+        
+        used_at = datetime.now()
+        try:
+            with SessionLocal() as db:
+                db.execute(_RECORD_HITS_STMT, [
+                    {"entry_id": entry_id, "delta": delta, "used_at": used_at}
+                    for entry_id, delta in pending
+                ])
+                db.commit()
+        except Exception:
+            with _hit_lock:
+                for entry_id, delta in pending:
+                    _hit_buffer[entry_id] = _hit_buffer.get(entry_id, 0) + delta
+                    _buffered_hits += delta
+            raise
+        return len(pending)
+    
     @staticmethod
     def cleanup_expired_cache(db: Session) -> int:
-        """Remove expired cache entries"""
-        expired_count = db.query(AIMemoryCache)\
-                         .filter(
-                             AIMemoryCache.expires_at.isnot(None),
-                             AIMemoryCache.expires_at < datetime.now()
-                         )\
-                         .delete()
-        db.commit()
+        """
+        Remove expired cache entries
+        
+        Deletes in batches of CLEANUP_BATCH_SIZE, committing each one, so
+        a large backlog never becomes one long table-locking transaction.
+        """
+        now = datetime.now()
+        expired_count = 0
+        while True:
+            deleted = db.execute(
+                _DELETE_EXPIRED_BATCH_STMT,
+                {"now": now, "batch_size": CLEANUP_BATCH_SIZE}
+            ).rowcount
+            db.commit()
+            expired_count += deleted
+            if deleted < CLEANUP_BATCH_SIZE:
+                break
+        ai_response_cache.clear()
+        _reset_semantic_indexes()
         return expired_count
     
     @staticmethod
     def get_cache_statistics(db: Session) -> Dict[str, Any]:
         """Get cache usage statistics"""
-        stats = {
-            "total_entries": db.query(AIMemoryCache).count(),
-            "total_hits": db.query(func.sum(AIMemoryCache.cache_hits)).scalar() or 0,
-            "total_cost_saved": db.query(func.sum(AIMemoryCache.estimated_cost_saved)).scalar() or 0.0
-        }
+        # One scan grouped by provider; the totals are the sum of the groups
+        # (GROUPING SETS would do it in SQL but SQLite lacks it)
+        provider_stats = db.execute(_CACHE_STATS_STMT).all()
         
-        # Get stats by provider
-        provider_stats = db.query(
-            AIMemoryCache.ai_provider,
-            func.count(AIMemoryCache.id).label('entry_count'),
-            func.sum(AIMemoryCache.cache_hits).label('total_hits')
-        ).group_by(AIMemoryCache.ai_provider).all()
-        
-        stats["by_provider"] = {
-            provider: {"entries": count, "hits": hits}
-            for provider, count, hits in provider_stats
+        stats = {
+            "total_entries": sum(row.entry_count for row in provider_stats),
+            "total_hits": sum(row.total_hits or 0 for row in provider_stats),
+            "total_cost_saved": sum((row.total_cost_saved or 0.0 for row in provider_stats), 0.0),
+            "by_provider": {
+                row.ai_provider: {"entries": row.entry_count, "hits": row.total_hits}
+                for row in provider_stats
+            }
         }
         
         return stats
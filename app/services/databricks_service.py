@@ -0,0 +1,196 @@
+"""
+Databricks Execution Service
+============================
+
+Pooled Databricks SQL connections for direct query execution.
+Connections are reused per (hostname, http_path, token) instead of
+paying a fresh TLS/auth handshake on every request.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import anyio
+
+try:
+    from databricks import sql
+except ImportError:  # Connector is optional when testing without Databricks
+    sql = None
+
+logger = logging.getLogger(__name__)
+
+# Pool sizing (overridable via environment)
+POOL_SIZE = int(os.getenv("DATABRICKS_POOL_SIZE", "4"))
+MAX_POOLS = int(os.getenv("DATABRICKS_MAX_POOLS", "16"))
+MAX_CONCURRENT_CALLS = int(os.getenv("DATABRICKS_MAX_CONCURRENT_CALLS", "8"))
+FETCH_BATCH_SIZE = int(os.getenv("DATABRICKS_FETCH_BATCH_SIZE", "10000"))
+MAX_CONNECTIONS_PER_WAREHOUSE = int(os.getenv("DATABRICKS_MAX_CONNECTIONS_PER_WAREHOUSE", str(POOL_SIZE)))
+
+# Caps worker threads running blocking driver calls so concurrent queries
+# can't exhaust the threads FastAPI uses for sync endpoints. Created lazily
+# because anyio 3.x limiters need a running event loop.
+_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def _get_limiter() -> anyio.CapacityLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(MAX_CONCURRENT_CALLS)
+    return _limiter
+
+
+async def _run_blocking(func, *args):
+    """Run a blocking driver call in a worker thread under the Databricks limiter"""
+    return await anyio.to_thread.run_sync(func, *args, limiter=_get_limiter())
+
+
+class DatabricksConnectionPool:
+    """Bounded pool of open connections to a single Databricks warehouse"""
+
+    def __init__(self, server_hostname: str, http_path: str, access_token: str, max_size: int = POOL_SIZE):
+        self.server_hostname = server_hostname
+        self.http_path = http_path
+        self._access_token = access_token
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=max_size)
+        # Caps in-flight queries per warehouse. Awaited on the event loop, not
+        # in a worker thread, so waiting callers never hold a limiter token.
+        self.slots = anyio.Semaphore(MAX_CONNECTIONS_PER_WAREHOUSE)
+
+    def _connect(self):
+        """Open a new connection to the warehouse"""
+        if sql is None:
+            raise RuntimeError("databricks-sql-connector is not installed")
+        return sql.connect(
+            server_hostname=self.server_hostname,
+            http_path=self.http_path,
+            access_token=self._access_token
+        )
+
+    def acquire(self):
+        """Check out an idle connection, opening one if none are available"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, connection) -> None:
+        """Return a healthy connection to the pool"""
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            self.discard(connection)
+
+    @staticmethod
+    def discard(connection) -> None:
+        """Close a connection without returning it to the pool"""
+        try:
+            connection.close()
+        except Exception as e:
+            logger.debug(f"Error closing Databricks connection: {str(e)}")
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Borrow a connection; broken connections are dropped instead of reused"""
+        connection = self.acquire()
+        try:
+            yield connection
+        except Exception:
+            self.discard(connection)
+            raise
+        else:
+            self.release(connection)
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        while True:
+            try:
+                self.discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+# LRU registry of pools keyed by (hostname, http_path, token hash)
+_pools: "OrderedDict[Tuple[str, str, str], DatabricksConnectionPool]" = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def get_pool(server_hostname: str, http_path: str, access_token: str) -> DatabricksConnectionPool:
+    """Get (or create) the connection pool for a warehouse/token combination"""
+    key = (server_hostname, http_path, hashlib.sha256(access_token.encode()).hexdigest())
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            _pools.move_to_end(key)
+            return pool
+
+        pool = DatabricksConnectionPool(server_hostname, http_path, access_token)
+        _pools[key] = pool
+
+        # Evict the least recently used pool and close its connections
+        if len(_pools) > MAX_POOLS:
+            _, evicted = _pools.popitem(last=False)
+            evicted.close()
+
+        return pool
+
+
+def close_all_pools() -> None:
+    """Close every pooled connection. Call on application shutdown."""
+    with _pools_lock:
+        while _pools:
+            _, pool = _pools.popitem()
+            pool.close()
+
+
+def _fetch_records(cursor, batch_size: int) -> List[Dict[str, Any]]:
+    """
+    Fetch the next batch as row dicts (blocking)
+    
+    The connector receives results as Arrow; fetching the Arrow batch and
+    converting it column-wise in C++ skips the driver's per-row Row objects.
+    """
+    return cursor.fetchmany_arrow(batch_size).to_pylist()
+
+
+async def stream_query_async(
+    sql_query: str,
+    server_hostname: str,
+    http_path: str,
+    access_token: str,
+    batch_size: int = FETCH_BATCH_SIZE
+) -> AsyncIterator[Tuple[List[str], List[Dict[str, Any]]]]:
+    """
+    Execute a query and yield (column_names, records) in Arrow-backed batches
+
+    The first batch is always yielded (possibly empty) so callers can
+    surface execution errors before they start streaming a response.
+    Peak memory is bounded by batch_size rather than the full result set.
+    """
+    pool = get_pool(server_hostname, http_path, access_token)
+    async with pool.slots:
+        connection = await _run_blocking(pool.acquire)
+        try:
+            cursor = connection.cursor()
+            await _run_blocking(cursor.execute, sql_query)
+            columns = [desc[0] for desc in cursor.description]
+
+            records = await _run_blocking(_fetch_records, cursor, batch_size)
+            yield columns, records
+            while records:
+                records = await _run_blocking(_fetch_records, cursor, batch_size)
+                if records:
+                    yield columns, records
+        except BaseException:
+            # Includes client disconnects mid-stream: never reuse a half-read connection
+            pool.discard(connection)
+            raise
+        else:
+            cursor.close()
+            pool.release(connection)
@@ -6,25 +6,292 @@ Handles the processing of Excel content received from frontend.
 Analyzes business logic, patterns, and prepares for AI processing.
 """
 
+import re
 import uuid
+import hashlib
+import io
 import asyncio
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+import anyio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import chain, islice
+from typing import Dict, List, Any, Optional, Tuple
+import orjson
+from sqlalchemy import bindparam, delete, insert, select, update
 from sqlalchemy.orm import Session
+from app.db.database import SessionLocal
 from app.schemas import ExcelContentPayload, ExcelProcessingResponse, ExcelProcessingStatus
-from app.db.models import AnalysisSession, ExcelDocument
-import json
+from app.db.models import AnalysisSession, ExcelDocument, ProcessingJob, SessionStatus
+from app.services.database_service import session_response_cache
+from app.utils.cache_utils import TTLCache
+from app.utils.id_utils import new_id
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Keywords that indicate business logic
+BUSINESS_KEYWORDS = (
+    "calculate", "sum", "total", "average", "count", "group by",
+    "join", "where", "filter", "exclude", "include", "only",
+    "active", "inactive", "status", "date range", "period",
+    "rule", "requirement", "condition", "criteria", "logic"
+)
+
+
+# Single alternation compiled once: one C-level scan per cell instead of a
+# substring check per keyword, and no lower() copy thanks to IGNORECASE.
+# Keywords match anywhere in the cell, as the old substring check did, so
+# camelCase and compound headers ("OrderTotalAmount", "Subtotal") count.
+_BIZ_RE = re.compile("|".join(map(re.escape, BUSINESS_KEYWORDS)), re.IGNORECASE)
+
+# Analysis results keyed by content hash, so re-submitting the same workbook
+# skips the pattern/business-logic/mapping scans. The keyword sets only
+# change on deploy, so a per-process cache never serves stale analysis.
+analysis_cache = TTLCache(maxsize=128, ttl=3600.0)
+
+
+# Look for mapping patterns in the first few (header) rows
+MAPPING_INDICATORS = (
+    "source", "target", "table", "column", "field",
+    "from", "to", "mapping", "map", "transform"
+)
+HEADER_SCAN_ROWS = 5
+
+# Matched only as whole words; as prefixes they'd fire on "Totals", "Tomorrow"
+WHOLE_WORD_INDICATORS = frozenset({"from", "to"})
+
+# Word edges, checked case-sensitively: a non-letter, or a lower->Upper
+# camelCase transition ("DataSource", "SrcTable")
+_WORD_START = r"(?:(?<![A-Za-z])|(?<=[a-z])(?=[A-Z]))"
+_WORD_END = r"(?:(?![A-Za-z])|(?<=[a-z])(?=[A-Z]))"
+
+# Indicators match at a word start, as prefixes so "Columns", "SourceField"
+# and snake_case headers like "source_table" count; only the indicator
+# itself is case-insensitive
+_MAP_RE = re.compile(
+    _WORD_START + "(?:" + "|".join(
+        "(?i:" + re.escape(indicator) + ")" + (_WORD_END if indicator in WHOLE_WORD_INDICATORS else "")
+        for indicator in MAPPING_INDICATORS
+    ) + ")"
+)
+
+# Leading rows per sheet included in the consolidated AI text
+CONSOLIDATED_TEXT_ROWS = 20
+
+# Business-logic hits kept per document; downstream AI analysis can't use
+# thousands, and noisy sheets would otherwise grow the stored JSON unbounded
+MAX_BUSINESS_LOGIC_HITS = 500
+
+# Cells longer than this count toward a sheet being text-heavy
+TEXT_HEAVY_CELL_LEN = 20
+
+# Raw content stored on ExcelDocument.sheet_analysis is capped; the analysis
+# itself always runs on the full payload
+CONTENT_JSON_MAX_CELLS = 10000
+
+
+@dataclass(slots=True)
+class SheetScan:
+    """Per-sheet features gathered during the content scan"""
+    name: str
+    row_count: int = 0
+    column_count: int = 0
+    has_headers: bool = False
+    table_like: bool = False
+    text_cells: int = 0
+    has_mappings: bool = False
+
+
+@dataclass(slots=True)
+class ScanResult:
+    """Everything the analysis steps need, from one pass over the sheets"""
+    sheets: List[SheetScan] = field(default_factory=list)
+    business_logic: List[Dict[str, Any]] = field(default_factory=list)
+    business_logic_truncated: bool = False
+
+
+def _scan_sheets_once(sheets: List) -> ScanResult:
+    """
+    Walk every row and cell exactly once, collecting sheet structure,
+    text density, business-logic hits and mapping indicators together.
+    """
+    result = ScanResult()
+    business_logic = result.business_logic
+    search = _BIZ_RE.search
+    
+    for sheet in sheets:
+        content = sheet.content
+        sheet_scan = SheetScan(name=sheet.sheet_name, row_count=len(content))
+        result.sheets.append(sheet_scan)
+        if not content:
+            continue
+        
+        first_row = content[0]
+        sheet_scan.has_headers = bool(first_row) and all(
+            isinstance(cell, str) and cell.strip() for cell in first_row
+        )
+        
+        # Row widths in one C-level pass; both reductions read the same list
+        row_lengths = list(map(len, content))
+        sheet_scan.column_count = max(row_lengths)
+        sheet_scan.table_like = (
+            len(content) > 2 and len(set(row_lengths[:HEADER_SCAN_ROWS])) == 1
+        )
+        
+        # Flat, lazy scan of the header rows: stops at the first matching cell
+        sheet_scan.has_mappings = any(
+            map(_MAP_RE.search, chain.from_iterable(content[:HEADER_SCAN_ROWS]))
+        )
+        
+        # Cells are validated as str by the schema, so width checks stay in C
+        sheet_scan.text_cells = sum(
+            map(TEXT_HEAVY_CELL_LEN.__lt__, map(len, chain.from_iterable(content)))
+        )
+        
+        if result.business_logic_truncated:
+            continue
+        
+        for row_idx, row in enumerate(content):
+            # One regex pass over the joined row rejects rows with no keyword
+            # before any cell is inspected. "\x1f" is not a letter, so no
+            # match can span two cells.
+            if not search("\x1f".join(row)):
+                continue
+            
+            for cell_idx, cell in enumerate(row):
+                if len(cell) > 10 and search(cell):
+                    if len(business_logic) >= MAX_BUSINESS_LOGIC_HITS:
+                        result.business_logic_truncated = True
+                        break
+                    business_logic.append({
+                        "sheet": sheet.sheet_name,
+                        "row": row_idx + 1,
+                        "column": cell_idx + 1,
+                        "text": cell,
+                        "type": "business_rule"
+                    })
+            
+            if result.business_logic_truncated:
+                break
+    
+    return result
+
+
+def _serialize_payload(payload: ExcelContentPayload) -> Dict[str, Any]:
+    """
+    Dump the payload to JSON-safe types, keeping at most
+    CONTENT_JSON_MAX_CELLS cells of raw content across all sheets.
+    """
+    # mode='json' renders the UUID and datetimes as strings in pydantic-core
+    payload_dict = payload.model_dump(mode='json')
+    
+    budget = CONTENT_JSON_MAX_CELLS
+    for sheet in payload_dict['sheets']:
+        content = sheet['content']
+        kept = 0
+        for row in content:
+            if budget < len(row):
+                break
+            budget -= len(row)
+            kept += 1
+        if kept < len(content):
+            sheet['content'] = content[:kept]
+            sheet['content_truncated'] = True
+    
+    return payload_dict
+
+
+def _content_counts(sheets: List) -> Tuple[int, int]:
+    """Total (rows, cells) across all sheets in a single traversal"""
+    total_rows = total_cells = 0
+    for sheet in sheets:
+        total_rows += len(sheet.content)
+        total_cells += sum(map(len, sheet.content))
+    return total_rows, total_cells
+
+
+def _content_hash(sheets: List) -> str:
+    """SHA-256 over sheet names and cell content (upload metadata ignored)"""
+    digest = hashlib.sha256()
+    for sheet in sheets:
+        digest.update(orjson.dumps([sheet.sheet_name, sheet.content]))
+    return digest.hexdigest()
+
+
+@dataclass(slots=True)
+class _JobState:
+    """
+    Mutable progress of a processing job.
+    
+    Updated several times per job from the background task; plain slot
+    writes instead of pydantic attribute handling. Written to the
+    processing_jobs table at each step (see _save_job_state).
+    """
+    job_id: str
+    session_id: str
+    status: str
+    progress_percentage: int = 0
+    current_step: Optional[str] = None
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    patterns_detected: Optional[Dict[str, Any]] = None
+    business_logic_found: Optional[List[Dict[str, Any]]] = None
+    table_mappings_discovered: Optional[List[Dict[str, Any]]] = None
+
+
+# Job progress lives in the processing_jobs table, so a status request can
+# land on any worker and survives restarts. Jobs not updated within the TTL
+# are treated as gone and pruned whenever a new job starts.
+JOB_STATUS_TTL_SECONDS = 3600.0
+
+_jobs_table = ProcessingJob.__table__
+_JOB_STATE_FIELDS = (
+    "status", "progress_percentage", "current_step", "error_message",
+    "started_at", "completed_at", "patterns_detected",
+    "business_logic_found", "table_mappings_discovered"
+)
+_INSERT_JOB_STMT = insert(_jobs_table)
+_UPDATE_JOB_STMT = update(_jobs_table).where(_jobs_table.c.id == bindparam("job_id"))
+_PRUNE_JOBS_STMT = delete(_jobs_table).where(_jobs_table.c.updated_at < bindparam("cutoff"))
+_GET_JOB_STMT = select(ProcessingJob).where(
+    ProcessingJob.id == bindparam("job_id"),
+    ProcessingJob.updated_at >= bindparam("cutoff")
+)
+
+
+def _job_values(state: _JobState) -> Dict[str, Any]:
+    values = {name: getattr(state, name) for name in _JOB_STATE_FIELDS}
+    values["updated_at"] = datetime.now()
+    return values
+
+
+def _create_job_state(state: _JobState) -> None:
+    """Insert a new job row and prune expired ones (blocking)"""
+    values = _job_values(state)
+    with SessionLocal() as db:
+        db.execute(_PRUNE_JOBS_STMT, {"cutoff": values["updated_at"] - timedelta(seconds=JOB_STATUS_TTL_SECONDS)})
+        db.execute(_INSERT_JOB_STMT, {"id": state.job_id, "session_id": state.session_id, **values})
+        db.commit()
+
+
+def _save_job_state(state: _JobState) -> None:
+    """
+    Publish a job's progress (blocking)
+    
+    Uses its own short transaction so other workers see each step while
+    the job's document writes stay uncommitted until the end.
+    """
+    with SessionLocal() as db:
+        db.execute(_UPDATE_JOB_STMT, {"job_id": state.job_id, **_job_values(state)})
+        db.commit()
+
 
 class ExcelContentProcessor:
     """Process Excel content and extract business intelligence"""
     
     def __init__(self, db: Session):
         self.db = db
-        self.processing_jobs: Dict[str, ExcelProcessingStatus] = {}
     
     async def process_excel_content(self, payload: ExcelContentPayload) -> ExcelProcessingResponse:
         """
@@ -37,129 +304,185 @@ class ExcelContentProcessor:
             Processing response with job ID
         """
         job_id = str(uuid.uuid4())
+        session_id = str(payload.session_id)
         
         # Validate session exists
-        session = self.db.query(AnalysisSession).filter(
-            AnalysisSession.id == payload.session_id
-        ).first()
+        session = await anyio.to_thread.run_sync(
+            lambda: self.db.query(AnalysisSession).filter(
+                AnalysisSession.id == session_id
+            ).first()
+        )
         
         if not session:
-            raise ValueError(f"Session {payload.session_id} not found")
+            raise ValueError(f"Session {session_id} not found")
         
-        # Calculate content size
-        total_cells = sum(
-            len(row) for sheet in payload.sheets 
-            for row in sheet.content
-        )
+        # Calculate content size (rows and cells in one pass, reused downstream)
+        total_rows, total_cells = _content_counts(payload.sheets)
         
         # Create processing status
-        processing_status = ExcelProcessingStatus(
+        processing_status = _JobState(
             job_id=job_id,
-            session_id=payload.session_id,
+            session_id=session_id,
             status="processing",
             progress_percentage=0,
             current_step="Initializing content analysis",
             started_at=datetime.now()
         )
         
-        self.processing_jobs[job_id] = processing_status
+        # Committed before the response so any worker can report on the job
+        await anyio.to_thread.run_sync(_create_job_state, processing_status)
         
         # Start background processing
-        asyncio.create_task(self._process_content_background(job_id, payload, session))
+        asyncio.create_task(self._process_content_background(processing_status, payload, session_id, total_rows))
         
         return ExcelProcessingResponse(
             job_id=job_id,
-            session_id=payload.session_id,
+            session_id=session_id,
             sheets_received=len(payload.sheets),
             total_content_size=total_cells
         )
     
     async def _process_content_background(
         self, 
-        job_id: str, 
+        processing_status: _JobState, 
         payload: ExcelContentPayload, 
-        session: AnalysisSession
+        session_id: str,
+        total_rows: int
     ):
-        """Background processing of Excel content"""
+        """
+        Background processing of Excel content
+        
+        The analysis steps are pure CPU work and the database calls go through
+        a sync Session, so both run in worker threads to keep the event loop
+        free for other requests. The request's Session is closed by the time
+        this runs, so the job opens and closes its own.
+        """
+        job_id = processing_status.job_id
+        db = SessionLocal()
         try:
-            processing_status = self.processing_jobs[job_id]
+            session = await anyio.to_thread.run_sync(db.get, AnalysisSession, session_id)
+            if session is None:
+                raise ValueError(f"Session {session_id} not found")
             
             # Step 1: Store raw content
             processing_status.current_step = "Storing raw Excel content"
             processing_status.progress_percentage = 10
+            await self._publish(processing_status)
             
-            excel_doc = await self._store_raw_content(payload, session)
-            
-            # Step 2: Analyze sheet patterns
-            processing_status.current_step = "Analyzing sheet patterns and structure"
-            processing_status.progress_percentage = 30
-            
-            patterns = await self._analyze_sheet_patterns(payload.sheets)
-            processing_status.patterns_detected = patterns
+            content_hash = await anyio.to_thread.run_sync(_content_hash, payload.sheets)
+            excel_doc = await self._store_raw_content(db, payload, session, content_hash)
             
-            # Step 3: Extract business logic
-            processing_status.current_step = "Extracting business logic and requirements"
-            processing_status.progress_percentage = 50
-            
-            business_logic = await self._extract_business_logic(payload.sheets)
-            processing_status.business_logic_found = business_logic
-            
-            # Step 4: Detect table mappings
-            processing_status.current_step = "Identifying table and column mappings"
-            processing_status.progress_percentage = 70
-            
-            table_mappings = await self._detect_table_mappings(payload.sheets)
-            processing_status.table_mappings_discovered = table_mappings
+            cached_analysis = analysis_cache.get(content_hash)
+            if cached_analysis is not None:
+                # Steps 2-4: identical content was analyzed recently
+                logger.info(f"Reusing cached analysis for job {job_id}")
+                patterns, business_logic, table_mappings, logic_truncated = cached_analysis
+                processing_status.patterns_detected = patterns
+                processing_status.business_logic_found = business_logic
+                processing_status.table_mappings_discovered = table_mappings
+            else:
+                # Step 2: Analyze sheet patterns
+                processing_status.current_step = "Analyzing sheet patterns and structure"
+                processing_status.progress_percentage = 30
+                await self._publish(processing_status)
+                
+                scan = await anyio.to_thread.run_sync(_scan_sheets_once, payload.sheets)
+                patterns = self._analyze_sheet_patterns(scan)
+                processing_status.patterns_detected = patterns
+                
+                # Step 3: Extract business logic
+                processing_status.current_step = "Extracting business logic and requirements"
+                processing_status.progress_percentage = 50
+                
+                business_logic = self._extract_business_logic(scan)
+                logic_truncated = scan.business_logic_truncated
+                processing_status.business_logic_found = business_logic
+                
+                # Step 4: Detect table mappings
+                processing_status.current_step = "Identifying table and column mappings"
+                processing_status.progress_percentage = 70
+                
+                table_mappings = self._detect_table_mappings(scan)
+                processing_status.table_mappings_discovered = table_mappings
+                
+                analysis_cache.set(
+                    content_hash, (patterns, business_logic, table_mappings, logic_truncated)
+                )
             
             # Step 5: Prepare AI-ready content
             processing_status.current_step = "Preparing content for AI analysis"
             processing_status.progress_percentage = 90
+            await self._publish(processing_status)
             
-            ai_ready_content = await self._prepare_ai_content(payload, patterns, business_logic, table_mappings)
+            ai_ready_content = await anyio.to_thread.run_sync(
+                self._prepare_ai_content,
+                payload, patterns, business_logic, table_mappings, total_rows, logic_truncated
+            )
             
             # Step 6: Update database with processed content
             await self._update_excel_document(excel_doc, ai_ready_content, patterns)
             
             # Update session status
-            session.status = "processing_excel"
+            session.status = SessionStatus.PROCESSING_EXCEL
             session.current_phase = "excel_analysis"
             session.progress_percentage = 25.0  # Phase 2 is 25% of total
-            self.db.commit()
+            
+            # Single transaction for the document insert, analysis and session update
+            await anyio.to_thread.run_sync(db.commit)
+            session_response_cache.pop(session.id)
             
             # Complete processing
             processing_status.status = "completed"
             processing_status.current_step = "Content processing completed successfully"
             processing_status.progress_percentage = 100
             processing_status.completed_at = datetime.now()
+            await self._publish(processing_status)
             
             logger.info(f"Excel content processing completed for job {job_id}")
             
         except Exception as e:
             logger.error(f"Excel processing failed for job {job_id}: {str(e)}")
+            await anyio.to_thread.run_sync(db.rollback)
             processing_status.status = "failed"
             processing_status.error_message = str(e)
             processing_status.completed_at = datetime.now()
+            try:
+                await self._publish(processing_status)
+            except Exception as publish_error:
+                logger.error(f"Could not record failure of job {job_id}: {str(publish_error)}")
+        finally:
+            await anyio.to_thread.run_sync(db.close)
     
-    async def _store_raw_content(self, payload: ExcelContentPayload, session: AnalysisSession) -> ExcelDocument:
+    @staticmethod
+    async def _publish(processing_status: _JobState) -> None:
+        """Write the job's current progress to the shared job table"""
+        await anyio.to_thread.run_sync(_save_job_state, processing_status)
+    
+    async def _store_raw_content(
+        self,
+        db: Session,
+        payload: ExcelContentPayload,
+        session: AnalysisSession,
+        content_hash: str
+    ) -> ExcelDocument:
         """Store raw Excel content in database"""
         
         # Create or update ExcelDocument
-        excel_doc = self.db.query(ExcelDocument).filter(
-            ExcelDocument.session_id == session.id
-        ).first()
+        excel_doc = await anyio.to_thread.run_sync(
+            lambda: db.query(ExcelDocument).filter(
+                ExcelDocument.session_id == session.id
+            ).first()
+        )
         
-        # Convert payload to JSON-serializable format
-        payload_dict = payload.dict()
-        # Convert datetime to ISO string
-        if 'file_metadata' in payload_dict and 'upload_timestamp' in payload_dict['file_metadata']:
-            payload_dict['file_metadata']['upload_timestamp'] = payload_dict['file_metadata']['upload_timestamp'].isoformat()
+        # Convert payload to JSON-serializable format (off the event loop)
+        payload_dict = await anyio.to_thread.run_sync(_serialize_payload, payload)
         
         if not excel_doc:
             excel_doc = ExcelDocument(
-                id=str(uuid.uuid4()),
+                id=new_id(),
                 session_id=session.id,
                 filename=payload.file_metadata.filename,
-                file_hash="placeholder_hash",  # TODO: Generate actual hash
+                file_hash=content_hash,
                 file_size=int((payload.file_metadata.file_size_mb or 0.0) * 1024 * 1024),  # Convert MB to bytes
                 sheet_count=len(payload.sheets),
                 sheet_names=[sheet.sheet_name for sheet in payload.sheets],
@@ -167,15 +490,16 @@ class ExcelContentProcessor:
                 created_at=datetime.now(),
                 updated_at=datetime.now()
             )
-            self.db.add(excel_doc)
+            db.add(excel_doc)
         else:
             excel_doc.sheet_analysis = payload_dict
+            excel_doc.file_hash = content_hash
             excel_doc.updated_at = datetime.now()
         
-        self.db.commit()
+        # Committed together with the analysis results at the end of the job
         return excel_doc
     
-    async def _analyze_sheet_patterns(self, sheets: List) -> Dict[str, Any]:
+    def _analyze_sheet_patterns(self, scan: ScanResult) -> Dict[str, Any]:
         """Analyze patterns in Excel sheets"""
         patterns = {
             "sheet_types": {},
@@ -183,109 +507,43 @@ class ExcelContentProcessor:
             "structure_analysis": {}
         }
         
-        for sheet in sheets:
-            sheet_analysis = {
-                "name": sheet.sheet_name,
-                "row_count": len(sheet.content),
-                "column_count": max(len(row) for row in sheet.content) if sheet.content else 0,
-                "has_headers": False,
-                "table_like": False,
-                "text_heavy": False
+        for sheet in scan.sheets:
+            patterns["sheet_types"][sheet.name] = {
+                "name": sheet.name,
+                "row_count": sheet.row_count,
+                "column_count": sheet.column_count,
+                "has_headers": sheet.has_headers,
+                "table_like": sheet.table_like,
+                "text_heavy": sheet.text_cells > sheet.row_count * 0.3
             }
-            
-            if sheet.content:
-                # Check if first row looks like headers
-                first_row = sheet.content[0] if sheet.content else []
-                if first_row and all(isinstance(cell, str) and cell.strip() for cell in first_row):
-                    sheet_analysis["has_headers"] = True
-                
-                # Check if content is table-like
-                if len(sheet.content) > 2:
-                    consistent_columns = all(
-                        len(row) == len(sheet.content[0]) 
-                        for row in sheet.content[:5]  # Check first 5 rows
-                    )
-                    sheet_analysis["table_like"] = consistent_columns
-                
-                # Check if content is text-heavy
-                text_cells = sum(
-                    1 for row in sheet.content 
-                    for cell in row 
-                    if isinstance(cell, str) and len(cell) > 20
-                )
-                sheet_analysis["text_heavy"] = text_cells > len(sheet.content) * 0.3
-            
-            patterns["sheet_types"][sheet.sheet_name] = sheet_analysis
         
         return patterns
     
-    async def _extract_business_logic(self, sheets: List) -> List[str]:
+    def _extract_business_logic(self, scan: ScanResult) -> List[str]:
         """Extract business logic and requirements from sheet content"""
-        business_logic = []
-        
-        # Keywords that indicate business logic
-        business_keywords = [
-            "calculate", "sum", "total", "average", "count", "group by",
-            "join", "where", "filter", "exclude", "include", "only",
-            "active", "inactive", "status", "date range", "period",
-            "rule", "requirement", "condition", "criteria", "logic"
-        ]
-        
-        for sheet in sheets:
-            for row_idx, row in enumerate(sheet.content):
-                for cell_idx, cell in enumerate(row):
-                    if isinstance(cell, str) and len(cell) > 10:
-                        cell_lower = cell.lower()
-                        if any(keyword in cell_lower for keyword in business_keywords):
-                            business_logic.append({
-                                "sheet": sheet.sheet_name,
-                                "row": row_idx + 1,
-                                "column": cell_idx + 1,
-                                "text": cell,
-                                "type": "business_rule"
-                            })
-        
-        return business_logic
+        return scan.business_logic
     
-    async def _detect_table_mappings(self, sheets: List) -> List[str]:
+    def _detect_table_mappings(self, scan: ScanResult) -> List[str]:
         """Detect table and column mappings"""
-        mappings = []
-        
-        # Look for mapping patterns
-        mapping_indicators = [
-            "source", "target", "table", "column", "field",
-            "from", "to", "mapping", "map", "transform"
+        return [
+            {
+                "sheet": sheet.name,
+                "type": "table_mapping",
+                "confidence": "medium",
+                "description": f"Sheet '{sheet.name}' appears to contain table/column mappings"
+            }
+            for sheet in scan.sheets
+            if sheet.has_mappings
         ]
-        
-        for sheet in sheets:
-            # Check if this sheet contains mapping information
-            sheet_has_mappings = False
-            
-            for row in sheet.content[:5]:  # Check first 5 rows for headers
-                if any(
-                    isinstance(cell, str) and 
-                    any(indicator in cell.lower() for indicator in mapping_indicators)
-                    for cell in row
-                ):
-                    sheet_has_mappings = True
-                    break
-            
-            if sheet_has_mappings:
-                mappings.append({
-                    "sheet": sheet.sheet_name,
-                    "type": "table_mapping",
-                    "confidence": "medium",
-                    "description": f"Sheet '{sheet.sheet_name}' appears to contain table/column mappings"
-                })
-        
-        return mappings
     
-    async def _prepare_ai_content(
+    def _prepare_ai_content(
         self, 
         payload: ExcelContentPayload, 
         patterns: Dict[str, Any],
         business_logic: List[str],
-        table_mappings: List[str]
+        table_mappings: List[str],
+        total_rows: int,
+        business_logic_truncated: bool = False
     ) -> Dict[str, Any]:
         """Prepare content for AI processing"""
         
@@ -298,7 +556,8 @@ class ExcelContentProcessor:
             "consolidated_text": self._create_consolidated_text(payload.sheets),
             "processing_metadata": {
                 "total_sheets": len(payload.sheets),
-                "total_rows": sum(len(sheet.content) for sheet in payload.sheets),
+                "total_rows": total_rows,
+                "business_logic_truncated": business_logic_truncated,
                 "analysis_confidence": "medium",
                 "next_phase": "information_discovery"
             }
@@ -308,31 +567,27 @@ class ExcelContentProcessor:
     
     def _create_consolidated_text(self, sheets: List) -> str:
         """Create consolidated text representation for AI"""
-        text_parts = [
-            "EXCEL MAPPING DOCUMENT ANALYSIS",
-            "=" * 50,
-            ""
-        ]
+        buf = io.StringIO()
+        buf.write("EXCEL MAPPING DOCUMENT ANALYSIS\n" + "=" * 50 + "\n\n")
         
         for sheet in sheets:
-            text_parts.extend([
-                f"SHEET: {sheet.sheet_name}",
-                f"Rows: {len(sheet.content)}",
-                ""
-            ])
+            row_count = len(sheet.content)
+            buf.write(f"SHEET: {sheet.sheet_name}\nRows: {row_count}\n\n")
             
             # Add content (limit to prevent overwhelming AI)
-            for i, row in enumerate(sheet.content[:20]):  # First 20 rows
-                row_text = " | ".join(str(cell) for cell in row if cell and str(cell).strip())
-                if row_text:
-                    text_parts.append(f"  Row {i+1}: {row_text}")
+            for i, row in enumerate(islice(sheet.content, CONSOLIDATED_TEXT_ROWS)):
+                # str() once per cell; blanks and whitespace-only cells dropped
+                parts = [text for cell in row if cell and (text := str(cell)).strip()]
+                if parts:
+                    buf.write(f"  Row {i+1}: {' | '.join(parts)}\n")
             
-            if len(sheet.content) > 20:
-                text_parts.append(f"  ... and {len(sheet.content) - 20} more rows")
+            if row_count > CONSOLIDATED_TEXT_ROWS:
+                buf.write(f"  ... and {row_count - CONSOLIDATED_TEXT_ROWS} more rows\n")
             
-            text_parts.append("")
+            buf.write("\n")
         
-        return "\n".join(text_parts)
+        # Previous list-join output had no trailing newline
+        return buf.getvalue()[:-1]
     
     async def _update_excel_document(
         self, 
@@ -346,20 +601,30 @@ class ExcelContentProcessor:
         excel_doc.discovered_patterns = patterns
         excel_doc.ai_confidence_score = 0.8  # Default confidence score
         excel_doc.updated_at = datetime.now()
-        
-        self.db.commit()
     
     def get_processing_status(self, job_id: str) -> Optional[ExcelProcessingStatus]:
-        """Get processing status for a job"""
-        return self.processing_jobs.get(job_id)
+        """Get processing status for a job (blocking; expired jobs count as missing)"""
+        job = self.db.execute(_GET_JOB_STMT, {
+            "job_id": job_id,
+            "cutoff": datetime.now() - timedelta(seconds=JOB_STATUS_TTL_SECONDS)
+        }).scalar_one_or_none()
+        if job is None:
+            return None
+        return ExcelProcessingStatus(
+            job_id=job.id,
+            session_id=job.session_id,
+            **{name: getattr(job, name) for name in _JOB_STATE_FIELDS}
+        )
     
     def get_session_excel_data(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get processed Excel data for a session"""
-        excel_doc = self.db.query(ExcelDocument).filter(
+        # Select only the column we return; sheet_analysis holds the raw
+        # payload and can be megabytes
+        row = self.db.query(ExcelDocument.information_mapping).filter(
             ExcelDocument.session_id == session_id
         ).first()
         
-        if excel_doc and excel_doc.information_mapping:
-            return excel_doc.information_mapping
+        if row and row[0]:
+            return row[0]
         
         return None
@@ -0,0 +1,97 @@
+"""
+Excel Workbook Reader
+=====================
+
+Server-side parsing of uploaded Excel files into sheet content for the
+Phase 2 processor. Uses python-calamine (Rust reader) when installed and
+falls back to openpyxl in read-only mode.
+"""
+
+import io
+import logging
+import os
+from typing import Any, List
+
+from app.schemas import ExcelSheetContent
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # Calamine is optional; openpyxl is always available
+    CalamineWorkbook = None
+
+logger = logging.getLogger(__name__)
+
+# Largest accepted upload (overridable via environment)
+MAX_WORKBOOK_BYTES = int(os.getenv("EXCEL_MAX_UPLOAD_MB", "25")) * 1024 * 1024
+
+
+class WorkbookReadError(ValueError):
+    """The uploaded bytes are not a readable Excel workbook"""
+
+
+def _cell_to_str(value: Any) -> str:
+    """Sheet content is exchanged as strings; empty cells become ''"""
+    return "" if value is None else str(value)
+
+
+def _read_with_calamine(data: bytes) -> List[ExcelSheetContent]:
+    """Parse every sheet with calamine"""
+    workbook = CalamineWorkbook.from_filelike(io.BytesIO(data))
+    sheets = []
+    for index, name in enumerate(workbook.sheet_names):
+        rows = workbook.get_sheet_by_name(name).to_python(skip_empty_area=True)
+        sheets.append(ExcelSheetContent(
+            sheet_name=name,
+            sheet_index=index,
+            content=[[_cell_to_str(cell) for cell in row] for row in rows]
+        ))
+    return sheets
+
+
+def _read_with_openpyxl(data: bytes) -> List[ExcelSheetContent]:
+    """Parse every sheet with openpyxl's streaming read-only mode"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        sheets = []
+        for index, worksheet in enumerate(workbook.worksheets):
+            # Some writers record a bogus dimension (e.g. A1:XFD1048576) and
+            # read-only iteration would walk every empty row up to it
+            worksheet.reset_dimensions()
+            sheets.append(ExcelSheetContent(
+                sheet_name=worksheet.title,
+                sheet_index=index,
+                content=[
+                    [_cell_to_str(cell) for cell in row]
+                    for row in worksheet.iter_rows(values_only=True)
+                ]
+            ))
+        return sheets
+    finally:
+        workbook.close()
+
+
+def read_workbook(data: bytes) -> List[ExcelSheetContent]:
+    """
+    Parse an uploaded .xlsx/.xls workbook (blocking)
+
+    Args:
+        data: Raw file bytes
+
+    Returns:
+        One ExcelSheetContent per sheet, in workbook order
+
+    Raises:
+        WorkbookReadError: The file is corrupt or not an Excel workbook.
+            calamine, openpyxl and zipfile each raise their own exception
+            types, so all of them are reported as this one.
+    """
+    try:
+        if CalamineWorkbook is not None:
+            return _read_with_calamine(data)
+
+        logger.debug("python-calamine not installed, parsing with openpyxl")
+        return _read_with_openpyxl(data)
+    except Exception as e:
+        raise WorkbookReadError(f"Could not read Excel workbook: {str(e)}") from e
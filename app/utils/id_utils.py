@@ -0,0 +1,35 @@
+"""
+ID Utilities
+============
+
+Time-ordered primary keys. UUIDv7 puts a millisecond timestamp in the
+leading bits, so new rows land at the right edge of the primary key
+B-tree instead of on a random leaf page.
+"""
+
+import os
+import time
+import uuid
+
+
+def uuid7() -> uuid.UUID:
+    """
+    RFC 9562 UUID version 7.
+
+    Layout: 48-bit Unix timestamp (ms) | version | 12 random bits |
+    variant | 62 random bits.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76                           # version
+    value |= ((rand >> 62) & 0xFFF) << 64        # rand_a
+    value |= 0b10 << 62                          # variant
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF        # rand_b
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """New primary key value in canonical string form"""
+    return str(uuid7())
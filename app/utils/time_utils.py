@@ -0,0 +1,32 @@
+"""
+Time Utilities
+==============
+
+Cheap timestamps for hot request paths.
+"""
+
+import time
+from datetime import datetime
+
+# Timestamps within this window share one datetime object
+_RESOLUTION_NS = 1_000_000  # 1 ms
+
+# (monotonic_ns, datetime) published as one tuple, so a concurrent reader
+# never pairs a fresh timestamp with a stale datetime
+_cached = (0, datetime.now())
+
+
+def cached_now() -> datetime:
+    """
+    Current local time, recomputed at most once per millisecond.
+    
+    Requests handled within the same millisecond reuse one datetime
+    instead of each resolving the clock and timezone again.
+    """
+    global _cached
+    cached_at_ns, value = _cached
+    now_ns = time.monotonic_ns()
+    if now_ns - cached_at_ns >= _RESOLUTION_NS:
+        value = datetime.now()
+        _cached = (now_ns, value)
+    return value
@@ -0,0 +1,134 @@
+"""
+Vector Index Utilities
+======================
+
+Approximate nearest-neighbour lookup over embedding vectors using
+random-hyperplane LSH (cosine similarity). Sized for the AI memory cache
+(thousands of entries), not general vector search.
+"""
+
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Unit-length float32 rows; zero rows stay zero"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class LSHIndex:
+    """
+    Thread-safe cosine-similarity index.
+
+    Each of num_tables hash tables buckets vectors by the sign pattern of
+    num_bits random hyperplane projections. All projections are one
+    matrix product, and a query only scores vectors that share a bucket
+    with it in at least one table, instead of the whole collection.
+    """
+
+    def __init__(self, num_tables: int = 4, num_bits: int = 12, seed: int = 0):
+        self.num_tables = num_tables
+        self.num_bits = num_bits
+        self.dim: Optional[int] = None
+        self._rng = np.random.default_rng(seed)
+        self._planes: Optional[np.ndarray] = None
+        self._bit_weights = 1 << np.arange(num_bits - 1, -1, -1, dtype=np.int64)
+        self._tables: List[Dict[int, List[Hashable]]] = [{} for _ in range(num_tables)]
+        self._vectors: Dict[Hashable, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _signatures(self, units: np.ndarray) -> np.ndarray:
+        """Bucket ids of unit row vectors, shape (len(units), num_tables)"""
+        bits = (units @ self._planes.T >= 0.0).reshape(len(units), self.num_tables, self.num_bits)
+        return bits @ self._bit_weights
+
+    def add(self, key: Hashable, vector: Sequence[float]) -> bool:
+        """Index a vector under key; returns False if it can't be indexed"""
+        return self.add_many([key], [vector]) == 1
+
+    def add_many(self, keys: Sequence[Hashable], vectors: Iterable[Sequence[float]]) -> int:
+        """
+        Index a batch of vectors with one projection.
+
+        Vectors whose length differs from the index dimension are skipped.
+
+        Returns:
+            How many vectors were indexed
+        """
+        arrays = [np.asarray(vector, dtype=np.float32) for vector in vectors]
+
+        with self._lock:
+            if self.dim is None:
+                if not arrays:
+                    return 0
+                # Hyperplanes are drawn once the dimension is known
+                self.dim = len(arrays[0])
+                self._planes = self._rng.standard_normal(
+                    (self.num_tables * self.num_bits, self.dim), dtype=np.float32
+                )
+
+            shape = (self.dim,)
+            batch = [(key, vector) for key, vector in zip(keys, arrays) if vector.shape == shape]
+            if not batch:
+                return 0
+            units = _normalize(np.stack([vector for _, vector in batch]))
+
+            indexed = 0
+            for (key, _), unit, signatures in zip(batch, units, self._signatures(units).tolist()):
+                if not unit.any():
+                    continue
+                self._remove(key)
+                self._vectors[key] = unit
+                for table, signature in zip(self._tables, signatures):
+                    table.setdefault(signature, []).append(key)
+                indexed += 1
+        return indexed
+
+    def remove(self, key: Hashable) -> None:
+        """Drop a vector from the index"""
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        unit = self._vectors.pop(key, None)
+        if unit is None:
+            return
+        for table, signature in zip(self._tables, self._signatures(unit[None, :])[0].tolist()):
+            bucket = table.get(signature)
+            if bucket and key in bucket:
+                bucket.remove(key)
+                if not bucket:
+                    del table[signature]
+
+    def query(self, vector: Sequence[float], min_similarity: float) -> Optional[Tuple[Hashable, float]]:
+        """
+        Most similar indexed vector at or above min_similarity.
+
+        Returns:
+            (key, cosine_similarity), or None when nothing is close enough
+        """
+        unit = _normalize(np.asarray(vector, dtype=np.float32))
+        if self.dim is None or unit.shape != (self.dim,) or not unit.any():
+            return None
+
+        with self._lock:
+            candidates = set()
+            for table, signature in zip(self._tables, self._signatures(unit[None, :])[0].tolist()):
+                candidates.update(table.get(signature, ()))
+            if not candidates:
+                return None
+
+            keys = list(candidates)
+            similarities = np.stack([self._vectors[key] for key in keys]) @ unit
+
+        best = int(np.argmax(similarities))
+        if similarities[best] < min_similarity:
+            return None
+        return keys[best], float(similarities[best])
+
+    def __len__(self) -> int:
+        return len(self._vectors)
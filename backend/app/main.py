@@ -10,12 +10,13 @@ Retains /run-sql endpoint for frontend testing while building the new AI system.
 
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from databricks import sql
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 import logging
 import sys
 import os
+import orjson
 
 # Add backend directory to Python path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -27,8 +28,12 @@ from schemas import (
     HealthCheckResponse, ErrorResponse
 )
 from models import SessionStatus
+from utils.db_utils import close_connection_pools, format_row_data, stream_sql_async
+from utils.sql_generator.ai_parser import close_http_session
+from utils.sql_generator.excel_parser import shutdown_process_pool
 from datetime import datetime
-from typing import List
+from decimal import Decimal
+from typing import Any, AsyncIterator, List, Tuple
 
 # Configure logging
 logging.basicConfig(
@@ -74,12 +79,20 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down AI-DE Pair Backend...")
+    await close_http_session()
+    shutdown_process_pool()
+    close_connection_pools()
 
 
 # ================================
 # REQUEST/RESPONSE MODELS
 # ================================
 
+# Per driver call (execute, each batch fetch) on /run-sql; ad-hoc test
+# queries can be slow (overridable via environment)
+RUN_SQL_TIMEOUT_SECONDS = int(os.getenv("RUN_SQL_TIMEOUT_SECONDS", "300"))
+
+
 class SQLRequest(BaseModel):
     """Request model for direct SQL execution (frontend testing)"""
     sql: str
@@ -172,34 +185,70 @@ def list_recent_sessions(limit: int = 10, db: Session = Depends(get_db)):
 # FRONTEND TESTING ENDPOINTS
 # ================================
 
+def _json_default(value: Any) -> Any:
+    """orjson fallback for driver types it can't encode natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _encode_rows(columns: List[str], rows: List[Tuple]) -> bytes:
+    """Encode a batch of rows as comma-separated JSON objects (no enclosing brackets)"""
+    return orjson.dumps([format_row_data(columns, row) for row in rows], default=_json_default)[1:-1]
+
+
+async def _stream_sql_results(
+    columns: List[str],
+    first_rows: List[Tuple],
+    batches: AsyncIterator[Tuple[List[str], List[Tuple]]]
+) -> AsyncIterator[bytes]:
+    """Stream {"results": [...]} one fetched batch at a time"""
+    row_count = len(first_rows)
+    try:
+        yield b'{"results":['
+        yield _encode_rows(columns, first_rows)
+        async for _, rows in batches:
+            row_count += len(rows)
+            yield b"," + _encode_rows(columns, rows)
+        yield b"]}"
+        logger.info(f"SQL execution successful. Returned {row_count} rows.")
+    except Exception as e:
+        logger.error(f"SQL result streaming failed after {row_count} rows: {str(e)}")
+        raise
+    finally:
+        await batches.aclose()
+
+
 @app.post("/run-sql")
-def run_sql(request: SQLRequest):
+async def run_sql(request: SQLRequest):
     """
     Direct SQL execution endpoint for frontend testing
     
     RETAINED: This endpoint is kept for frontend testing purposes.
     Executes SQL directly against Databricks without AI processing.
+    Rows are fetched in batches on pooled connections and streamed, so
+    memory stays flat however large the result is.
     """
     logger.info(f"Executing SQL query: {request.sql[:100]}...")
     
+    batches = stream_sql_async(
+        request.sql,
+        request.server_hostname,
+        request.http_path,
+        request.access_token,
+        timeout=RUN_SQL_TIMEOUT_SECONDS
+    )
     try:
-        with sql.connect(
-            server_hostname=request.server_hostname,
-            http_path=request.http_path,
-            access_token=request.access_token
-        ) as connection:
-            with connection.cursor() as cursor:
-                cursor.execute(request.sql)
-                columns = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
-                results = [dict(zip(columns, row)) for row in rows]
-        
-        logger.info(f"SQL execution successful. Returned {len(results)} rows.")
-        return {"results": results}
-        
+        # Execute and fetch the first batch up front so failures still map to a 500
+        columns, first_rows = await batches.__anext__()
     except Exception as e:
         logger.error(f"SQL execution failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        _stream_sql_results(columns, first_rows, batches),
+        media_type="application/json"
+    )
 
 
 # ================================
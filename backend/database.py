@@ -6,7 +6,7 @@ SQLAlchemy configuration for the AI SQL generation system.
 Supports both SQLite (development) and PostgreSQL (production).
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
@@ -19,20 +19,50 @@ DATABASE_URL = os.getenv(
     "sqlite:///./ai_de_pair.db"  # Default to SQLite for development
 )
 
+# Statement logging is opt-in; echoing every query is a large per-request cost
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+
+# WAL lets readers proceed during writes; NORMAL sync is durable under WAL
+# and avoids an fsync per commit
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
 # Create engine with appropriate configuration
 if DATABASE_URL.startswith("sqlite"):
     # SQLite configuration for development
+    # StaticPool only for in-memory databases; file databases get a real
+    # pool so WAL readers aren't serialized behind one connection
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-        echo=True  # Enable SQL logging in development
+        poolclass=StaticPool if ":memory:" in DATABASE_URL else None,
+        echo=SQL_ECHO
     )
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
 else:
     # PostgreSQL configuration for production
     engine = create_engine(
         DATABASE_URL,
-        echo=False  # Disable SQL logging in production
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "40")),
+        pool_pre_ping=True,
+        echo=SQL_ECHO
     )
 
 # Create session factory
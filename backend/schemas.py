@@ -6,8 +6,8 @@ Data validation models for the AI SQL generation system.
 Defines the structure for API requests and responses.
 """
 
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Dict, Any, Union
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+from typing import Annotated, Optional, List, Dict, Any, Union
 from datetime import datetime
 from enum import Enum
 import uuid
@@ -40,15 +40,31 @@ class QuestionTypeResponse(str, Enum):
     MULTI_TABLE_DETECTION = "multi_table_detection"
 
 
+# ================================
+# VALIDATORS
+# ================================
+
+def _empty_str_to_none(v: Any) -> Any:
+    """Convert empty strings to None"""
+    if v == '':
+        return None
+    return v
+
+
+# Optional string where '' means "not provided". Attached per field so
+# pydantic only calls back into Python for fields that opt in.
+EmptyStrToNone = Annotated[Optional[str], BeforeValidator(_empty_str_to_none)]
+
+
 # ================================
 # REQUEST SCHEMAS
 # ================================
 
 class CreateSessionRequest(BaseModel):
     """Request to create a new analysis session"""
-    filename: Optional[str] = None
-    user_id: Optional[str] = None
-    ai_provider: str = Field(default="openai", regex="^(openai|claude|local)$")
+    filename: EmptyStrToNone = None
+    user_id: EmptyStrToNone = None
+    ai_provider: str = Field(default="openai", pattern="^(openai|claude|local)$")
     connection_details: Optional[Dict[str, Any]] = None
 
 
@@ -57,7 +73,7 @@ class ExcelUploadRequest(BaseModel):
     session_id: str = Field(..., description="Session ID to associate with upload")
     filename: str = Field(..., min_length=1)
     file_content: bytes = Field(..., description="Base64 encoded Excel file content")
-    additional_context: Optional[str] = None
+    additional_context: EmptyStrToNone = None
 
 
 class UserResponseRequest(BaseModel):
@@ -65,7 +81,7 @@ class UserResponseRequest(BaseModel):
     session_id: str
     interaction_id: str
     response_data: Union[str, List[str], Dict[str, Any]]
-    response_text: Optional[str] = None
+    response_text: EmptyStrToNone = None
     confidence_level: Optional[float] = Field(None, ge=0.0, le=1.0)
 
 
@@ -74,9 +90,9 @@ class SQLGenerationRequest(BaseModel):
     session_id: str
     generation_strategy: str = Field(
         default="single_unified_query",
-        regex="^(single_unified_query|multiple_separate_queries|sequential_pipeline)$"
+        pattern="^(single_unified_query|multiple_separate_queries|sequential_pipeline)$"
     )
-    additional_instructions: Optional[str] = None
+    additional_instructions: EmptyStrToNone = None
 
 
 # ================================
@@ -95,8 +111,7 @@ class SessionResponse(BaseModel):
     updated_at: datetime
     error_message: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ExcelDocumentResponse(BaseModel):
@@ -109,8 +124,7 @@ class ExcelDocumentResponse(BaseModel):
     ai_confidence_score: Optional[float]
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class QuestionOption(BaseModel):
@@ -132,8 +146,7 @@ class AIQuestionResponse(BaseModel):
     sequence_number: Optional[int]
     asked_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AIInteractionResponse(BaseModel):
@@ -148,8 +161,7 @@ class AIInteractionResponse(BaseModel):
     asked_at: datetime
     answered_at: Optional[datetime]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SQLGenerationResponse(BaseModel):
@@ -171,8 +183,7 @@ class SQLGenerationResponse(BaseModel):
     cost_estimate: Optional[float]
     generated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SessionDetailResponse(BaseModel):
@@ -249,21 +260,6 @@ class APIStatusResponse(BaseModel):
     total_sessions: int
 
 
-# ================================
-# VALIDATORS
-# ================================
-
-class BaseSchema(BaseModel):
-    """Base schema with common validators"""
-    
-    @validator('*', pre=True)
-    def empty_str_to_none(cls, v):
-        """Convert empty strings to None"""
-        if v == '':
-            return None
-        return v
-
-
 # ================================
 # ERROR RESPONSE SCHEMAS
 # ================================
@@ -3,7 +3,149 @@ Database utilities for Databricks SQL operations
 """
 from databricks import sql
 import asyncio
-from typing import Tuple, List, Dict, Any
+import hashlib
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Tuple, List, Dict, Any, Optional
+
+# Connection pooling (overridable via environment). Same settings and
+# defaults as app/services/databricks_service.py, so one environment means
+# the same thing to both services: POOL_SIZE idle connections kept per
+# warehouse, MAX_CONCURRENT_CALLS blocking driver calls in flight.
+# (DATABRICKS_MAX_CONNECTIONS_PER_WAREHOUSE only applies to app/.)
+POOL_SIZE = int(os.getenv("DATABRICKS_POOL_SIZE", "4"))
+MAX_POOLS = int(os.getenv("DATABRICKS_MAX_POOLS", "16"))
+MAX_CONCURRENT_CALLS = int(os.getenv("DATABRICKS_MAX_CONCURRENT_CALLS", "8"))
+FETCH_BATCH_SIZE = int(os.getenv("DATABRICKS_FETCH_BATCH_SIZE", "10000"))
+
+# Idle connections keyed by (hostname, http_path, token hash). Reusing one
+# skips the TLS + auth handshake a fresh sql.connect pays on every query.
+# LRU-bounded: the least recently used pool is closed beyond MAX_POOLS.
+_pools: "OrderedDict[Tuple[str, str, str], queue.LifoQueue]" = OrderedDict()
+_pools_lock = threading.Lock()
+
+# Blocking driver calls run on their own executor so long queries can't
+# starve the default one the event loop uses for everything else
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Caps in-flight queries. Created lazily because asyncio primitives are
+# bound to the running event loop.
+_query_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENT_CALLS, thread_name_prefix="databricks"
+        )
+    return _executor
+
+
+def _get_query_slots() -> asyncio.Semaphore:
+    global _query_slots
+    if _query_slots is None:
+        _query_slots = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+    return _query_slots
+
+
+def _get_pool(server_hostname: str, http_path: str, access_token: str) -> queue.LifoQueue:
+    """Idle-connection pool for a warehouse/token combination"""
+    key = (server_hostname, http_path, hashlib.sha256(access_token.encode()).hexdigest())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            _pools.move_to_end(key)
+            return pool
+        
+        pool = _pools[key] = queue.LifoQueue(maxsize=POOL_SIZE)
+        if len(_pools) > MAX_POOLS:
+            _, evicted = _pools.popitem(last=False)
+        else:
+            evicted = None
+    
+    # Connections still checked out of an evicted pool are released into
+    # its orphaned queue; the driver closes them when they're collected
+    if evicted is not None:
+        _drain(evicted)
+    return pool
+
+
+def _acquire(pool: queue.LifoQueue, server_hostname: str, http_path: str, access_token: str):
+    """Check out an idle connection, opening one if none are available (blocking)"""
+    try:
+        return pool.get_nowait()
+    except queue.Empty:
+        return sql.connect(
+            server_hostname=server_hostname,
+            http_path=http_path,
+            access_token=access_token
+        )
+
+
+def _close_quietly(connection) -> None:
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def _release(pool: queue.LifoQueue, connection) -> None:
+    """Return a healthy connection to its pool, closing it if the pool is full"""
+    try:
+        pool.put_nowait(connection)
+    except queue.Full:
+        _close_quietly(connection)
+
+
+def _drain(pool: queue.LifoQueue) -> None:
+    """Close every idle connection in a pool"""
+    while True:
+        try:
+            _close_quietly(pool.get_nowait())
+        except queue.Empty:
+            break
+
+
+def close_connection_pools():
+    """Close every pooled connection and the query executor. Call on application shutdown."""
+    global _executor
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        _drain(pool)
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+async def _run_blocking(func, *args, timeout: float, cursors: List):
+    """
+    Run a blocking driver call on the query executor with a timeout
+    
+    A worker thread can't be interrupted, so on timeout (or cancellation)
+    the statement on the latest cursor in `cursors` is cancelled and the
+    caller waits for the thread to return before re-raising. The query
+    slot and the connection stay held until the driver really lets go.
+    """
+    future = asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        if cursors:
+            try:
+                await asyncio.to_thread(cursors[-1].cancel)
+            except Exception:
+                pass
+        await asyncio.wait({future})
+        if not future.cancelled():
+            # The caller gets the timeout; the cancelled statement's error is expected
+            future.exception()
+        raise
 
 
 async def execute_sql_async(
@@ -30,22 +172,94 @@ async def execute_sql_async(
         asyncio.TimeoutError: If query times out
         Exception: For other SQL execution errors
     """
+    pool = _get_pool(server_hostname, http_path, access_token)
+    cursors = []
+    
     def run_sql_sync():
-        with sql.connect(
-            server_hostname=server_hostname,
-            http_path=http_path,
-            access_token=access_token
-        ) as connection:
+        connection = _acquire(pool, server_hostname, http_path, access_token)
+        try:
             with connection.cursor() as cursor:
+                cursors.append(cursor)
                 cursor.execute(sql_query)
                 columns = [desc[0] for desc in cursor.description]
                 rows = cursor.fetchall()
-                return columns, rows
+        except Exception:
+            # Never hand a possibly broken connection to the next query
+            _close_quietly(connection)
+            raise
+        
+        _release(pool, connection)
+        return columns, rows
+    
+    async with _get_query_slots():
+        return await _run_blocking(run_sql_sync, timeout=timeout, cursors=cursors)
+
+
+async def stream_sql_async(
+    sql_query: str,
+    server_hostname: str,
+    http_path: str,
+    access_token: str,
+    timeout: int = 30,
+    batch_size: int = FETCH_BATCH_SIZE
+) -> AsyncIterator[Tuple[List[str], List[Tuple]]]:
+    """
+    Execute SQL query against Databricks and yield rows in batches
+    
+    Rows are pulled with fetchmany as the caller consumes them, so peak
+    memory is one batch rather than the whole result set. The first batch
+    is always yielded (possibly empty) so errors surface before the caller
+    starts streaming anything.
+    
+    Args:
+        sql_query: SQL query to execute
+        server_hostname: Databricks server hostname
+        http_path: Databricks HTTP path
+        access_token: Databricks access token
+        timeout: Timeout in seconds for the query and for each batch fetch
+        batch_size: Rows per batch
+    
+    Yields:
+        Tuples of (column_names, rows)
+    
+    Raises:
+        asyncio.TimeoutError: If the query or a fetch times out
+        Exception: For other SQL execution errors
+    """
+    pool = _get_pool(server_hostname, http_path, access_token)
+    cursors = []
+    
+    async def run_blocking(func, *args):
+        return await _run_blocking(func, *args, timeout=timeout, cursors=cursors)
+    
+    def execute(connection):
+        cursor = connection.cursor()
+        cursors.append(cursor)
+        cursor.execute(sql_query)
+        return cursor
     
-    return await asyncio.wait_for(
-        asyncio.get_event_loop().run_in_executor(None, run_sql_sync),
-        timeout=timeout
-    )
+    async with _get_query_slots():
+        connection = await run_blocking(_acquire, pool, server_hostname, http_path, access_token)
+        try:
+            cursor = await run_blocking(execute, connection)
+            columns = [desc[0] for desc in cursor.description]
+            
+            rows = await run_blocking(cursor.fetchmany, batch_size)
+            yield columns, rows
+            while rows:
+                rows = await run_blocking(cursor.fetchmany, batch_size)
+                if rows:
+                    yield columns, rows
+        except BaseException:
+            # Includes timeouts and consumers closing the generator early.
+            # run_blocking has already waited out any in-flight driver call,
+            # so nothing else is using the connection; never reuse it
+            # half-read.
+            _close_quietly(connection)
+            raise
+        
+        cursor.close()
+        _release(pool, connection)
 
 
 def validate_connection_params(
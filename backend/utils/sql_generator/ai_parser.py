@@ -1,11 +1,183 @@
 """
 AI-powered input parser using raw HTTP requests to LLM APIs
 """
-import json
+import os
+import re
+import logging
+import time
+import random
 import asyncio
+import hashlib
 import aiohttp
-from typing import Dict, Any, Optional
+import orjson
+from datetime import datetime
+from typing import Dict, Any, Awaitable, Callable, Hashable, List, Optional, Tuple
 from dataclasses import dataclass
+from ..token_utils import truncate_middle
+
+try:
+    import diskcache
+except ImportError:  # Response cache is optional; parses just always hit the API
+    diskcache = None
+
+logger = logging.getLogger(__name__)
+
+# Request batching (overridable via environment)
+BATCH_TIMEOUT_MS = int(os.getenv("AI_BATCH_TIMEOUT_MS", "20"))
+BATCH_MAX_SIZE = int(os.getenv("AI_BATCH_MAX_SIZE", "8"))
+
+# Content-addressed response cache (overridable via environment)
+PARSE_CACHE_DIR = os.getenv("AI_PARSE_CACHE_DIR", "/tmp/ai_parse_cache")
+PARSE_CACHE_TTL_SECONDS = int(os.getenv("AI_PARSE_CACHE_TTL_SECONDS", "3600"))
+PARSE_CACHE_SIZE_LIMIT_MB = int(os.getenv("AI_PARSE_CACHE_SIZE_LIMIT_MB", "256"))
+
+# Shared HTTP connection pool (overridable via environment)
+HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "64"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("AI_HTTP_KEEPALIVE_SECONDS", "60"))
+
+# Retries and rate limiting (overridable via environment)
+RETRY_MAX_ATTEMPTS = int(os.getenv("AI_RETRY_MAX_ATTEMPTS", "5"))
+RETRY_INITIAL_SECONDS = float(os.getenv("AI_RETRY_INITIAL_SECONDS", "1"))
+RETRY_MAX_SECONDS = float(os.getenv("AI_RETRY_MAX_SECONDS", "30"))
+RATE_LIMIT_MIN_REMAINING = int(os.getenv("AI_RATE_LIMIT_MIN_REMAINING", "1"))
+
+# Batch API polling (overridable via environment)
+BATCH_POLL_INITIAL_SECONDS = float(os.getenv("AI_BATCH_POLL_INITIAL_SECONDS", "10"))
+BATCH_POLL_MAX_SECONDS = float(os.getenv("AI_BATCH_POLL_MAX_SECONDS", "300"))
+
+# One keep-alive session per process so calls reuse open TLS connections
+# instead of paying a fresh handshake each time. Created lazily because
+# aiohttp sessions are bound to the running event loop.
+_http_session: Optional[aiohttp.ClientSession] = None
+_http_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_http_session() -> aiohttp.ClientSession:
+    global _http_session, _http_session_loop
+    loop = asyncio.get_running_loop()
+    if _http_session is None or _http_session.closed or _http_session_loop is not loop:
+        _http_session_loop = loop
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=HTTP_MAX_CONNECTIONS,
+                keepalive_timeout=HTTP_KEEPALIVE_SECONDS
+            )
+        )
+    return _http_session
+
+
+async def close_http_session():
+    """Close the shared HTTP session. Call on application shutdown."""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
+class AIAPIError(Exception):
+    """Non-200 response from an AI provider"""
+    
+    def __init__(self, message: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+    
+    @property
+    def retryable(self) -> bool:
+        """Rate limits and server-side failures are worth another attempt"""
+        return self.status == 429 or self.status >= 500
+
+
+# "20ms", "1.5s", "6m0s" (OpenAI reset headers)
+_DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_reset_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds until a rate limit resets, from a duration, an RFC 3339 time or plain seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART_RE.findall(value)
+    if parts:
+        return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(0.0, reset_at.timestamp() - time.time())
+
+
+class RateLimitGate:
+    """
+    Holds requests back once a provider reports its quota is used up.
+    
+    Every response updates the gate from the provider's rate limit
+    headers, so the next call waits for the reset window instead of
+    being sent just to come back as a 429.
+    """
+    
+    def __init__(self, remaining_header: str, reset_header: str):
+        self.remaining_header = remaining_header
+        self.reset_header = reset_header
+        self._resume_at = 0.0
+    
+    def defer(self, seconds: float):
+        """Hold new requests for at least the given time"""
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+    
+    def update(self, headers) -> Optional[float]:
+        """Record a response's headers; returns its retry-after delay, if any"""
+        retry_after = _parse_reset_seconds(headers.get("retry-after"))
+        if retry_after is not None:
+            self.defer(retry_after)
+        
+        remaining = headers.get(self.remaining_header)
+        if remaining is not None and remaining.isdigit() and int(remaining) < RATE_LIMIT_MIN_REMAINING:
+            reset = _parse_reset_seconds(headers.get(self.reset_header))
+            if reset:
+                self.defer(reset)
+        return retry_after
+    
+    async def wait(self):
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Shared by all parsers in the process, one per provider
+_rate_limits = {
+    "openai": RateLimitGate("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+    "claude": RateLimitGate("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset"),
+}
+
+
+async def _with_retries(provider: str, call: Callable[[], Awaitable[str]]) -> str:
+    """
+    Run an AI call, retrying rate limits, 5xx responses and connection
+    failures with jittered exponential backoff
+    """
+    gate = _rate_limits[provider]
+    for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
+        await gate.wait()
+        try:
+            return await call()
+        except AIAPIError as e:
+            if not e.retryable or attempt == RETRY_MAX_ATTEMPTS:
+                raise
+            retry_after = e.retry_after
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == RETRY_MAX_ATTEMPTS:
+                raise
+            retry_after = None
+        
+        # A retry-after from the provider already holds the gate
+        if retry_after is None:
+            backoff = min(RETRY_MAX_SECONDS, RETRY_INITIAL_SECONDS * 2 ** (attempt - 1))
+            await asyncio.sleep(backoff + random.uniform(0, RETRY_INITIAL_SECONDS))
 
 
 @dataclass
@@ -20,59 +192,104 @@ class ParsedMapping:
     metadata: dict
 
 
-class AIInputParser:
+# Raw AI responses keyed by SHA-256 of (provider, system prompt, prompt). On disk so
+# every worker process shares it and it survives restarts.
+_parse_cache = None
+
+
+def _get_parse_cache():
+    global _parse_cache
+    if _parse_cache is None and diskcache is not None:
+        _parse_cache = diskcache.Cache(
+            PARSE_CACHE_DIR, size_limit=PARSE_CACHE_SIZE_LIMIT_MB * 1024 * 1024
+        )
+    return _parse_cache
+
+
+def _parse_cache_key(provider: str, prompt: str) -> str:
+    """Only the hash is stored as the key, never the prompt itself"""
+    return hashlib.sha256(f"{provider}\0{PARSING_SYSTEM_PROMPT}\0{prompt}".encode()).hexdigest()
+
+
+class AsyncBatcher:
     """
-    AI-powered parser that can handle any input format and extract
-    structured mapping information for SQL generation
+    Coalesces AI calls that arrive within a short window.
+    
+    Calls wait at most BATCH_TIMEOUT_MS (or until BATCH_MAX_SIZE are
+    queued). Identical requests in a batch share a single API call and
+    the distinct ones are sent concurrently.
     """
     
-    def __init__(self, api_key: str, provider: str = "openai"):
-        self.api_key = api_key
-        self.provider = provider.lower()
-        
-        # API endpoints
-        self.endpoints = {
-            "openai": "https://api.openai.com/v1/chat/completions",
-            "claude": "https://api.anthropic.com/v1/messages"
-        }
+    def __init__(self, timeout_ms: int = BATCH_TIMEOUT_MS, max_batch: int = BATCH_MAX_SIZE):
+        self.timeout = timeout_ms / 1000
+        self.max_batch = max_batch
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._dispatching = set()
     
-    async def parse_input(self, raw_input: Any) -> ParsedMapping:
-        """
-        Main method to parse any input using AI
-        
-        Args:
-            raw_input: Any format input (dict, string, mixed)
-        
-        Returns:
-            ParsedMapping: Normalized structure
-        """
-        # Convert input to string for AI processing
-        input_text = self._prepare_input(raw_input)
+    async def submit(self, key: Hashable, call: Callable[[], Awaitable[str]]) -> str:
+        """Queue a call; requests with equal keys are answered by one call"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # (Re)start the worker on the current event loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
         
-        # Generate AI prompt
-        prompt = self._create_parsing_prompt(input_text)
-        
-        # Call AI API
-        ai_response = await self._call_ai_api(prompt)
-        
-        # Parse AI response into structured format
-        parsed_mapping = self._parse_ai_response(ai_response)
-        
-        return parsed_mapping
+        future = loop.create_future()
+        await self._queue.put((key, call, future))
+        return await future
     
-    def _prepare_input(self, raw_input: Any) -> str:
-        """Convert any input format to string for AI processing"""
-        if isinstance(raw_input, str):
-            return raw_input
-        elif isinstance(raw_input, dict):
-            return json.dumps(raw_input, indent=2)
-        else:
-            return str(raw_input)
+    async def _run(self):
+        """Collect batches and hand each one off without waiting for it"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.timeout
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            task = loop.create_task(self._dispatch(batch))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
     
-    def _create_parsing_prompt(self, input_text: str) -> str:
-        """Create comprehensive prompt for AI to extract mapping information from Excel content"""
-        return f"""
-You are a SQL expert analyzing mapping information extracted from an Excel file with multiple sheets.
+    @staticmethod
+    async def _dispatch(batch: List[Tuple[Hashable, Callable[[], Awaitable[str]], asyncio.Future]]):
+        """Send one call per distinct key and fan the results back out"""
+        groups: Dict[Hashable, Tuple[Callable[[], Awaitable[str]], List[asyncio.Future]]] = {}
+        for key, call, future in batch:
+            groups.setdefault(key, (call, []))[1].append(future)
+        
+        results = await asyncio.gather(
+            *(call() for call, _ in groups.values()),
+            return_exceptions=True
+        )
+        
+        for (_, futures), result in zip(groups.values(), results):
+            for future in futures:
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+# Shared by all parsers in the process
+_batcher = AsyncBatcher()
+
+
+# Static instructions sent as the system message. Keeping them identical
+# and ahead of the per-upload content lets the provider's prompt cache
+# reuse the prefix instead of billing it as fresh input on every call.
+PARSING_SYSTEM_PROMPT = """You are a SQL expert analyzing mapping information extracted from an Excel file with multiple sheets.
 
 The Excel file contains vague, unstructured information about how to construct SQL queries. This could include:
 - Table names and column mappings
@@ -82,66 +299,66 @@ The Excel file contains vague, unstructured information about how to construct S
 - Connection details scattered across sheets
 
 Extract and return ONLY a valid JSON object with this exact structure:
-{{
+{
     "tables": [
-        {{
+        {
             "name": "table_name",
             "alias": "optional_alias", 
             "schema": "optional_schema",
             "columns": ["col1", "col2"],
             "description": "what this table represents"
-        }}
+        }
     ],
     "relationships": [
-        {{
+        {
             "left_table": "table1",
             "right_table": "table2", 
             "join_type": "INNER|LEFT|RIGHT|FULL",
             "join_condition": "table1.id = table2.table1_id",
             "description": "natural language description from Excel"
-        }}
+        }
     ],
     "output_columns": [
-        {{
+        {
             "table": "table_name",
             "column": "column_name",
             "alias": "optional_alias",
             "aggregation": "SUM|COUNT|AVG|etc or null",
             "transformation": "any business logic mentioned"
-        }}
+        }
     ],
     "filters": [
-        {{
+        {
             "table": "table_name",
             "column": "column_name", 
             "operator": "=|>|<|LIKE|IN|etc",
             "value": "filter_value",
             "condition": "WHERE|HAVING",
             "description": "business rule from Excel"
-        }}
+        }
     ],
     "business_logic": [
-        {{
+        {
             "rule": "description of business rule",
             "implementation": "how to implement in SQL",
             "applies_to": "table or column this affects"
-        }}
+        }
     ],
-    "connection_details": {{
+    "connection_details": {
         "server_hostname": "extracted or null",
         "http_path": "extracted or null", 
         "access_token": "extracted or null",
         "database": "default database if mentioned",
         "catalog": "catalog name if mentioned"
-    }},
-    "metadata": {{
+    },
+    "metadata": {
         "description": "what this mapping accomplishes",
         "complexity": "SIMPLE|MEDIUM|COMPLEX",
         "estimated_tables": 0,
         "business_domain": "finance|sales|hr|etc if identifiable",
         "sheets_analyzed": ["list of sheet names that contained useful info"]
-    }}
-}}
+    }
+}
 
 IMPORTANT INSTRUCTIONS:
 - Excel content is often vague and incomplete - infer reasonable defaults
@@ -152,8 +369,249 @@ IMPORTANT INSTRUCTIONS:
 - If information is missing, use null or empty arrays but explain in metadata
 - Pay attention to sheet names as they often indicate content type
 - Business rules might be scattered - consolidate them logically
+"""
 
-EXCEL CONTENT TO ANALYZE:
+
+class AIInputParser:
+    """
+    AI-powered parser that can handle any input format and extract
+    structured mapping information for SQL generation
+    """
+    
+    def __init__(self, api_key: str, provider: str = "openai"):
+        self.api_key = api_key
+        self.provider = provider.lower()
+        
+        # API endpoints
+        self.endpoints = {
+            "openai": "https://api.openai.com/v1/chat/completions",
+            "claude": "https://api.anthropic.com/v1/messages"
+        }
+        
+        # Batch API endpoints (asynchronous, half price, results within 24h)
+        self.batch_endpoints = {
+            "openai_files": "https://api.openai.com/v1/files",
+            "openai": "https://api.openai.com/v1/batches",
+            "claude": "https://api.anthropic.com/v1/messages/batches"
+        }
+    
+    async def parse_input(self, raw_input: Any, bulk: bool = False) -> ParsedMapping:
+        """
+        Main method to parse any input using AI
+        
+        Args:
+            raw_input: Any format input (dict, string, mixed)
+            bulk: Send through the provider's Batch API (cheaper, but may
+                take minutes to hours); for non-interactive parses only
+        
+        Returns:
+            ParsedMapping: Normalized structure
+        """
+        if bulk:
+            return (await self.parse_input_batch([raw_input]))[0]
+        
+        # Convert input to string for AI processing, capped to the token budget
+        input_text = truncate_middle(self._prepare_input(raw_input))
+        
+        # Generate AI prompt
+        prompt = self._create_parsing_prompt(input_text)
+        
+        # Identical uploads reuse the earlier AI response
+        cache = _get_parse_cache()
+        cache_key = _parse_cache_key(self.provider, prompt)
+        if cache is not None:
+            cached_response = await asyncio.to_thread(cache.get, cache_key)
+            if cached_response is not None:
+                return self._parse_ai_response(cached_response)
+        
+        # Call AI API
+        ai_response = await self._call_ai_api(prompt)
+        
+        # Parse AI response into structured format
+        parsed_mapping = self._parse_ai_response(ai_response)
+        
+        # Only cache responses that parsed cleanly
+        if cache is not None:
+            await asyncio.to_thread(cache.set, cache_key, ai_response, PARSE_CACHE_TTL_SECONDS)
+        
+        return parsed_mapping
+    
+    async def parse_input_batch(self, raw_inputs: List[Any]) -> List[ParsedMapping]:
+        """
+        Parse many inputs through the provider's Batch API
+        
+        Meant for bulk, non-interactive work (e.g. seeding mappings
+        overnight): batch requests cost half as much but can take up to
+        24 hours, so this polls until the batch finishes.
+        
+        Args:
+            raw_inputs: Inputs in any format accepted by parse_input
+        
+        Returns:
+            One ParsedMapping per input, in input order
+        
+        Raises:
+            Exception: If the batch fails or any input gets no usable response.
+                Responses that did parse are cached first, so a retry only
+                resubmits the failures.
+        """
+        prompts = [self._create_parsing_prompt(truncate_middle(self._prepare_input(raw))) for raw in raw_inputs]
+        cache = _get_parse_cache()
+        cache_keys = [_parse_cache_key(self.provider, prompt) for prompt in prompts]
+        
+        responses: List[Optional[str]] = [None] * len(prompts)
+        if cache is not None:
+            for i, cache_key in enumerate(cache_keys):
+                responses[i] = await asyncio.to_thread(cache.get, cache_key)
+        
+        # custom_id is the input position; identical prompts go in once
+        pending: Dict[str, str] = {}
+        seen = set()
+        for i, (prompt, response) in enumerate(zip(prompts, responses)):
+            if response is None and prompt not in seen:
+                seen.add(prompt)
+                pending[str(i)] = prompt
+        
+        if pending:
+            if self.provider == "openai":
+                results = await self._run_openai_batch(pending)
+            elif self.provider == "claude":
+                results = await self._run_claude_batch(pending)
+            else:
+                raise ValueError(f"Unsupported AI provider: {self.provider}")
+            
+            by_prompt = {pending[custom_id]: text for custom_id, text in results.items()}
+            responses = [
+                response if response is not None else by_prompt.get(prompt)
+                for prompt, response in zip(prompts, responses)
+            ]
+        
+        parsed, failed = [], []
+        for i, response in enumerate(responses):
+            if response is None:
+                failed.append(i)
+                continue
+            try:
+                parsed.append(self._parse_ai_response(response))
+            except Exception:
+                failed.append(i)
+                continue
+            if cache is not None:
+                await asyncio.to_thread(cache.set, cache_keys[i], response, PARSE_CACHE_TTL_SECONDS)
+        
+        if failed:
+            raise Exception(f"Batch parse failed for inputs {failed}")
+        return parsed
+    
+    async def _run_openai_batch(self, prompts: Dict[str, str]) -> Dict[str, str]:
+        """Submit prompts as an OpenAI batch; returns response text by custom_id"""
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        
+        lines = b"\n".join(
+            orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._openai_payload(prompt)
+            })
+            for custom_id, prompt in prompts.items()
+        )
+        form = aiohttp.FormData()
+        form.add_field("purpose", "batch")
+        form.add_field("file", lines, filename="batch.jsonl", content_type="application/jsonl")
+        upload = await self._request_json("POST", self.batch_endpoints["openai_files"], headers, data=form)
+        
+        batch = await self._request_json("POST", self.batch_endpoints["openai"], headers, json={
+            "input_file_id": upload["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h"
+        })
+        batch = await self._poll_batch(
+            f"{self.batch_endpoints['openai']}/{batch['id']}", headers,
+            lambda b: b["status"] in ("completed", "failed", "expired", "cancelled")
+        )
+        if not batch.get("output_file_id"):
+            raise Exception(f"OpenAI batch {batch['id']} ended with status {batch['status']}")
+        
+        output = await self._request_text(
+            "GET", f"{self.batch_endpoints['openai_files']}/{batch['output_file_id']}/content", headers
+        )
+        results = {}
+        for line in output.splitlines():
+            if not line:
+                continue
+            item = orjson.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") == 200:
+                results[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return results
+    
+    async def _run_claude_batch(self, prompts: Dict[str, str]) -> Dict[str, str]:
+        """Submit prompts as a Message Batch; returns response text by custom_id"""
+        headers = self._claude_headers()
+        
+        batch = await self._request_json("POST", self.batch_endpoints["claude"], headers, json={
+            "requests": [
+                {"custom_id": custom_id, "params": self._claude_payload(prompt)}
+                for custom_id, prompt in prompts.items()
+            ]
+        })
+        batch = await self._poll_batch(
+            f"{self.batch_endpoints['claude']}/{batch['id']}", headers,
+            lambda b: b["processing_status"] == "ended"
+        )
+        
+        output = await self._request_text("GET", batch["results_url"], headers)
+        results = {}
+        for line in output.splitlines():
+            if not line:
+                continue
+            item = orjson.loads(line)
+            result = item.get("result") or {}
+            if result.get("type") == "succeeded":
+                results[item["custom_id"]] = result["message"]["content"][0]["text"]
+        return results
+    
+    async def _poll_batch(self, url: str, headers: Dict[str, str], is_done: Callable[[Dict], bool]) -> Dict:
+        """Poll a batch with exponential backoff until is_done says it has finished"""
+        delay = BATCH_POLL_INITIAL_SECONDS
+        while True:
+            batch = await self._request_json("GET", url, headers)
+            if is_done(batch):
+                return batch
+            await asyncio.sleep(delay)
+            delay = min(BATCH_POLL_MAX_SECONDS, delay * 2)
+    
+    async def _request_json(self, method: str, url: str, headers: Dict[str, str], **kwargs) -> Dict:
+        return orjson.loads(await self._request_text(method, url, headers, **kwargs))
+    
+    async def _request_text(self, method: str, url: str, headers: Dict[str, str], **kwargs) -> str:
+        """Batch API request, retried like the interactive calls"""
+        async def send() -> str:
+            async with _get_http_session().request(method, url, headers=headers, **kwargs) as response:
+                retry_after = _rate_limits[self.provider].update(response.headers)
+                text = await response.text()
+                if response.status >= 300:
+                    raise AIAPIError(f"{self.provider} batch API error: {response.status} - {text}", response.status, retry_after)
+                return text
+        
+        return await _with_retries(self.provider, send)
+    
+    def _prepare_input(self, raw_input: Any) -> str:
+        """Convert any input format to string for AI processing"""
+        if isinstance(raw_input, str):
+            return raw_input
+        elif isinstance(raw_input, dict):
+            return orjson.dumps(raw_input, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+        else:
+            return str(raw_input)
+    
+    def _create_parsing_prompt(self, input_text: str) -> str:
+        """
+        Create the per-call user message; the static instructions live in
+        PARSING_SYSTEM_PROMPT
+        """
+        return f"""EXCEL CONTENT TO ANALYZE:
 {input_text}
 
 Return only the JSON object, no other text:
@@ -169,62 +627,104 @@ Return only the JSON object, no other text:
             raise ValueError(f"Unsupported AI provider: {self.provider}")
     
     async def _call_openai(self, prompt: str) -> str:
-        """Call OpenAI API using raw HTTP request"""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
+        """Call OpenAI API, batched with concurrent identical requests"""
+        return await _batcher.submit(
+            ("openai", self.api_key, prompt),
+            lambda: _with_retries("openai", lambda: self._post_openai(prompt))
+        )
+    
+    @staticmethod
+    def _openai_payload(prompt: str) -> Dict[str, Any]:
+        """Chat completion request body, shared by direct and batch calls"""
+        return {
             "model": "gpt-4",
             "messages": [
+                {"role": "system", "content": PARSING_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             "temperature": 0.1,
             "max_tokens": 2000
         }
+    
+    async def _post_openai(self, prompt: str) -> str:
+        """Call OpenAI API using raw HTTP request"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.endpoints["openai"], 
-                headers=headers, 
-                json=payload
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result["choices"][0]["message"]["content"]
-                else:
-                    error_text = await response.text()
-                    raise Exception(f"OpenAI API error: {response.status} - {error_text}")
+        async with _get_http_session().post(
+            self.endpoints["openai"], 
+            headers=headers, 
+            json=self._openai_payload(prompt)
+        ) as response:
+            retry_after = _rate_limits["openai"].update(response.headers)
+            if response.status == 200:
+                result = await response.json(loads=orjson.loads)
+                usage = result.get("usage") or {}
+                logger.debug(
+                    "OpenAI prompt cache: %s of %s prompt tokens cached",
+                    (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+                    usage.get("prompt_tokens")
+                )
+                return result["choices"][0]["message"]["content"]
+            else:
+                error_text = await response.text()
+                raise AIAPIError(f"OpenAI API error: {response.status} - {error_text}", response.status, retry_after)
     
     async def _call_claude(self, prompt: str) -> str:
-        """Call Claude API using raw HTTP request"""
-        headers = {
+        """Call Claude API, batched with concurrent identical requests"""
+        return await _batcher.submit(
+            ("claude", self.api_key, prompt),
+            lambda: _with_retries("claude", lambda: self._post_claude(prompt))
+        )
+    
+    def _claude_headers(self) -> Dict[str, str]:
+        return {
             "x-api-key": self.api_key,
             "Content-Type": "application/json",
             "anthropic-version": "2023-06-01"
         }
-        
-        payload = {
+    
+    @staticmethod
+    def _claude_payload(prompt: str) -> Dict[str, Any]:
+        """Messages request body, shared by direct and batch calls"""
+        return {
             "model": "claude-3-sonnet-20240229",
             "max_tokens": 2000,
+            "system": [
+                {
+                    "type": "text",
+                    "text": PARSING_SYSTEM_PROMPT,
+                    "cache_control": {"type": "ephemeral"}
+                }
+            ],
             "messages": [
                 {"role": "user", "content": prompt}
             ]
         }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.endpoints["claude"], 
-                headers=headers, 
-                json=payload
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result["content"][0]["text"]
-                else:
-                    error_text = await response.text()
-                    raise Exception(f"Claude API error: {response.status} - {error_text}")
+    
+    async def _post_claude(self, prompt: str) -> str:
+        """Call Claude API using raw HTTP request"""
+        async with _get_http_session().post(
+            self.endpoints["claude"], 
+            headers=self._claude_headers(), 
+            json=self._claude_payload(prompt)
+        ) as response:
+            retry_after = _rate_limits["claude"].update(response.headers)
+            if response.status == 200:
+                result = await response.json(loads=orjson.loads)
+                usage = result.get("usage") or {}
+                logger.debug(
+                    "Claude prompt cache: %s tokens read, %s written, %s uncached",
+                    usage.get("cache_read_input_tokens", 0),
+                    usage.get("cache_creation_input_tokens", 0),
+                    usage.get("input_tokens")
+                )
+                return result["content"][0]["text"]
+            else:
+                error_text = await response.text()
+                raise AIAPIError(f"Claude API error: {response.status} - {error_text}", response.status, retry_after)
     
     def _parse_ai_response(self, ai_response: str) -> ParsedMapping:
         """Parse AI response JSON into ParsedMapping object"""
@@ -236,7 +736,7 @@ Return only the JSON object, no other text:
             elif cleaned_response.startswith("```"):
                 cleaned_response = cleaned_response[3:-3]
             
-            parsed_data = json.loads(cleaned_response)
+            parsed_data = orjson.loads(cleaned_response)
             
             return ParsedMapping(
                 tables=parsed_data.get("tables", []),
@@ -247,7 +747,7 @@ Return only the JSON object, no other text:
                 connection_details=parsed_data.get("connection_details", {}),
                 metadata=parsed_data.get("metadata", {})
             )
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise Exception(f"Failed to parse AI response as JSON: {e}")
         except Exception as e:
             raise Exception(f"Error processing AI response: {e}")
@@ -1,8 +1,23 @@
 """
 Excel data processor for handling parsed Excel content from frontend
 """
-from typing import Dict, List, Any
+import io
+from itertools import chain, zip_longest
+from typing import Dict, List, Any, Optional
+import orjson
 from utils.models import ExcelSheetData, ExcelMappingRequest
+from utils.token_utils import INPUT_TOKEN_BUDGET, count_tokens, truncate_lines
+
+
+def _stringify_rows(rows: List[List[Any]]) -> List[List[Optional[str]]]:
+    """
+    Stripped string form of every cell, None for empty or blank ones
+    
+    Computed once per sheet; the analysis helpers below work on this view
+    so no cell goes through str()/strip() more than once. Blanks stay as
+    None placeholders so column positions are preserved.
+    """
+    return [[None if cell is None else str(cell).strip() or None for cell in row] for row in rows]
 
 
 class ExcelDataProcessor:
@@ -14,115 +29,117 @@ class ExcelDataProcessor:
     def __init__(self):
         self.processed_data = {}
     
-    def process_excel_request(self, excel_request: ExcelMappingRequest) -> str:
+    def process_excel_request(
+        self,
+        excel_request: ExcelMappingRequest,
+        token_budget: int = INPUT_TOKEN_BUDGET
+    ) -> str:
         """
         Convert Excel request data into a comprehensive text representation for AI
         
         Args:
             excel_request: Parsed Excel data from frontend
+            token_budget: Approximate token cap for the whole document. Sheets
+                over budget are trimmed by whole rows, each in proportion to
+                its size.
             
         Returns:
             Consolidated text representation for AI processing
         """
-        text_parts = [
-            "EXCEL MAPPING DOCUMENT ANALYSIS",
-            "=" * 50,
-            ""
-        ]
+        buf = io.StringIO()
+        buf.write("EXCEL MAPPING DOCUMENT ANALYSIS\n")
+        buf.write("=" * 50)
+        buf.write("\n\n")
         
         # Add metadata
         if excel_request.filename:
-            text_parts.append(f"FILENAME: {excel_request.filename}")
+            buf.write(f"FILENAME: {excel_request.filename}\n")
         
-        text_parts.extend([
-            f"TOTAL SHEETS: {len(excel_request.sheets)}",
-            f"SHEET NAMES: {', '.join([sheet.name for sheet in excel_request.sheets])}",
-            ""
-        ])
+        buf.write(f"TOTAL SHEETS: {len(excel_request.sheets)}\n")
+        buf.write(f"SHEET NAMES: {', '.join(sheet.name for sheet in excel_request.sheets)}\n\n")
         
         # Add additional context if provided
         if excel_request.additional_context:
-            text_parts.extend([
-                "USER PROVIDED CONTEXT:",
-                excel_request.additional_context,
-                ""
-            ])
-        
-        # Process each sheet
-        for sheet in excel_request.sheets:
-            sheet_text = self._process_sheet(sheet)
-            text_parts.extend([
-                f"{'='*20} SHEET: {sheet.name} {'='*20}",
-                sheet_text,
-                "",
-                "-" * 50,
-                ""
-            ])
-        
-        return "\n".join(text_parts)
+            buf.write("USER PROVIDED CONTEXT:\n")
+            buf.write(excel_request.additional_context)
+            buf.write("\n\n")
+        
+        # Process each sheet, trimming to what's left of the budget
+        sheet_texts = [self._render_sheet(sheet) for sheet in excel_request.sheets]
+        sheet_tokens = [count_tokens(text) for text in sheet_texts]
+        total_tokens = sum(sheet_tokens)
+        sheet_budget = max(0, token_budget - count_tokens(buf.getvalue()))
+        if total_tokens > sheet_budget:
+            sheet_texts = [
+                truncate_lines(text, sheet_budget * tokens // total_tokens)
+                for text, tokens in zip(sheet_texts, sheet_tokens)
+            ]
+        
+        for sheet, sheet_text in zip(excel_request.sheets, sheet_texts):
+            buf.write(f"{'='*20} SHEET: {sheet.name} {'='*20}\n")
+            buf.write(sheet_text)
+            buf.write("\n")
+            buf.write("-" * 50)
+            buf.write("\n\n")
+        
+        return buf.getvalue()
+    
+    def _render_sheet(self, sheet: ExcelSheetData) -> str:
+        """Text representation of a single sheet"""
+        buf = io.StringIO()
+        self._write_sheet(buf, sheet)
+        return buf.getvalue()
     
-    def _process_sheet(self, sheet: ExcelSheetData) -> str:
-        """Process a single sheet into text representation"""
-        text_parts = [
-            f"SHEET NAME: {sheet.name}",
-            f"TOTAL ROWS: {len(sheet.rows)}",
-            ""
-        ]
+    def _write_sheet(self, buf: io.StringIO, sheet: ExcelSheetData) -> None:
+        """Write the text representation of a single sheet to buf"""
+        buf.write(f"SHEET NAME: {sheet.name}\n")
+        buf.write(f"TOTAL ROWS: {len(sheet.rows)}\n\n")
         
         # Add headers if available
         if sheet.headers:
-            text_parts.extend([
-                "IDENTIFIED HEADERS:",
-                " | ".join(sheet.headers),
-                ""
-            ])
+            buf.write("IDENTIFIED HEADERS:\n")
+            buf.write(" | ".join(sheet.headers))
+            buf.write("\n\n")
         
         # Add metadata if available
         if sheet.metadata:
-            text_parts.extend([
-                "SHEET METADATA:",
-                str(sheet.metadata),
-                ""
-            ])
+            buf.write("SHEET METADATA:\n")
+            buf.write(orjson.dumps(sheet.metadata, default=str, option=orjson.OPT_NON_STR_KEYS).decode())
+            buf.write("\n\n")
         
         # Process rows and identify patterns
         if sheet.rows:
-            text_parts.append("ROW DATA:")
+            rows = _stringify_rows(sheet.rows)
+            buf.write("ROW DATA:\n")
             
             # Show first few rows for context
-            for i, row in enumerate(sheet.rows[:10]):  # Limit to first 10 rows
-                # Convert row to strings and filter empty cells
-                row_data = [str(cell) for cell in row if cell is not None and str(cell).strip()]
+            for i, row in enumerate(rows[:10]):  # Limit to first 10 rows
+                # Filter empty cells
+                row_data = list(filter(None, row))
                 if row_data:  # Only show rows with actual data
-                    text_parts.append(f"  Row {i+1}: {' | '.join(row_data)}")
+                    buf.write(f"  Row {i+1}: {' | '.join(row_data)}\n")
             
             if len(sheet.rows) > 10:
-                text_parts.append(f"  ... and {len(sheet.rows) - 10} more rows")
+                buf.write(f"  ... and {len(sheet.rows) - 10} more rows\n")
             
-            text_parts.append("")
+            buf.write("\n")
             
             # Identify potential table structures
-            table_analysis = self._analyze_table_structure(sheet.rows)
+            table_analysis = self._analyze_table_structure(rows)
             if table_analysis:
-                text_parts.extend([
-                    "TABLE STRUCTURE ANALYSIS:",
-                    table_analysis,
-                    ""
-                ])
+                buf.write("TABLE STRUCTURE ANALYSIS:\n")
+                buf.write(table_analysis)
+                buf.write("\n\n")
             
             # Extract all unique text values for AI context
-            all_text = self._extract_all_text(sheet.rows)
+            all_text = self._extract_all_text(rows)
             if all_text:
-                text_parts.extend([
-                    "ALL UNIQUE TEXT VALUES:",
-                    ", ".join(all_text[:50]),  # Limit to first 50 unique values
-                    ""
-                ])
-        
-        return "\n".join(text_parts)
+                buf.write("ALL UNIQUE TEXT VALUES:\n")
+                buf.write(", ".join(all_text[:50]))  # Limit to first 50 unique values
+                buf.write("\n\n")
     
-    def _analyze_table_structure(self, rows: List[List[Any]]) -> str:
-        """Analyze the structure of rows to identify potential tables"""
+    def _analyze_table_structure(self, rows: List[List[Optional[str]]]) -> str:
+        """Analyze the structure of stringified rows to identify potential tables"""
         if not rows:
             return ""
         
@@ -130,18 +147,14 @@ class ExcelDataProcessor:
         
         # Check for header rows (first row with text, subsequent rows with data)
         if len(rows) > 1:
-            first_row = [str(cell) for cell in rows[0] if cell is not None]
-            if first_row and all(isinstance(cell, str) for cell in first_row if cell):
+            first_row = list(filter(None, rows[0]))
+            if first_row:
                 analysis_parts.append(f"Potential header row detected: {' | '.join(first_row)}")
         
-        # Count columns with data
-        max_cols = max(len(row) for row in rows) if rows else 0
-        col_data_count = [0] * max_cols
-        
-        for row in rows:
-            for i, cell in enumerate(row):
-                if i < max_cols and cell is not None and str(cell).strip():
-                    col_data_count[i] += 1
+        # Count columns with data: transpose once, then count non-blank
+        # cells per column
+        max_cols = max(map(len, rows), default=0)
+        col_data_count = [sum(map(bool, column)) for column in zip_longest(*rows)]
         
         active_columns = [i for i, count in enumerate(col_data_count) if count > 0]
         if active_columns:
@@ -150,16 +163,12 @@ class ExcelDataProcessor:
         
         return "\n".join(analysis_parts)
     
-    def _extract_all_text(self, rows: List[List[Any]]) -> List[str]:
-        """Extract all unique text values from rows"""
-        all_text = set()
+    def _extract_all_text(self, rows: List[List[Optional[str]]]) -> List[str]:
+        """Extract all unique text values from stringified rows"""
+        all_text = set(filter(None, chain.from_iterable(rows)))
         
-        for row in rows:
-            for cell in row:
-                if cell is not None:
-                    text = str(cell).strip()
-                    if text and len(text) > 1:  # Filter out single characters and empty strings
-                        all_text.add(text)
+        # Filter out single characters
+        all_text = {text for text in all_text if len(text) > 1}
         
         # Sort by length and relevance (longer text first, then alphabetically)
-        return sorted(list(all_text), key=lambda x: (-len(x), x.lower()))
+        return sorted(all_text, key=lambda x: (-len(x), x.lower()))
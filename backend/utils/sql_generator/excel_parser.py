@@ -1,9 +1,151 @@
 """
 Excel file parser for extracting mapping information from multiple sheets
 """
+import asyncio
+import multiprocessing
+import os
+import re
+import tempfile
 import openpyxl
-from typing import Dict, List, Any, Optional
-import json
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO, StringIO
+from itertools import islice
+from openpyxl.utils import get_column_letter
+from typing import Dict, Iterator, List, Any, Optional, Union
+
+# Worker processes for sheet extraction (overridable via environment)
+PARSE_WORKERS = int(os.getenv("EXCEL_PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+
+# Words that mark a cell as a likely section or header label
+HEADER_KEYWORDS = ("table", "field", "column", "mapping", "source", "target", "join")
+
+# All keywords in one case-insensitive pattern: a single scan per cell
+# instead of lower() plus a substring search per keyword. Substring
+# matches on purpose, so "source_table" and "Joined" still count.
+_HEADER_KEYWORD_RE = re.compile("|".join(map(re.escape, HEADER_KEYWORDS)), re.IGNORECASE)
+
+
+def _is_potential_header(cell_value: str) -> bool:
+    """Heuristics for identifying headers or section titles"""
+    return (
+        cell_value.isupper() or  # All caps
+        ":" in cell_value or  # Contains colon
+        _HEADER_KEYWORD_RE.search(cell_value) is not None
+    )
+
+
+@dataclass(slots=True)
+class CellTable:
+    """
+    Non-empty cells of a sheet stored column-wise.
+    
+    Positions live in two unsigned int arrays and values in one list,
+    instead of a 5-key dict per cell, which keeps the result small on its
+    way back from the worker process. Indexing or iterating yields
+    {"row", "column", "column_letter", "value"} dicts, built on demand;
+    parsed output exposes them as a plain list (see _to_plain_sheet).
+    """
+    rows: array = field(default_factory=lambda: array("I"))
+    columns: array = field(default_factory=lambda: array("I"))
+    values: List[str] = field(default_factory=list)
+    
+    def append(self, row: int, column: int, value: str) -> None:
+        self.rows.append(row)
+        self.columns.append(column)
+        self.values.append(value)
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        column = self.columns[index]
+        return {
+            "row": self.rows[index],
+            "column": column,
+            "column_letter": get_column_letter(column),
+            "value": self.values[index]
+        }
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return map(self.__getitem__, range(len(self)))
+
+
+def _to_plain_sheet(sheet_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert worker output to the public shape: cells_with_data as a list
+    of dicts and raw_text as a list, so callers can JSON-serialize it
+    """
+    sheet_data["cells_with_data"] = list(sheet_data["cells_with_data"])
+    sheet_data["raw_text"] = list(sheet_data["raw_text"])
+    return sheet_data
+
+
+# Sheet extraction is CPU-bound Python, so sheets are parsed in worker
+# processes instead of serializing on the GIL. Created on first use.
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # Forking a server that already runs executor threads can copy a
+        # held lock into the child and deadlock it; start workers clean
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _process_pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context(start_method)
+        )
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the parsing workers. Call on application shutdown."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def _load_workbook(source: Union[str, bytes]):
+    """
+    Open a workbook from a path or raw bytes
+    
+    Read-only mode streams rows from the file instead of building a Cell
+    object for every position up front.
+    """
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    return openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+
+def _read_sheet_names(source: Union[str, bytes]) -> List[str]:
+    workbook = _load_workbook(source)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def _parse_sheet_batch(path: str, sheet_names: List[str]) -> List[Dict[str, Any]]:
+    """
+    Extract several sheets from one open workbook (runs in a worker process;
+    only the path, the names and the results cross over)
+    """
+    workbook = _load_workbook(path)
+    try:
+        return [ExcelMappingParser._extract_sheet_data(workbook[name]) for name in sheet_names]
+    finally:
+        workbook.close()
+
+
+def _write_temp_workbook(data: bytes) -> str:
+    """Spill uploaded bytes to a temp file the workers can open by path"""
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as handle:
+        handle.write(data)
+        return handle.name
 
 
 class ExcelMappingParser:
@@ -25,12 +167,7 @@ class ExcelMappingParser:
             Dictionary with sheet names as keys and extracted data as values
         """
         try:
-            workbook = openpyxl.load_workbook(file_path, data_only=True)
-            
-            for sheet_name in workbook.sheetnames:
-                sheet_data = await self._extract_sheet_data(workbook[sheet_name])
-                self.parsed_sheets[sheet_name] = sheet_data
-            
+            await self._parse_sheets(file_path)
             return self.parsed_sheets
         
         except Exception as e:
@@ -48,20 +185,13 @@ class ExcelMappingParser:
             Dictionary with sheet names as keys and extracted data as values
         """
         try:
-            from io import BytesIO
-            
-            # Load workbook from bytes
-            workbook = openpyxl.load_workbook(BytesIO(file_bytes), data_only=True)
-            
-            for sheet_name in workbook.sheetnames:
-                sheet_data = await self._extract_sheet_data(workbook[sheet_name])
-                self.parsed_sheets[sheet_name] = sheet_data
+            sheet_names = await self._parse_sheets(file_bytes)
             
             # Add metadata
             self.parsed_sheets["_metadata"] = {
                 "filename": filename,
-                "total_sheets": len(workbook.sheetnames),
-                "sheet_names": workbook.sheetnames
+                "total_sheets": len(sheet_names),
+                "sheet_names": sheet_names
             }
             
             return self.parsed_sheets
@@ -69,63 +199,97 @@ class ExcelMappingParser:
         except Exception as e:
             raise Exception(f"Failed to parse Excel bytes: {str(e)}")
     
-    async def _extract_sheet_data(self, worksheet) -> Dict[str, Any]:
+    async def _parse_sheets(self, source: Union[str, bytes]) -> List[str]:
         """
-        Extract all meaningful data from a single worksheet
+        Extract every sheet in parallel worker processes; returns the sheet names
+        
+        Sheets are split into one batch per worker, so each worker opens the
+        workbook once. Uploaded bytes are written to a temp file first and
+        workers get its path instead of a pickled copy of the file.
         """
-        sheet_data = {
-            "name": worksheet.title,
-            "max_row": worksheet.max_row,
-            "max_column": worksheet.max_column,
-            "cells_with_data": [],
-            "tables": [],
-            "headers": [],
-            "raw_text": []
-        }
+        if isinstance(source, bytes):
+            path = await asyncio.to_thread(_write_temp_workbook, source)
+        else:
+            path = source
         
-        # Extract all non-empty cells
-        for row in worksheet.iter_rows():
-            for cell in row:
-                if cell.value is not None:
-                    cell_info = {
-                        "row": cell.row,
-                        "column": cell.column,
-                        "column_letter": cell.column_letter,
-                        "value": str(cell.value),
-                        "data_type": str(type(cell.value).__name__)
-                    }
-                    sheet_data["cells_with_data"].append(cell_info)
-                    sheet_data["raw_text"].append(str(cell.value))
-        
-        # Try to identify table structures
-        sheet_data["tables"] = await self._identify_tables(worksheet)
-        
-        # Try to identify headers/sections
-        sheet_data["headers"] = await self._identify_headers(worksheet)
+        try:
+            sheet_names = await asyncio.to_thread(_read_sheet_names, path)
+            
+            batch_count = max(1, min(PARSE_WORKERS, len(sheet_names)))
+            batches = [sheet_names[i::batch_count] for i in range(batch_count)]
+            
+            loop = asyncio.get_running_loop()
+            pool = _get_process_pool()
+            batch_results = await asyncio.gather(*(
+                loop.run_in_executor(pool, _parse_sheet_batch, path, batch)
+                for batch in batches
+            ))
+        finally:
+            if path is not source:
+                await asyncio.to_thread(os.unlink, path)
         
-        # Create a text representation for AI
-        sheet_data["text_representation"] = await self._create_text_representation(sheet_data)
+        # Batches are strided; map results back by name to keep sheet order
+        by_name = {
+            name: result
+            for batch, results in zip(batches, batch_results)
+            for name, result in zip(batch, results)
+        }
+        results = await asyncio.to_thread(lambda: [_to_plain_sheet(by_name[name]) for name in sheet_names])
         
-        return sheet_data
+        self.parsed_sheets.update(zip(sheet_names, results))
+        return sheet_names
     
-    async def _identify_tables(self, worksheet) -> List[Dict]:
+    @staticmethod
+    def _extract_sheet_data(worksheet) -> Dict[str, Any]:
         """
-        Attempt to identify table-like structures in the sheet
+        Extract all meaningful data from a single worksheet
+        
+        One streaming pass over the rows collects the non-empty cells, the
+        table-like rows and the header candidates together.
         """
+        # Some writers record a bogus dimension (e.g. A1:XFD1048576) and
+        # read-only iteration would walk every empty row up to it
+        worksheet.reset_dimensions()
+        
+        cells_with_data = CellTable()
+        # Distinct values in first-seen order (dict as an ordered set)
+        unique_text = {}
         tables = []
+        headers = []
+        max_row = 0
+        max_column = 0
         
-        # Look for consecutive rows with data that might represent tables
-        for row_num in range(1, worksheet.max_row + 1):
+        # Rows arrive as plain value tuples; they are ragged
+        for row_num, row in enumerate(worksheet.iter_rows(values_only=True), 1):
+            max_row = row_num
+            if len(row) > max_column:
+                max_column = len(row)
+            
             row_data = []
-            for col_num in range(1, worksheet.max_column + 1):
-                cell_value = worksheet.cell(row=row_num, column=col_num).value
-                if cell_value is not None:
-                    row_data.append(str(cell_value))
-                else:
+            non_empty_count = 0
+            for col_num, value in enumerate(row, 1):
+                if value is None:
                     row_data.append("")
+                    continue
+                
+                cell_value = str(value)
+                row_data.append(cell_value)
+                cells_with_data.append(row_num, col_num, cell_value)
+                unique_text[cell_value] = None
+                
+                if cell_value.strip():
+                    non_empty_count += 1
+                
+                # Values only: fonts aren't available when streaming, so
+                # bold formatting doesn't count as a header signal
+                if _is_potential_header(cell_value):
+                    headers.append({
+                        "row": row_num,
+                        "column": col_num,
+                        "value": cell_value
+                    })
             
             # If row has multiple non-empty cells, it might be a table row
-            non_empty_count = len([cell for cell in row_data if cell.strip()])
             if non_empty_count >= 2:
                 tables.append({
                     "row": row_num,
@@ -133,71 +297,57 @@ class ExcelMappingParser:
                     "non_empty_cells": non_empty_count
                 })
         
-        return tables
-    
-    async def _identify_headers(self, worksheet) -> List[Dict]:
-        """
-        Identify potential headers or section titles
-        """
-        headers = []
+        # Pad table rows to the sheet width, known only after the pass
+        for table_row in tables:
+            table_row["data"].extend([""] * (max_column - len(table_row["data"])))
         
-        for row_num in range(1, worksheet.max_row + 1):
-            for col_num in range(1, worksheet.max_column + 1):
-                cell = worksheet.cell(row=row_num, column=col_num)
-                if cell.value is not None:
-                    cell_value = str(cell.value)
-                    
-                    # Heuristics for identifying headers
-                    is_potential_header = (
-                        len(cell_value) > 3 and  # Not too short
-                        (cell.font and cell.font.bold) or  # Bold formatting
-                        cell_value.isupper() or  # All caps
-                        ":" in cell_value or  # Contains colon
-                        any(keyword in cell_value.lower() for keyword in 
-                            ["table", "field", "column", "mapping", "source", "target", "join"])
-                    )
-                    
-                    if is_potential_header:
-                        headers.append({
-                            "row": row_num,
-                            "column": col_num,
-                            "value": cell_value,
-                            "formatted": bool(cell.font and cell.font.bold)
-                        })
-        
-        return headers
+        sheet_data = {
+            "name": worksheet.title,
+            "max_row": max_row,
+            "max_column": max_column,
+            "cells_with_data": cells_with_data,
+            "tables": tables,
+            "headers": headers,
+            "raw_text": unique_text
+        }
+        
+        # Create a text representation for AI
+        sheet_data["text_representation"] = ExcelMappingParser._create_text_representation(sheet_data)
+        
+        return sheet_data
     
-    async def _create_text_representation(self, sheet_data: Dict) -> str:
+    @staticmethod
+    def _create_text_representation(sheet_data: Dict) -> str:
         """
         Create a text representation of the sheet for AI processing
         """
-        text_parts = [
-            f"SHEET: {sheet_data['name']}",
-            f"DIMENSIONS: {sheet_data['max_row']} rows x {sheet_data['max_column']} columns",
-            ""
-        ]
+        buf = StringIO()
+        buf.write(f"SHEET: {sheet_data['name']}\n")
+        buf.write(f"DIMENSIONS: {sheet_data['max_row']} rows x {sheet_data['max_column']} columns\n\n")
         
         # Add headers section
         if sheet_data["headers"]:
-            text_parts.append("IDENTIFIED HEADERS/SECTIONS:")
+            buf.write("IDENTIFIED HEADERS/SECTIONS:\n")
             for header in sheet_data["headers"]:
-                text_parts.append(f"  Row {header['row']}: {header['value']}")
-            text_parts.append("")
+                buf.write(f"  Row {header['row']}: {header['value']}\n")
+            buf.write("\n")
         
         # Add table-like structures
         if sheet_data["tables"]:
-            text_parts.append("POTENTIAL TABLE DATA:")
-            for i, table_row in enumerate(sheet_data["tables"][:10]):  # Limit to first 10 rows
+            buf.write("POTENTIAL TABLE DATA:\n")
+            for table_row in islice(sheet_data["tables"], 10):  # Limit to first 10 rows
                 non_empty_data = [cell for cell in table_row["data"] if cell.strip()]
-                text_parts.append(f"  Row {table_row['row']}: {' | '.join(non_empty_data)}")
-            text_parts.append("")
+                buf.write(f"  Row {table_row['row']}: {' | '.join(non_empty_data)}\n")
+            buf.write("\n")
         
         # Add all raw text for context
-        text_parts.append("ALL TEXT CONTENT:")
-        unique_texts = list(set(sheet_data["raw_text"]))  # Remove duplicates
-        text_parts.extend([f"  {text}" for text in unique_texts[:50]])  # Limit to first 50 unique texts
+        buf.write("ALL TEXT CONTENT:")
+        # raw_text is already deduplicated; stable order keeps the prompt
+        # (and its parse cache key) identical across runs
+        for text in islice(sheet_data["raw_text"], 50):  # Limit to first 50 unique texts
+            buf.write(f"\n  {text}")
         
-        return "\n".join(text_parts)
+        return buf.getvalue()
     
     def get_consolidated_text_for_ai(self) -> str:
         """
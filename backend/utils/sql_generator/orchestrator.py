@@ -2,10 +2,85 @@
 SQL Generation Orchestrator - Main coordinator for the AI-powered SQL generation pipeline
 """
 import asyncio
-from typing import AsyncGenerator, Dict, Any, Optional
+import hashlib
+import os
+import sys
+from collections import OrderedDict, deque
+from functools import lru_cache
+from itertools import compress, product
+from typing import AsyncGenerator, Dict, Any, Optional, Tuple
+import orjson
 from ..db_utils import execute_sql_async, validate_connection_params
+from ..sse_utils import bounded_stream, sse_frame
 from .ai_parser import AIInputParser, ParsedMapping
 
+# Validation probes in flight at once per generation (overridable via environment)
+VALIDATION_CONCURRENCY = int(os.getenv("SQL_VALIDATION_CONCURRENCY", "8"))
+
+# Spark's EXPLAIN returns this as its plan text when analysis fails
+EXPLAIN_ERROR_PREFIX = "Error occurred during query planning"
+
+# Graph size (tables + relationships) from which dependency analysis runs
+# in a worker thread (overridable via environment)
+ANALYSIS_THREAD_THRESHOLD = int(os.getenv("SQL_ANALYSIS_THREAD_THRESHOLD", "1000"))
+
+# In-memory LRU of parsed mappings (overridable via environment)
+PARSED_MAPPING_CACHE_SIZE = int(os.getenv("PARSED_MAPPING_CACHE_SIZE", "128"))
+
+# Re-submitting the same mapping (common while iterating in the UI) skips
+# the AI call entirely. Shared by all orchestrators in the process since
+# one is created per request.
+_parsed_mapping_cache: "OrderedDict[bytes, ParsedMapping]" = OrderedDict()
+
+
+def _parsed_mapping_key(provider: str, raw_input: Any) -> Optional[bytes]:
+    """Digest of the canonical JSON of raw_input, or None if it isn't JSON-serializable"""
+    try:
+        canonical = orjson.dumps(raw_input, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return None
+    return hashlib.blake2b(provider.encode() + b"\0" + canonical, digest_size=16).digest()
+
+
+@lru_cache(maxsize=4096)
+def _cte_sql(schema: str, table_name: str) -> str:
+    """CTE body for a table; pure in (schema, table_name), so shared process-wide"""
+    if schema:
+        full_table_name = f"{schema}.{table_name}"
+    else:
+        full_table_name = table_name
+    
+    return f"SELECT * FROM {full_table_name}"
+
+
+# Fixed progress messages, encoded once at import
+_FRAMES = {
+    "ai_start": sse_frame("status", "🤖 Starting AI analysis of mapping input..."),
+    "ai_analyzing": sse_frame("status", "🔍 Analyzing input structure with AI..."),
+    "dependencies": sse_frame("status", "🔗 Building dependency graph and execution order..."),
+    "cycles_detected": sse_frame("warning", "⚠️ Cyclic references detected - resolving..."),
+    "cycles_resolved": sse_frame("status", "✅ Cyclic references resolved"),
+    "no_cycles": sse_frame("status", "✅ No cyclic references found"),
+    "components": sse_frame("status", "🏗️ Building SQL components..."),
+    "ctes": sse_frame("status", "📝 Building Common Table Expressions (CTEs)..."),
+    "joins": sse_frame("status", "🔗 Building JOIN sections..."),
+    "attributes": sse_frame("status", "📊 Adding output attributes..."),
+    "assemble": sse_frame("status", "🔧 Constructing final SQL..."),
+    "test_final": sse_frame("status", "🧪 Testing final SQL..."),
+    "completed": sse_frame("status", "✅ SQL generation completed successfully!"),
+    "close": sse_frame("close", "SQL generation process completed"),
+}
+
+
+def _final_sql_template(has_ctes: bool, has_from: bool, has_joins: bool, has_where: bool) -> str:
+    """Format template for one final-SQL shape; SELECT is always present"""
+    clauses = ("WITH {ctes}", "SELECT {select}", "FROM {base}", "{joins}", "WHERE {where}")
+    return "\n".join(compress(clauses, (has_ctes, True, has_from, has_joins, has_where)))
+
+
+# Final SQL templates keyed by (has_ctes, has_from, has_joins, has_where)
+_FINAL_SQL_TEMPLATES = {shape: _final_sql_template(*shape) for shape in product((False, True), repeat=4)}
+
 
 class SQLGenerationOrchestrator:
     """
@@ -20,8 +95,13 @@ class SQLGenerationOrchestrator:
     def __init__(self, ai_api_key: str, ai_provider: str = "openai"):
         self.ai_parser = AIInputParser(ai_api_key, ai_provider)
         self.parsed_mapping: Optional[ParsedMapping] = None
+        # Lookups over parsed_mapping, built once right after parsing
+        self._table_by_name: Dict[str, Dict[str, Any]] = {}
+        self._rel_by_pair: Dict[Tuple[str, str], Dict[str, Any]] = {}
         self.dependency_graph = None
         self.execution_order = []
+        # Keyed by "<table>_cte" / "<table>_cte_error" strings, "select_clause",
+        # and ("join" | "join_error", left_table, right_table) tuples
         self.built_components = {}
         self.final_sql = ""
     
@@ -29,7 +109,7 @@ class SQLGenerationOrchestrator:
         self, 
         raw_input: Any, 
         connection_details: Dict[str, str]
-    ) -> AsyncGenerator[Dict[str, str], None]:
+    ) -> AsyncGenerator[bytes, None]:
         """
         Main method that generates SQL while streaming SSE events
         
@@ -38,109 +118,171 @@ class SQLGenerationOrchestrator:
             connection_details: Databricks connection info
             
         Yields:
-            SSE events for each step of the process
+            SSE frames (wire-format bytes) for each step of the process
         """
+        # Frames are buffered in a bounded queue so a slow client applies
+        # backpressure to the pipeline instead of stalling it between events.
+        # Quiet stretches need no keep-alive frames here: EventSourceResponse
+        # already sends a ping comment every 15 s
+        async for frame in bounded_stream(self._generate_events(raw_input, connection_details)):
+            yield frame
+    
+    async def _generate_events(
+        self,
+        raw_input: Any,
+        connection_details: Dict[str, str]
+    ) -> AsyncGenerator[bytes, None]:
+        """Run the pipeline, yielding a frame per step"""
         try:
             # Phase 1: AI Analysis
-            yield {"event": "status", "data": "🤖 Starting AI analysis of mapping input..."}
+            yield _FRAMES["ai_start"]
             
-            yield {"event": "status", "data": "🔍 Analyzing input structure with AI..."}
-            self.parsed_mapping = await self.ai_parser.parse_input(raw_input)
+            yield _FRAMES["ai_analyzing"]
+            self.parsed_mapping = await self._parse_input_cached(raw_input)
+            self._index_parsed_mapping()
             
-            yield {"event": "status", "data": f"✅ AI analysis complete - found {len(self.parsed_mapping.tables)} tables"}
+            yield sse_frame("status", f"✅ AI analysis complete - found {len(self.parsed_mapping.tables)} tables")
             
             # Phase 2: Dependency Analysis
-            yield {"event": "status", "data": "🔗 Building dependency graph..."}
-            await self._build_dependency_graph()
+            # Graph, cycle check and execution order come from one pass
+            yield _FRAMES["dependencies"]
+            if len(self._table_by_name) + len(self._rel_by_pair) >= ANALYSIS_THREAD_THRESHOLD:
+                # Large graphs are analyzed off the event loop so other
+                # streams (and keep-alives) aren't starved meanwhile
+                has_cycles = await asyncio.to_thread(self._analyze_dependencies)
+            else:
+                has_cycles = self._analyze_dependencies()
             
-            yield {"event": "status", "data": "🔄 Checking for cyclic references..."}
-            has_cycles = await self._detect_cycles()
             if has_cycles:
-                yield {"event": "warning", "data": "⚠️ Cyclic references detected - resolving..."}
+                yield _FRAMES["cycles_detected"]
                 await self._resolve_cycles()
-                yield {"event": "status", "data": "✅ Cyclic references resolved"}
+                yield _FRAMES["cycles_resolved"]
             else:
-                yield {"event": "status", "data": "✅ No cyclic references found"}
+                yield _FRAMES["no_cycles"]
             
-            yield {"event": "status", "data": "📋 Creating execution order..."}
-            await self._create_execution_order()
-            yield {"event": "status", "data": f"✅ Execution order created - {len(self.execution_order)} steps"}
+            yield sse_frame("status", f"✅ Execution order created - {len(self.execution_order)} steps")
             
             # Phase 3: SQL Component Building
-            yield {"event": "status", "data": "🏗️ Building SQL components..."}
+            yield _FRAMES["components"]
             
-            # Build CTEs
-            yield {"event": "status", "data": "📝 Building Common Table Expressions (CTEs)..."}
-            await self._build_ctes(connection_details)
-            
-            # Build Joins
-            yield {"event": "status", "data": "🔗 Building JOIN sections..."}
-            await self._build_joins(connection_details)
+            # Build CTEs. Validation starts as soon as the execution order
+            # exists and stays in flight while the JOINs are probed.
+            yield _FRAMES["ctes"]
+            cte_task = asyncio.ensure_future(self._build_ctes(connection_details))
+            try:
+                # Build Joins
+                yield _FRAMES["joins"]
+                await self._build_joins(connection_details)
+                await cte_task
+            finally:
+                cte_task.cancel()
             
             # Build Attributes
-            yield {"event": "status", "data": "📊 Adding output attributes..."}
+            yield _FRAMES["attributes"]
             await self._build_attributes()
             
             # Phase 4: Final SQL Assembly
-            yield {"event": "status", "data": "🔧 Constructing final SQL..."}
+            yield _FRAMES["assemble"]
             await self._assemble_final_sql()
             
-            yield {"event": "status", "data": "🧪 Testing final SQL..."}
+            # Only final_sql is needed from here on; drop the parsed input and
+            # its indexes so they can be collected before the final probe
+            self._release_parsed_mapping()
+            
+            yield _FRAMES["test_final"]
             await self._test_final_sql(connection_details)
             
-            yield {"event": "status", "data": "✅ SQL generation completed successfully!"}
+            yield _FRAMES["completed"]
             
             # Final event with the generated SQL
-            yield {"event": "sql_generated", "data": self.final_sql}
-            yield {"event": "close", "data": "SQL generation process completed"}
+            yield sse_frame("sql_generated", self.final_sql)
+            yield _FRAMES["close"]
             
         except Exception as e:
-            yield {"event": "error", "data": f"❌ Error during SQL generation: {str(e)}"}
+            yield sse_frame("error", f"❌ Error during SQL generation: {str(e)}")
+    
+    async def _parse_input_cached(self, raw_input: Any) -> ParsedMapping:
+        """AI-parse raw_input, reusing the result for an identical earlier input"""
+        key = _parsed_mapping_key(self.ai_parser.provider, raw_input)
+        if key is not None:
+            parsed_mapping = _parsed_mapping_cache.get(key)
+            if parsed_mapping is not None:
+                _parsed_mapping_cache.move_to_end(key)
+                return parsed_mapping
+        
+        parsed_mapping = await self.ai_parser.parse_input(raw_input)
+        
+        if key is not None:
+            _parsed_mapping_cache[key] = parsed_mapping
+            if len(_parsed_mapping_cache) > PARSED_MAPPING_CACHE_SIZE:
+                _parsed_mapping_cache.popitem(last=False)
+        return parsed_mapping
+    
+    def _index_parsed_mapping(self):
+        """
+        Index tables by name and relationships by (left, right) pair so
+        later phases don't rescan the parsed lists. A pair given more than
+        once keeps its last relationship.
+        """
+        # Names are interned so the tuple keys built from them later hash
+        # and compare by identity
+        self._table_by_name = {sys.intern(table['name']): table for table in self.parsed_mapping.tables}
+        self._rel_by_pair = {
+            (sys.intern(rel['left_table']), sys.intern(rel['right_table'])): rel
+            for rel in self.parsed_mapping.relationships
+        }
     
-    async def _build_dependency_graph(self):
-        """Build dependency graph from parsed relationships"""
+    def _release_parsed_mapping(self):
+        """Drop references to the parsed mapping and structures derived from it"""
+        self.parsed_mapping = None
+        self._table_by_name = {}
+        self._rel_by_pair = {}
+        self.dependency_graph = None
+    
+    def _analyze_dependencies(self) -> bool:
+        """
+        Build the dependency graph and the execution order in one pass
+        
+        The graph is built in a single loop over tables and relationships,
+        then a Kahn topological sort produces the execution order. Tables
+        on a cycle never reach in-degree zero, so a short order is how
+        cycles are detected.
+        
+        Returns:
+            True if the graph has cyclic references
+        """
         self.dependency_graph = {}
         
-        for table in self.parsed_mapping.tables:
-            self.dependency_graph[table['name']] = {
+        for table_name in self._table_by_name:
+            self.dependency_graph[table_name] = {
                 'dependencies': [],
-                'dependents': [],
-                'table_info': table
+                'dependents': []
             }
         
-        # Add relationships as dependencies
-        for rel in self.parsed_mapping.relationships:
-            left_table = rel['left_table']
-            right_table = rel['right_table']
-            
+        # Add relationships as dependencies. A table's in-degree is the
+        # number of tables that depend on it, so tables nothing references
+        # come first and each dependency follows everything that joins to it.
+        in_degree = dict.fromkeys(self.dependency_graph, 0)
+        for left_table, right_table in self._rel_by_pair:
             if left_table in self.dependency_graph and right_table in self.dependency_graph:
                 self.dependency_graph[left_table]['dependencies'].append(right_table)
                 self.dependency_graph[right_table]['dependents'].append(left_table)
-    
-    async def _detect_cycles(self) -> bool:
-        """Detect cyclic references in the dependency graph"""
-        visited = set()
-        rec_stack = set()
+                in_degree[right_table] += 1
         
-        def has_cycle(node):
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for neighbor in self.dependency_graph[node]['dependencies']:
-                if neighbor not in visited:
-                    if has_cycle(neighbor):
-                        return True
-                elif neighbor in rec_stack:
-                    return True
+        # Topological sort (Kahn)
+        queue = deque(table for table, degree in in_degree.items() if degree == 0)
+        self.execution_order = []
+        
+        while queue:
+            current = queue.popleft()
+            self.execution_order.append(current)
             
-            rec_stack.remove(node)
-            return False
+            for dependency in self.dependency_graph[current]['dependencies']:
+                in_degree[dependency] -= 1
+                if in_degree[dependency] == 0:
+                    queue.append(dependency)
         
-        for node in self.dependency_graph:
-            if node not in visited:
-                if has_cycle(node):
-                    return True
-        return False
+        return len(self.execution_order) < len(self.dependency_graph)
     
     async def _resolve_cycles(self):
         """Resolve cyclic references by breaking cycles intelligently"""
@@ -148,160 +290,186 @@ class SQLGenerationOrchestrator:
         # For now, we'll mark problematic edges and handle them as LEFT JOINs
         pass
     
-    async def _create_execution_order(self):
-        """Create optimal execution order using topological sort"""
-        in_degree = {table: 0 for table in self.dependency_graph}
-        
-        # Calculate in-degrees
-        for table in self.dependency_graph:
-            for dep in self.dependency_graph[table]['dependencies']:
-                in_degree[dep] += 1
-        
-        # Topological sort
-        queue = [table for table, degree in in_degree.items() if degree == 0]
-        self.execution_order = []
-        
-        while queue:
-            current = queue.pop(0)
-            self.execution_order.append(current)
-            
-            for dependent in self.dependency_graph[current]['dependents']:
-                in_degree[dependent] -= 1
-                if in_degree[dependent] == 0:
-                    queue.append(dependent)
-    
     async def _build_ctes(self, connection_details: Dict[str, str]):
         """Build and test CTEs for each table"""
-        for i, table_name in enumerate(self.execution_order):
-            # Note: Cannot yield here directly, but we can store results
-            table_info = self.dependency_graph[table_name]['table_info']
-            cte_sql = self._generate_cte_sql(table_info)
-            
-            try:
-                # Test the CTE with a small limit
-                test_sql = f"WITH {table_name}_cte AS ({cte_sql}) SELECT * FROM {table_name}_cte LIMIT 1"
-                await execute_sql_async(
-                    test_sql,
-                    connection_details['server_hostname'],
-                    connection_details['http_path'],
-                    connection_details['access_token'],
-                    timeout=10
-                )
+        if not self.execution_order:
+            return
+        
+        # Happy path: validate every CTE in one round trip. Each CTE is
+        # referenced, since unreferenced ones may never be analyzed.
+        ctes = [
+            (table_name, self._generate_cte_sql(self._table_by_name[table_name]))
+            for table_name in self.execution_order
+        ]
+        combined_sql = (
+            "WITH " + ", ".join(f"{table_name}_cte AS ({cte_sql})" for table_name, cte_sql in ctes) + " "
+            + " UNION ALL ".join(f"SELECT 1 FROM {table_name}_cte" for table_name, _ in ctes)
+        )
+        try:
+            await self._explain(combined_sql, connection_details, timeout=10)
+        except Exception:
+            pass
+        else:
+            for table_name, cte_sql in ctes:
                 self.built_components[f"{table_name}_cte"] = cte_sql
-            except Exception as e:
-                # Store the error for later reporting
-                self.built_components[f"{table_name}_cte_error"] = str(e)
+            return
+        
+        # Something failed: probe each CTE on its own to find the culprits.
+        # Probes are independent, so they run concurrently on the pooled
+        # connections; results are merged in execution order afterwards
+        # because the final WITH clause follows built_components order.
+        semaphore = asyncio.Semaphore(VALIDATION_CONCURRENCY)
+        results = await asyncio.gather(*(
+            self._test_cte(table_name, connection_details, semaphore)
+            for table_name in self.execution_order
+        ))
+        for key, value in results:
+            self.built_components[key] = value
+    
+    async def _test_cte(
+        self,
+        table_name: str,
+        connection_details: Dict[str, str],
+        semaphore: asyncio.Semaphore
+    ) -> Tuple[str, str]:
+        """Test one table's CTE; returns the built_components entry to record"""
+        cte_sql = self._generate_cte_sql(self._table_by_name[table_name])
+        
+        try:
+            # Test the CTE by planning it
+            test_sql = f"WITH {table_name}_cte AS ({cte_sql}) SELECT * FROM {table_name}_cte"
+            async with semaphore:
+                await self._explain(test_sql, connection_details, timeout=10)
+            return f"{table_name}_cte", cte_sql
+        except Exception as e:
+            # Store the error for later reporting
+            return f"{table_name}_cte_error", str(e)
     
     async def _build_joins(self, connection_details: Dict[str, str]):
         """Build and test JOIN clauses"""
-        for relationship in self.parsed_mapping.relationships:
-            join_type = relationship.get('join_type', 'INNER')
-            left_table = relationship['left_table']
-            right_table = relationship['right_table']
-            condition = relationship['join_condition']
+        # Relationships are validated independently, same as the CTEs
+        semaphore = asyncio.Semaphore(VALIDATION_CONCURRENCY)
+        results = await asyncio.gather(*(
+            self._test_join(left_table, right_table, relationship, connection_details, semaphore)
+            for (left_table, right_table), relationship in self._rel_by_pair.items()
+        ))
+        for key, value in results:
+            self.built_components[key] = value
+    
+    async def _test_join(
+        self,
+        left_table: str,
+        right_table: str,
+        relationship: Dict[str, Any],
+        connection_details: Dict[str, str],
+        semaphore: asyncio.Semaphore
+    ) -> Tuple[Tuple[str, str, str], Any]:
+        """Test one JOIN; returns the built_components entry to record"""
+        join_type = relationship.get('join_type', 'INNER')
+        condition = relationship['join_condition']
+        
+        try:
+            test_sql = f"""
+            SELECT COUNT(*) as join_count 
+            FROM {left_table} 
+            {join_type} JOIN {right_table} ON {condition}
+            """
+            async with semaphore:
+                await self._explain(test_sql, connection_details, timeout=10)
             
-            try:
-                test_sql = f"""
-                SELECT COUNT(*) as join_count 
-                FROM {left_table} 
-                {join_type} JOIN {right_table} ON {condition}
-                """
-                await execute_sql_async(
-                    test_sql,
-                    connection_details['server_hostname'],
-                    connection_details['http_path'],
-                    connection_details['access_token'],
-                    timeout=10
-                )
-                
-                self.built_components[f"join_{left_table}_{right_table}"] = {
-                    'type': join_type,
-                    'condition': condition
-                }
-            except Exception as e:
-                self.built_components[f"join_{left_table}_{right_table}_error"] = str(e)
+            return ("join", left_table, right_table), {
+                'type': join_type,
+                'condition': condition
+            }
+        except Exception as e:
+            return ("join_error", left_table, right_table), str(e)
     
     async def _build_attributes(self):
         """Build output attribute selection"""
-        select_clauses = []
-        for col in self.parsed_mapping.output_columns:
-            table = col.get('table', '')
-            column = col['column']
-            alias = col.get('alias', '')
-            aggregation = col.get('aggregation', None)
-            
-            if aggregation:
-                clause = f"{aggregation}({table}.{column})"
-            else:
-                clause = f"{table}.{column}"
-            
-            if alias:
-                clause += f" AS {alias}"
-                
-            select_clauses.append(clause)
+        # One formatted fragment per column, joined once
+        self.built_components['select_clause'] = ', '.join(
+            map(self._format_select_column, self.parsed_mapping.output_columns)
+        )
+    
+    @staticmethod
+    def _format_select_column(col: Dict[str, Any]) -> str:
+        """SELECT-list entry for one output column"""
+        table = col.get('table', '')
+        column = col['column']
+        alias = col.get('alias', '')
+        aggregation = col.get('aggregation', None)
+        
+        if aggregation:
+            expression = f"{aggregation}({table}.{column})"
+        else:
+            expression = f"{table}.{column}"
         
-        self.built_components['select_clause'] = ', '.join(select_clauses)
+        return f"{expression} AS {alias}" if alias else expression
     
     async def _assemble_final_sql(self):
         """Assemble the final SQL from all components"""
-        sql_parts = []
+        ctes = ', '.join(
+            f"{name} AS ({sql})" for name, sql in self.built_components.items()
+            if type(name) is str and name.endswith('_cte')
+        )
         
-        # Add CTEs if any
-        cte_parts = [f"{name} AS ({sql})" for name, sql in self.built_components.items() 
-                    if name.endswith('_cte')]
-        if cte_parts:
-            sql_parts.append(f"WITH {', '.join(cte_parts)}")
+        # JOINs in relationship order, skipping ones that failed validation
+        join_infos = (
+            (right_table, self.built_components.get(("join", left_table, right_table)))
+            for left_table, right_table in self._rel_by_pair
+        )
+        joins = '\n'.join(
+            f"{join_info['type']} JOIN {right_table} ON {join_info['condition']}"
+            for right_table, join_info in join_infos
+            if join_info
+        )
         
-        # Add SELECT clause
-        select_clause = self.built_components.get('select_clause', '*')
-        sql_parts.append(f"SELECT {select_clause}")
+        where = ' AND '.join(
+            f"{filter_item['table']}.{filter_item['column']} {filter_item['operator']} {filter_item['value']}"
+            for filter_item in self.parsed_mapping.filters
+            if filter_item.get('condition', 'WHERE') == 'WHERE'
+        )
         
-        # Add FROM clause (first table in execution order)
-        if self.execution_order:
-            sql_parts.append(f"FROM {self.execution_order[0]}")
+        # FROM is the first table in execution order
+        base = self.execution_order[0] if self.execution_order else ''
         
-        # Add JOINs
-        for relationship in self.parsed_mapping.relationships:
-            join_info = self.built_components.get(f"join_{relationship['left_table']}_{relationship['right_table']}")
-            if join_info:
-                sql_parts.append(f"{join_info['type']} JOIN {relationship['right_table']} ON {join_info['condition']}")
-        
-        # Add filters
-        if self.parsed_mapping.filters:
-            where_clauses = []
-            for filter_item in self.parsed_mapping.filters:
-                if filter_item.get('condition', 'WHERE') == 'WHERE':
-                    clause = f"{filter_item['table']}.{filter_item['column']} {filter_item['operator']} {filter_item['value']}"
-                    where_clauses.append(clause)
-            
-            if where_clauses:
-                sql_parts.append(f"WHERE {' AND '.join(where_clauses)}")
-        
-        self.final_sql = '\n'.join(sql_parts)
+        template = _FINAL_SQL_TEMPLATES[bool(ctes), bool(base), bool(joins), bool(where)]
+        self.final_sql = template.format(
+            ctes=ctes,
+            select=self.built_components.get('select_clause', '*'),
+            base=base,
+            joins=joins,
+            where=where
+        )
     
     async def _test_final_sql(self, connection_details: Dict[str, str]):
         """Test the final assembled SQL"""
         try:
-            # Test with LIMIT 1 to verify syntax
-            test_sql = f"({self.final_sql}) LIMIT 1"
-            await execute_sql_async(
-                test_sql,
-                connection_details['server_hostname'],
-                connection_details['http_path'],
-                connection_details['access_token'],
-                timeout=15
-            )
+            # Plan the query to verify syntax, tables and columns
+            await self._explain(self.final_sql, connection_details, timeout=15)
         except Exception as e:
             raise Exception(f"Final SQL test failed: {str(e)}")
     
+    async def _explain(self, sql: str, connection_details: Dict[str, str], timeout: int):
+        """
+        Validate SQL with EXPLAIN: Databricks parses, analyzes and plans it
+        without reading any data
+        
+        Raises:
+            Exception: If the SQL doesn't plan. Analysis errors come back as
+                the plan text rather than as a query error, so that's checked too.
+        """
+        _, rows = await execute_sql_async(
+            f"EXPLAIN {sql}",
+            connection_details['server_hostname'],
+            connection_details['http_path'],
+            connection_details['access_token'],
+            timeout=timeout
+        )
+        plan = str(rows[0][0]) if rows and rows[0] else ""
+        if plan.lstrip().startswith(EXPLAIN_ERROR_PREFIX):
+            raise Exception(plan.strip())
+    
     def _generate_cte_sql(self, table_info: Dict) -> str:
         """Generate SQL for a CTE based on table info"""
-        table_name = table_info['name']
-        schema = table_info.get('schema', '')
-        
-        if schema:
-            full_table_name = f"{schema}.{table_name}"
-        else:
-            full_table_name = table_name
-        
-        return f"SELECT * FROM {full_table_name}"
+        return _cte_sql(table_info.get('schema') or '', table_info['name'])
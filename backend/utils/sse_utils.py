@@ -1,38 +1,108 @@
 """
 SSE (Server-Sent Events) utilities for streaming responses
 """
-from typing import AsyncGenerator, Dict, Any
+import asyncio
+import os
+from typing import AsyncGenerator, AsyncIterator, Dict, Any, List, Optional, TypeVar, Union
+import orjson
 
+T = TypeVar("T")
 
-async def create_sse_event(event_type: str, data: str) -> Dict[str, str]:
+# Frames a stream may run ahead of its client (overridable via environment)
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "64"))
+
+
+def sse_frame(event_type: str, data: str) -> bytes:
     """
-    Create a properly formatted SSE event
+    Encode an event in SSE wire format
+    
+    EventSourceResponse passes bytes through untouched, so frames built
+    once (e.g. fixed status messages) are sent without re-serialization.
+    Multi-line data gets one "data:" field per line, per the SSE spec.
     
     Args:
         event_type: Type of the event (status, data, error, etc.)
         data: Event data as string
     
+    Returns:
+        UTF-8 encoded frame, terminated by a blank line
+    """
+    data_lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"event: {event_type}\n{data_lines}\n".encode()
+
+
+def create_sse_event(event_type: str, data: Union[str, Dict[str, Any], List[Any]]) -> Dict[str, str]:
+    """
+    Create a properly formatted SSE event
+    
+    Args:
+        event_type: Type of the event (status, data, error, etc.)
+        data: Event data as string, or a dict/list to send as JSON
+    
     Returns:
         Dictionary with event and data keys
     """
+    if not isinstance(data, str):
+        data = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
     return {"event": event_type, "data": data}
 
 
-async def stream_status_event(message: str) -> Dict[str, str]:
+def stream_status_event(message: str) -> Dict[str, str]:
     """Helper to create status events"""
-    return await create_sse_event("status", message)
+    return create_sse_event("status", message)
 
 
-async def stream_error_event(error_message: str) -> Dict[str, str]:
+def stream_error_event(error_message: str) -> Dict[str, str]:
     """Helper to create error events"""
-    return await create_sse_event("error", error_message)
+    return create_sse_event("error", error_message)
 
 
-async def stream_data_event(data: str) -> Dict[str, str]:
+def stream_data_event(data: Union[str, Dict[str, Any], List[Any]]) -> Dict[str, str]:
     """Helper to create data events"""
-    return await create_sse_event("data", data)
+    return create_sse_event("data", data)
 
 
-async def stream_close_event(message: str) -> Dict[str, str]:
+def stream_close_event(message: str) -> Dict[str, str]:
     """Helper to create close events"""
-    return await create_sse_event("close", message)
+    return create_sse_event("close", message)
+
+
+class _EndOfStream:
+    """Queue marker for a finished producer, carrying its error if it failed"""
+    
+    def __init__(self, error: Optional[Exception] = None):
+        self.error = error
+
+
+async def bounded_stream(source: AsyncIterator[T], maxsize: int = SSE_QUEUE_SIZE) -> AsyncGenerator[T, None]:
+    """
+    Run source in a producer task feeding a bounded queue
+    
+    The pipeline keeps working while a client reads slowly, but never gets
+    more than maxsize events ahead: once the queue is full the producer
+    blocks on put() until the client catches up. If the client goes away
+    the producer task is cancelled, stopping the pipeline with it.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize)
+    
+    async def produce():
+        try:
+            async for item in source:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(_EndOfStream(e))
+        else:
+            await queue.put(_EndOfStream())
+    
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if isinstance(item, _EndOfStream):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+    finally:
+        producer.cancel()
+
@@ -0,0 +1,75 @@
+"""
+Token counting and budget truncation for LLM inputs
+"""
+import os
+from functools import lru_cache
+from typing import List
+
+try:
+    import tiktoken
+except ImportError:  # Falls back to a character-based estimate
+    tiktoken = None
+
+# Input token budget for the parsing prompt's variable content (overridable via environment)
+INPUT_TOKEN_BUDGET = int(os.getenv("AI_INPUT_TOKEN_BUDGET", "6000"))
+
+# Rough English/code average, used only without tiktoken
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoder():
+    # cl100k_base is the gpt-4 encoding; close enough for Claude budgeting too
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text (estimated when tiktoken isn't installed)"""
+    if tiktoken is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(_get_encoder().encode(text, disallowed_special=()))
+
+
+def truncate_middle(text: str, budget: int = INPUT_TOKEN_BUDGET) -> str:
+    """
+    Keep the first and last budget/2 tokens of text, replacing the middle
+    with a marker saying how much was dropped
+    """
+    if tiktoken is None:
+        total = count_tokens(text)
+        if total <= budget:
+            return text
+        half = budget // 2 * CHARS_PER_TOKEN
+        head, tail = text[:half], text[-half:]
+    else:
+        encoder = _get_encoder()
+        tokens = encoder.encode(text, disallowed_special=())
+        total = len(tokens)
+        if total <= budget:
+            return text
+        half = budget // 2
+        head, tail = encoder.decode(tokens[:half]), encoder.decode(tokens[-half:])
+
+    return f"{head}\n[...truncated {total - 2 * (budget // 2)} tokens...]\n{tail}"
+
+
+def truncate_lines(text: str, budget: int) -> str:
+    """
+    Keep whole lines from the start of text until budget tokens are used,
+    so rows are dropped rather than cut in half
+    """
+    total = count_tokens(text)
+    if total <= budget:
+        return text
+
+    kept: List[str] = []
+    used = 0
+    for line in text.splitlines(keepends=True):
+        cost = count_tokens(line)
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+
+    kept.append(f"  ... [truncated {total - used} tokens]\n")
+    return "".join(kept)
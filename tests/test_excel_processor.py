@@ -0,0 +1,80 @@
+"""
+Tests for the keyword scans in app.services.excel_processor
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.excel_processor import _BIZ_RE, _MAP_RE, _scan_sheets_once
+
+
+def _sheet(name, content):
+    return SimpleNamespace(sheet_name=name, content=content)
+
+
+@pytest.mark.parametrize("text", [
+    "Calculate revenue per customer",
+    "Business rules apply here",
+    "Calculated revenue amount",
+    "Filtered by conditions",
+    "Totals by region per month",
+    "Only ACTIVE customers",
+    "order_total_amount",
+    "OrderTotalAmount",
+    "CustomerStatus",
+    "Subtotal",
+    "isActiveCustomer",
+])
+def test_business_keywords_match_anywhere_in_cell(text):
+    assert _BIZ_RE.search(text)
+
+
+@pytest.mark.parametrize("text", [
+    "Customer name and region",
+    "Shipping address line",
+])
+def test_business_keywords_ignore_plain_text(text):
+    assert not _BIZ_RE.search(text)
+
+
+def test_scan_collects_business_logic_cells():
+    scan = _scan_sheets_once([_sheet("Rules", [
+        ["Description", "Notes"],
+        ["Business rules apply here", "n/a"],
+        ["Shipping address line", "Totals by region per month"],
+    ])])
+
+    assert [(hit["row"], hit["column"]) for hit in scan.business_logic] == [(2, 1), (3, 2)]
+
+
+@pytest.mark.parametrize("header", [
+    "source_table",
+    "Target_Column",
+    "Columns",
+    "SourceField",
+    "Mapping Rules",
+    "Map To",
+    "DataSource",
+    "SrcTable",
+    "DestColumn",
+    "sourceTable",
+    "ValidFrom",
+    "SOURCE_TABLE",
+])
+def test_mapping_indicators_match_header_forms(header):
+    assert _MAP_RE.search(header)
+
+
+@pytest.mark.parametrize("header", ["Totals", "Sitemap", "Tomorrow", "Customer", "Fromage"])
+def test_mapping_indicators_ignore_embedded_words(header):
+    assert not _MAP_RE.search(header)
+
+
+def test_scan_detects_snake_case_mapping_headers():
+    scan = _scan_sheets_once([
+        _sheet("Mapping", [["source_table", "source_column", "Target_Column"], ["a", "b", "c"]]),
+        _sheet("Totals", [["Region", "Totals"], ["EU", "10"]]),
+    ])
+
+    assert [sheet.has_mappings for sheet in scan.sheets] == [True, False]